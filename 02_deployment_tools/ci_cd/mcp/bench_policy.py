@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: legacy startswith/split() checks vs. the compiled SecurityPolicy
+
+Usage: python bench_policy.py [--rules 50] [--number 200000]
+"""
+
+import argparse
+import os
+import random
+import timeit
+
+from mcp_policy import SecurityPolicy
+
+
+def legacy_is_path_allowed(security, path):
+    path = os.path.abspath(path)
+    for denied in security.get("denied_paths", []):
+        if path.startswith(denied):
+            return False
+    for allowed in security.get("allowed_paths", []):
+        if path.startswith(allowed):
+            return True
+    return False
+
+
+def legacy_is_command_allowed(security, command):
+    cmd_parts = command.split()
+    if not cmd_parts:
+        return False
+    return cmd_parts[0] in security.get("allowed_commands", [])
+
+
+def build_security(rule_count):
+    allowed = [f"/srv/app{i}" for i in range(rule_count)] + ["/tmp", "/root/mcp_project"]
+    denied = [f"/srv/app{i}/secrets" for i in range(0, rule_count, 5)] + ["/root/.ssh"]
+    commands = [f"tool{i}" for i in range(rule_count)] + ["ls", "cat", "docker", "git"]
+    return {
+        "allowed_paths": allowed,
+        "denied_paths": denied,
+        "allowed_commands": commands,
+        "command_rules": [{"command": "docker", "args": ["ps*", "logs *"]}],
+    }
+
+
+def build_workload(rule_count, size, seed=1):
+    rng = random.Random(seed)
+    paths = [f"/srv/app{rng.randrange(rule_count * 2)}/data/file{rng.randrange(50)}.log"
+             for _ in range(size)]
+    commands = [rng.choice(["ls -la /tmp", "cat /tmp/x", "docker ps -a", f"tool{rng.randrange(rule_count)} --x"])
+                for _ in range(size)]
+    return paths, commands
+
+
+def run(label, func, items, number):
+    count = len(items)
+    loops = max(1, number // count)
+    seconds = timeit.timeit(lambda: [func(item) for item in items], number=loops)
+    per_call = seconds / (loops * count) * 1e9
+    print(f"  {label:<34} {per_call:>9.0f} ns/call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rules", type=int, default=50, help="number of allow rules")
+    parser.add_argument("--number", type=int, default=200000, help="checks per measurement")
+    parser.add_argument("--distinct", type=int, default=500, help="distinct paths/commands in the workload")
+    args = parser.parse_args()
+
+    security = build_security(args.rules)
+    paths, commands = build_workload(args.rules, args.distinct)
+
+    print(f"Rules: {len(security['allowed_paths'])} allowed, {len(security['denied_paths'])} denied paths; "
+          f"{len(security['allowed_commands'])} commands; {args.distinct} distinct inputs")
+
+    print("Path checks:")
+    run("legacy startswith scan", lambda p: legacy_is_path_allowed(security, p), paths, args.number)
+    uncached = SecurityPolicy.from_config(dict(security, policy_cache_size=0))
+    run("trie + realpath (no cache)", uncached.is_path_allowed, paths, args.number)
+    run("trie + abspath (no cache)",
+        SecurityPolicy.from_config(dict(security, policy_cache_size=0, resolve_symlinks=False)).is_path_allowed,
+        paths, args.number)
+    cached = SecurityPolicy.from_config(security)
+    run("trie + realpath (LRU warm)", cached.is_path_allowed, paths, args.number)
+
+    print("Command checks:")
+    run("legacy split()[0]", lambda c: legacy_is_command_allowed(security, c), commands, args.number)
+    run("shlex + arg patterns (no cache)", uncached.is_command_allowed, commands, args.number)
+    run("shlex + arg patterns (LRU warm)", cached.is_command_allowed, commands, args.number)
+
+
+if __name__ == "__main__":
+    main()
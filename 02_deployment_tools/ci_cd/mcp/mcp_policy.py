@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+MCP Security Policy Engine
+Compiles path and command allow/deny rules once and answers checks quickly.
+
+Path rules are stored in a component-wise prefix trie, so "/tmp" matches
+"/tmp" and "/tmp/x" but not "/tmpfoo". Paths are resolved with realpath
+on every check, which stops symlinks from escaping an allowed directory;
+only the trie lookup for the resolved path is cached.
+
+Command rules match the program name exactly and optionally restrict its
+arguments with fnmatch patterns. An "args" rule replaces the blanket allow
+given by allowed_commands for that program. A deny_args pattern is matched
+against the arguments starting at every position (so "git -c a=b push" hits
+"push*") and rejects the command whichever rule permits the program.
+Every command in a pipeline or list ("a | b", "a && b", "a; b") must be
+allowed; redirection targets must be allowed paths. Command substitution
+and "$" expansion are rejected because their results cannot be checked.
+
+Config ("security" block of mcp_config.json):
+    {
+        "allowed_paths": ["/root/mcp_project", "/tmp"],
+        "denied_paths": ["/root/.ssh"],
+        "allowed_commands": ["ls", "cat"],
+        "command_rules": [
+            {"command": "docker", "args": ["ps*", "logs *", "compose ps*"]},
+            {"command": "git", "deny_args": ["push*", "reset --hard*"]}
+        ],
+        "resolve_symlinks": true,
+        "policy_cache_size": 4096
+    }
+"""
+
+import os
+import shlex
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+ALLOW = 1
+DENY = 2
+
+# Tokens that separate simple commands in a shell command line
+COMMAND_SEPARATORS = {';', '&', '&&', '||', '|', '|&', '(', ')'}
+REDIRECTIONS = {'>', '>>', '<', '<<', '<<<', '<>', '>&', '<&', '&>', '&>>', '>|'}
+# Here-documents/strings take a word, not a file
+INLINE_REDIRECTIONS = {'<<', '<<<'}
+# "2>&1" and ">&-" duplicate or close a descriptor instead of opening a file
+FD_DUPLICATIONS = {'>&', '<&'}
+# Targets that never need a path check
+SAFE_REDIRECT_TARGETS = {'/dev/null'}
+# Characters shlex groups into operator tokens
+SHELL_PUNCTUATION = set('();<>|&')
+
+
+class PathRuleTrie:
+    """Prefix trie keyed by path components"""
+
+    __slots__ = ('root',)
+
+    def __init__(self):
+        self.root = {}
+
+    @staticmethod
+    def split(path: str) -> List[str]:
+        return [part for part in path.split(os.sep) if part]
+
+    def add(self, path: str, action: int):
+        node = self.root
+        for part in self.split(path):
+            node = node.setdefault(part, {})
+        # A path listed as both allowed and denied is denied
+        node[None] = node.get(None, 0) | action
+
+    def match(self, path: str) -> int:
+        """Return the union of actions on every rule that prefixes path"""
+        node = self.root
+        actions = node.get(None, 0)
+        for part in self.split(path):
+            node = node.get(part)
+            if node is None:
+                break
+            actions |= node.get(None, 0)
+        return actions
+
+
+class PathPolicy:
+    """Allow/deny path checks; a deny rule anywhere on the path wins"""
+
+    def __init__(self, allowed: Iterable[str] = (), denied: Iterable[str] = (),
+                 resolve_symlinks: bool = True, cache_size: int = 4096):
+        self.resolve_symlinks = resolve_symlinks
+        self.trie = PathRuleTrie()
+        for rule in denied:
+            self._add_rule(rule, DENY)
+        for rule in allowed:
+            self._add_rule(rule, ALLOW)
+        self._cached_match = lru_cache(maxsize=cache_size)(self.trie.match)
+
+    def _add_rule(self, rule: str, action: int):
+        self.trie.add(os.path.abspath(rule), action)
+        # Rules that are themselves symlinks must match their target too
+        if self.resolve_symlinks:
+            self.trie.add(os.path.realpath(rule), action)
+
+    def resolve(self, path: str) -> str:
+        if self.resolve_symlinks:
+            return os.path.realpath(path)
+        return os.path.abspath(path)
+
+    def is_allowed(self, path: Optional[str]) -> bool:
+        if not path:
+            return False
+        # Resolve on every call: caching by the raw path would keep serving
+        # a stale verdict after a symlink along it is replaced
+        actions = self._cached_match(self.resolve(path))
+        return not (actions & DENY) and bool(actions & ALLOW)
+
+    def cache_clear(self):
+        """Drop cached trie lookups"""
+        self._cached_match.cache_clear()
+
+
+class CommandRule:
+    """Argument restrictions for one program"""
+
+    __slots__ = ('args', 'deny_args')
+
+    def __init__(self, args: Optional[List[str]] = None, deny_args: Optional[List[str]] = None):
+        self.args = list(args) if args is not None else None
+        self.deny_args = list(deny_args or [])
+
+    def merge(self, other: 'CommandRule'):
+        """Combine with another rule for the same program"""
+        if other.args is not None:
+            self.args = (self.args or []) + other.args
+        self.deny_args.extend(other.deny_args)
+
+    def denies(self, args: List[str]) -> bool:
+        # Try every suffix so leading options cannot hide the subcommand
+        suffixes = [' '.join(args[i:]) for i in range(len(args) + 1)]
+        return any(fnmatchcase(suffix, pattern)
+                   for pattern in self.deny_args for suffix in suffixes)
+
+    def allows(self, args: List[str]) -> bool:
+        if self.args is None:
+            return True
+        arg_string = ' '.join(args)
+        return any(fnmatchcase(arg_string, pattern) for pattern in self.args)
+
+
+class CommandPolicy:
+    """Program allowlist with optional argument patterns"""
+
+    def __init__(self, allowed_commands: Iterable[str] = (), rules: Iterable[Dict] = (),
+                 paths: Optional[PathPolicy] = None, cache_size: int = 4096):
+        # One merged rule per program: args patterns narrow the blanket allow
+        # from allowed_commands instead of being OR-ed with it
+        self.rules: Dict[str, CommandRule] = {}
+        for command in allowed_commands:
+            self.rules.setdefault(command, CommandRule())
+        for rule in rules:
+            self.rules.setdefault(rule['command'], CommandRule()).merge(
+                CommandRule(rule.get('args'), rule.get('deny_args'))
+            )
+        self.paths = paths
+        self._cached_check = lru_cache(maxsize=cache_size)(self._check)
+
+    @staticmethod
+    def strip_fd_numbers(command: str) -> str:
+        """Drop the descriptor number of "2>", "1<>" etc.
+
+        shlex splits "2>" into "2" and ">", which would make the number look
+        like an argument; which descriptor is redirected does not matter to
+        the policy, only the target does.
+        """
+        out, quote, boundary, i = [], None, True, 0
+        while i < len(command):
+            ch = command[i]
+            if quote:
+                if ch == '\\' and quote == '"':
+                    out.append(command[i:i + 2])
+                    i += 2
+                    continue
+                if ch == quote:
+                    quote = None
+            elif ch == '\\':
+                out.append(command[i:i + 2])
+                boundary = False
+                i += 2
+                continue
+            elif ch in '\'"':
+                quote, boundary = ch, False
+            elif ch.isdigit() and boundary:
+                end = i
+                while end < len(command) and command[end].isdigit():
+                    end += 1
+                if end < len(command) and command[end] in '<>':
+                    i = end
+                    continue
+                boundary = False
+            else:
+                boundary = ch.isspace() or ch in SHELL_PUNCTUATION
+            out.append(ch)
+            i += 1
+        return ''.join(out)
+
+    @classmethod
+    def split_commands(cls, command: str):
+        """Split a shell command line into (argv lists, redirection targets).
+
+        Returns None if the line cannot be checked.
+        """
+        if '`' in command or '$' in command or '<(' in command or '>(' in command:
+            return None
+        lexer = shlex.shlex(cls.strip_fd_numbers(command.replace('\n', ';')),
+                            posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        try:
+            tokens = list(lexer)
+        except ValueError:
+            return None
+
+        commands, targets, argv, redirection = [], [], [], None
+        for token in tokens:
+            if redirection:
+                if token in COMMAND_SEPARATORS or token in REDIRECTIONS:
+                    return None
+                if redirection in FD_DUPLICATIONS and (token.isdigit() or token == '-'):
+                    pass
+                elif redirection not in INLINE_REDIRECTIONS:
+                    targets.append(token)
+                redirection = None
+            elif token in COMMAND_SEPARATORS:
+                if argv:
+                    commands.append(argv)
+                argv = []
+            elif token in REDIRECTIONS:
+                redirection = token
+            elif set(token) <= SHELL_PUNCTUATION:
+                return None  # run-together operators such as ";>" or "&&>"
+            else:
+                argv.append(token)
+        if redirection:
+            return None
+        if argv:
+            commands.append(argv)
+        return commands, targets
+
+    def _permits(self, argv: List[str]) -> bool:
+        rule = self.rules.get(argv[0])
+        if rule is None:
+            return False
+        return not rule.denies(argv[1:]) and rule.allows(argv[1:])
+
+    def _check(self, command: str) -> Optional[Tuple[str, ...]]:
+        """Return the redirection targets still to check, or None if denied"""
+        parsed = self.split_commands(command)
+        if not parsed or not parsed[0]:
+            return None
+        commands, targets = parsed
+        if not all(self._permits(argv) for argv in commands):
+            return None
+        return tuple(target for target in targets if target not in SAFE_REDIRECT_TARGETS)
+
+    def is_allowed(self, command: Optional[str], cwd: Optional[str] = None) -> bool:
+        """cwd is the directory the command will run in (default: ours)"""
+        if not command:
+            return False
+        targets = self._cached_check(command)
+        if targets is None:
+            return False
+        # Targets are checked per call so the path verdict follows symlinks
+        if targets and self.paths is None:
+            return False
+        return all(self.paths.is_allowed(os.path.join(cwd or os.getcwd(), target))
+                   for target in targets)
+
+
+class SecurityPolicy:
+    """Compiled form of an mcp_config.json "security" block"""
+
+    def __init__(self, allowed_paths: Iterable[str] = (), denied_paths: Iterable[str] = (),
+                 allowed_commands: Iterable[str] = (), command_rules: Iterable[Dict] = (),
+                 resolve_symlinks: bool = True, cache_size: int = 4096):
+        self.paths = PathPolicy(allowed_paths, denied_paths, resolve_symlinks, cache_size)
+        self.commands = CommandPolicy(allowed_commands, command_rules, self.paths, cache_size)
+
+    @classmethod
+    def from_config(cls, security: Dict) -> 'SecurityPolicy':
+        return cls(
+            allowed_paths=security.get('allowed_paths', []),
+            denied_paths=security.get('denied_paths', []),
+            allowed_commands=security.get('allowed_commands', []),
+            command_rules=security.get('command_rules', []),
+            resolve_symlinks=security.get('resolve_symlinks', True),
+            cache_size=security.get('policy_cache_size', 4096),
+        )
+
+    def is_path_allowed(self, path: Optional[str]) -> bool:
+        return self.paths.is_allowed(path)
+
+    def is_command_allowed(self, command: Optional[str], cwd: Optional[str] = None) -> bool:
+        return self.commands.is_allowed(command, cwd)
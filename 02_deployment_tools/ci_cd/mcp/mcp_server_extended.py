@@ -12,10 +12,14 @@ import shutil
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+from mcp_policy import SecurityPolicy
+
 class MCPServerExtended:
     def __init__(self, config_path: str = None):
         self.config = self.load_config(config_path)
         self.security = self.config.get("security", {})
+        # /ۃ[NɈxRpC
+        self.policy = SecurityPolicy.from_config(self.security)
         
     def load_config(self, config_path: str) -> Dict:
         """ݒt@Cǂݍ"""
@@ -26,35 +30,18 @@ class MCPServerExtended:
     
     def is_path_allowed(self, path: str) -> bool:
         """pXĂ邩mF"""
-        path = os.path.abspath(path)
-        
-        # ۃpX`FbN
-        for denied in self.security.get("denied_paths", []):
-            if path.startswith(denied):
-                return False
-        
-        # pX`FbN
-        for allowed in self.security.get("allowed_paths", []):
-            if path.startswith(allowed):
-                return True
-        
-        return False
+        # realpathŉAۃpXłOv΋
+        return self.policy.is_path_allowed(path)
     
-    def is_command_allowed(self, command: str) -> bool:
+    def is_command_allowed(self, command: str, working_dir: Optional[str] = None) -> bool:
         """R}hĂ邩mF"""
-        cmd_parts = command.split()
-        if not cmd_parts:
-            return False
-        
-        base_cmd = cmd_parts[0]
-        allowed_commands = self.security.get("allowed_commands", [])
-        
-        return base_cmd in allowed_commands
+        # pCvEAꂽSR}hƈp^[
+        return self.policy.is_command_allowed(command, working_dir)
     
     def execute_command(self, command: str, working_dir: Optional[str] = None) -> Dict[str, Any]:
         """R}hs"""
         try:
-            if not self.is_command_allowed(command):
+            if not self.is_command_allowed(command, working_dir):
                 return {
                     "success": False,
                     "error": f"Command not allowed: {command}"
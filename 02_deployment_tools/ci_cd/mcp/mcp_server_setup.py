@@ -125,6 +125,21 @@ def create_mcp_server_config():
                 "systemctl", "service",
                 "yum", "dnf", "apt-get"
             ],
+            "command_rules": [
+                {
+                    "command": "sudo",
+                    "args": [
+                        "systemctl start *", "systemctl stop *", "systemctl restart *",
+                        "systemctl status *", "systemctl enable *", "systemctl disable *"
+                    ]
+                },
+                {
+                    "command": "git",
+                    "deny_args": ["push*", "reset --hard*", "clean *"]
+                }
+            ],
+            "resolve_symlinks": True,
+            "policy_cache_size": 4096,
             "max_file_size": "10MB",
             "timeout": 30
         }
@@ -149,10 +164,14 @@ import shutil
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+from mcp_policy import SecurityPolicy
+
 class MCPServerExtended:
     def __init__(self, config_path: str = None):
         self.config = self.load_config(config_path)
         self.security = self.config.get("security", {})
+        # 許可/拒否ルールを起動時に一度だけコンパイル
+        self.policy = SecurityPolicy.from_config(self.security)
         
     def load_config(self, config_path: str) -> Dict:
         """設定ファイルを読み込み"""
@@ -163,35 +182,18 @@ class MCPServerExtended:
     
     def is_path_allowed(self, path: str) -> bool:
         """パスが許可されているか確認"""
-        path = os.path.abspath(path)
-        
-        # 拒否パスチェック
-        for denied in self.security.get("denied_paths", []):
-            if path.startswith(denied):
-                return False
-        
-        # 許可パスチェック
-        for allowed in self.security.get("allowed_paths", []):
-            if path.startswith(allowed):
-                return True
-        
-        return False
+        # realpathで解決後、拒否パスが一つでも前方一致すれば拒否
+        return self.policy.is_path_allowed(path)
     
-    def is_command_allowed(self, command: str) -> bool:
+    def is_command_allowed(self, command: str, working_dir: Optional[str] = None) -> bool:
         """コマンドが許可されているか確認"""
-        cmd_parts = command.split()
-        if not cmd_parts:
-            return False
-        
-        base_cmd = cmd_parts[0]
-        allowed_commands = self.security.get("allowed_commands", [])
-        
-        return base_cmd in allowed_commands
+        # パイプ・連結された全コマンドと引数パターンを検査
+        return self.policy.is_command_allowed(command, working_dir)
     
     def execute_command(self, command: str, working_dir: Optional[str] = None) -> Dict[str, Any]:
         """コマンドを実行"""
         try:
-            if not self.is_command_allowed(command):
+            if not self.is_command_allowed(command, working_dir):
                 return {
                     "success": False,
                     "error": f"Command not allowed: {command}"
@@ -464,6 +466,10 @@ cat > scripts/mcp_server.py << 'EOF'
 <<<SERVER_CONTENT>>>
 EOF
 
+cat > scripts/mcp_policy.py << 'EOF'
+<<<POLICY_CONTENT>>>
+EOF
+
 chmod +x scripts/mcp_server.py
 
 # 5. systemdサービス作成（オプション）
@@ -519,10 +525,20 @@ if __name__ == "__main__":
         f.write(server_script)
     print(f"[OK] サーバスクリプト作成: {server_path}")
     
+    # セキュリティポリシーモジュール（サーバスクリプトと同じディレクトリに配置）
+    policy_source = Path(__file__).resolve().with_name("mcp_policy.py")
+    policy_script = policy_source.read_text(encoding="utf-8")
+    policy_path = "mcp_policy.py"
+    if Path(policy_path).resolve() != policy_source:
+        with open(policy_path, 'w') as f:
+            f.write(policy_script)
+        print(f"[OK] ポリシーモジュール作成: {policy_path}")
+    
     # インストールスクリプト作成
     install_script = create_installation_script()
     install_script = install_script.replace("<<<CONFIG_CONTENT>>>", json.dumps(config, indent=2))
     install_script = install_script.replace("<<<SERVER_CONTENT>>>", server_script)
+    install_script = install_script.replace("<<<POLICY_CONTENT>>>", policy_script.rstrip("\n"))
     
     install_path = "install_mcp_extended.sh"
     with open(install_path, 'w') as f:
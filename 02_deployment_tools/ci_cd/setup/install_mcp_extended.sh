@@ -147,6 +147,29 @@ cat > config/mcp_config.json << 'EOF'
       "dnf",
       "apt-get"
     ],
+    "command_rules": [
+      {
+        "command": "sudo",
+        "args": [
+          "systemctl start *",
+          "systemctl stop *",
+          "systemctl restart *",
+          "systemctl status *",
+          "systemctl enable *",
+          "systemctl disable *"
+        ]
+      },
+      {
+        "command": "git",
+        "deny_args": [
+          "push*",
+          "reset --hard*",
+          "clean *"
+        ]
+      }
+    ],
+    "resolve_symlinks": true,
+    "policy_cache_size": 4096,
     "max_file_size": "10MB",
     "timeout": 30
   }
@@ -170,10 +193,14 @@ import shutil
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+from mcp_policy import SecurityPolicy
+
 class MCPServerExtended:
     def __init__(self, config_path: str = None):
         self.config = self.load_config(config_path)
         self.security = self.config.get("security", {})
+        # /ۃ[NɈxRpC
+        self.policy = SecurityPolicy.from_config(self.security)
         
     def load_config(self, config_path: str) -> Dict:
         """ݒt@Cǂݍ"""
@@ -184,30 +211,13 @@ class MCPServerExtended:
     
     def is_path_allowed(self, path: str) -> bool:
         """pXĂ邩mF"""
-        path = os.path.abspath(path)
-        
-        # ۃpX`FbN
-        for denied in self.security.get("denied_paths", []):
-            if path.startswith(denied):
-                return False
-        
-        # pX`FbN
-        for allowed in self.security.get("allowed_paths", []):
-            if path.startswith(allowed):
-                return True
-        
-        return False
+        # realpathŉAۃpXłOv΋
+        return self.policy.is_path_allowed(path)
     
     def is_command_allowed(self, command: str) -> bool:
         """R}hĂ邩mF"""
-        cmd_parts = command.split()
-        if not cmd_parts:
-            return False
-        
-        base_cmd = cmd_parts[0]
-        allowed_commands = self.security.get("allowed_commands", [])
-        
-        return base_cmd in allowed_commands
+        # pCvEAꂽSR}hƈp^[
+        return self.policy.is_command_allowed(command)
     
     def execute_command(self, command: str, working_dir: Optional[str] = None) -> Dict[str, Any]:
         """R}hs"""
@@ -450,6 +460,227 @@ if __name__ == "__main__":
 
 EOF
 
+cat > scripts/mcp_policy.py << 'EOF'
+#!/usr/bin/env python3
+"""
+MCP Security Policy Engine
+Compiles path and command allow/deny rules once and answers checks quickly.
+
+Path rules are stored in a component-wise prefix trie, so "/tmp" matches
+"/tmp" and "/tmp/x" but not "/tmpfoo". Paths are resolved with realpath
+before matching, which stops symlinks from escaping an allowed directory.
+
+Command rules match the program name exactly and optionally restrict its
+arguments with fnmatch patterns; a matching deny_args pattern rejects the
+command even if another rule (or allowed_commands) permits the program.
+Every command in a pipeline or list ("a | b", "a && b", "a; b") must be
+allowed; command substitution is rejected because its contents cannot be
+checked.
+
+Config ("security" block of mcp_config.json):
+    {
+        "allowed_paths": ["/root/mcp_project", "/tmp"],
+        "denied_paths": ["/root/.ssh"],
+        "allowed_commands": ["ls", "cat"],
+        "command_rules": [
+            {"command": "docker", "args": ["ps*", "logs *", "compose ps*"]},
+            {"command": "git", "deny_args": ["push*", "reset --hard*"]}
+        ],
+        "resolve_symlinks": true,
+        "policy_cache_size": 4096
+    }
+"""
+
+import os
+import shlex
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+ALLOW = 1
+DENY = 2
+
+# Tokens that separate simple commands in a shell command line
+COMMAND_SEPARATORS = {';', '&', '&&', '||', '|', '|&', '(', ')'}
+REDIRECTIONS = {'>', '>>', '<', '<<', '<<<', '>&', '<&', '&>', '&>>', '>|'}
+
+
+class PathRuleTrie:
+    """Prefix trie keyed by path components"""
+
+    __slots__ = ('root',)
+
+    def __init__(self):
+        self.root = {}
+
+    @staticmethod
+    def split(path: str) -> List[str]:
+        return [part for part in path.split(os.sep) if part]
+
+    def add(self, path: str, action: int):
+        node = self.root
+        for part in self.split(path):
+            node = node.setdefault(part, {})
+        # A path listed as both allowed and denied is denied
+        node[None] = node.get(None, 0) | action
+
+    def match(self, path: str) -> int:
+        """Return the union of actions on every rule that prefixes path"""
+        node = self.root
+        actions = node.get(None, 0)
+        for part in self.split(path):
+            node = node.get(part)
+            if node is None:
+                break
+            actions |= node.get(None, 0)
+        return actions
+
+
+class PathPolicy:
+    """Allow/deny path checks; a deny rule anywhere on the path wins"""
+
+    def __init__(self, allowed: Iterable[str] = (), denied: Iterable[str] = (),
+                 resolve_symlinks: bool = True, cache_size: int = 4096):
+        self.resolve_symlinks = resolve_symlinks
+        self.trie = PathRuleTrie()
+        for rule in denied:
+            self._add_rule(rule, DENY)
+        for rule in allowed:
+            self._add_rule(rule, ALLOW)
+        self._cached_check = lru_cache(maxsize=cache_size)(self._check)
+
+    def _add_rule(self, rule: str, action: int):
+        self.trie.add(os.path.abspath(rule), action)
+        # Rules that are themselves symlinks must match their target too
+        if self.resolve_symlinks:
+            self.trie.add(os.path.realpath(rule), action)
+
+    def resolve(self, path: str) -> str:
+        if self.resolve_symlinks:
+            return os.path.realpath(path)
+        return os.path.abspath(path)
+
+    def _check(self, path: str) -> bool:
+        actions = self.trie.match(self.resolve(path))
+        return not (actions & DENY) and bool(actions & ALLOW)
+
+    def is_allowed(self, path: Optional[str]) -> bool:
+        if not path:
+            return False
+        return self._cached_check(path)
+
+    def cache_clear(self):
+        """Drop cached decisions (call after creating or replacing symlinks)"""
+        self._cached_check.cache_clear()
+
+
+class CommandRule:
+    """Argument restrictions for one program"""
+
+    __slots__ = ('args', 'deny_args')
+
+    def __init__(self, args: Optional[List[str]] = None, deny_args: Optional[List[str]] = None):
+        self.args = list(args) if args is not None else None
+        self.deny_args = list(deny_args or [])
+
+    def denies(self, arg_string: str) -> bool:
+        return any(fnmatchcase(arg_string, pattern) for pattern in self.deny_args)
+
+    def allows(self, arg_string: str) -> bool:
+        if self.args is None:
+            return True
+        return any(fnmatchcase(arg_string, pattern) for pattern in self.args)
+
+
+class CommandPolicy:
+    """Program allowlist with optional argument patterns"""
+
+    def __init__(self, allowed_commands: Iterable[str] = (), rules: Iterable[Dict] = (),
+                 cache_size: int = 4096):
+        self.rules: Dict[str, List[CommandRule]] = {}
+        for command in allowed_commands:
+            self.rules.setdefault(command, []).append(CommandRule())
+        for rule in rules:
+            self.rules.setdefault(rule['command'], []).append(
+                CommandRule(rule.get('args'), rule.get('deny_args'))
+            )
+        self._cached_check = lru_cache(maxsize=cache_size)(self._check)
+
+    @staticmethod
+    def split_commands(command: str) -> Optional[List[List[str]]]:
+        """Split a shell command line into argv lists, or None if unparseable"""
+        if '`' in command or '$(' in command or '<(' in command or '>(' in command:
+            return None
+        lexer = shlex.shlex(command.replace('\n', ';'), posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        try:
+            tokens = list(lexer)
+        except ValueError:
+            return None
+
+        commands, argv, skip_next = [], [], False
+        for token in tokens:
+            if skip_next:
+                skip_next = False
+            elif token in COMMAND_SEPARATORS:
+                if argv:
+                    commands.append(argv)
+                argv = []
+            elif token in REDIRECTIONS:
+                skip_next = True
+            else:
+                argv.append(token)
+        if argv:
+            commands.append(argv)
+        return commands
+
+    def _permits(self, argv: List[str]) -> bool:
+        # deny_args apply to the program as a whole, whichever rule declares them
+        rules = self.rules.get(argv[0], ())
+        arg_string = ' '.join(argv[1:])
+        if any(rule.denies(arg_string) for rule in rules):
+            return False
+        return any(rule.allows(arg_string) for rule in rules)
+
+    def _check(self, command: str) -> bool:
+        commands = self.split_commands(command)
+        if not commands:
+            return False
+        return all(self._permits(argv) for argv in commands)
+
+    def is_allowed(self, command: Optional[str]) -> bool:
+        if not command:
+            return False
+        return self._cached_check(command)
+
+
+class SecurityPolicy:
+    """Compiled form of an mcp_config.json "security" block"""
+
+    def __init__(self, allowed_paths: Iterable[str] = (), denied_paths: Iterable[str] = (),
+                 allowed_commands: Iterable[str] = (), command_rules: Iterable[Dict] = (),
+                 resolve_symlinks: bool = True, cache_size: int = 4096):
+        self.paths = PathPolicy(allowed_paths, denied_paths, resolve_symlinks, cache_size)
+        self.commands = CommandPolicy(allowed_commands, command_rules, cache_size)
+
+    @classmethod
+    def from_config(cls, security: Dict) -> 'SecurityPolicy':
+        return cls(
+            allowed_paths=security.get('allowed_paths', []),
+            denied_paths=security.get('denied_paths', []),
+            allowed_commands=security.get('allowed_commands', []),
+            command_rules=security.get('command_rules', []),
+            resolve_symlinks=security.get('resolve_symlinks', True),
+            cache_size=security.get('policy_cache_size', 4096),
+        )
+
+    def is_path_allowed(self, path: Optional[str]) -> bool:
+        return self.paths.is_allowed(path)
+
+    def is_command_allowed(self, command: Optional[str]) -> bool:
+        return self.commands.is_allowed(command)
+EOF
+
 chmod +x scripts/mcp_server.py
 
 # 5. systemdT[rX쐬iIvVj
@@ -4,8 +4,9 @@ MCP Server API Implementation
 Provides all MCP tools via REST API endpoints
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
+from concurrent.futures import as_completed
 import os
 import subprocess
 import json
@@ -16,37 +17,29 @@ import docker
 from datetime import datetime
 import logging
 
+from mcp_common import (
+    is_path_allowed, is_command_allowed,
+    file_etag, scan_directory, directory_items, Snapshot, system_info_snapshot,
+    batch_executor, run_file_operation_group, group_file_operations, validate_batch
+)
+
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['ETag'])
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Security configuration
-ALLOWED_PATHS = [
-    "/root/mcp_project",
-    "/root/mcp_containers",
-    "/var/www",
-    "/tmp"
-]
-
-ALLOWED_COMMANDS = [
-    "ls", "pwd", "cat", "echo", "grep", "find",
-    "docker", "systemctl", "service", "ps", "netstat"
-]
-
-def is_path_allowed(path):
-    """Check if path is allowed"""
-    abs_path = os.path.abspath(path)
-    return any(abs_path.startswith(allowed) for allowed in ALLOWED_PATHS)
+# Conditional requests (ETag / If-None-Match)
+def etag_response(response, etag, weak=False):
+    """Attach an ETag and force clients to revalidate before reuse"""
+    response.set_etag(etag, weak=weak)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
-def is_command_allowed(command):
-    """Check if command is allowed"""
-    cmd_parts = command.split()
-    if not cmd_parts:
-        return False
-    return cmd_parts[0] in ALLOWED_COMMANDS
+def not_modified(etag, weak=False):
+    """Empty 304 response for a matching If-None-Match"""
+    return etag_response(app.response_class(status=304), etag, weak)
 
 # Health check endpoint
 @app.route('/health', methods=['GET'])
@@ -68,14 +61,18 @@ def read_file():
         if not is_path_allowed(path):
             return jsonify({"error": "Path not allowed"}), 403
         
+        etag = file_etag(os.stat(path))
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag, weak=True)
+        
         with open(path, 'r') as f:
             content = f.read()
         
-        return jsonify({
+        return etag_response(jsonify({
             "success": True,
             "content": content,
             "path": path
-        })
+        }), etag, weak=True)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -131,25 +128,43 @@ def list_directory():
         if not is_path_allowed(path):
             return jsonify({"error": "Path not allowed"}), 403
         
-        items = []
-        for item in os.listdir(path):
-            item_path = os.path.join(path, item)
-            stat = os.stat(item_path)
-            items.append({
-                "name": item,
-                "type": "directory" if os.path.isdir(item_path) else "file",
-                "size": stat.st_size,
-                "modified": datetime.fromtimestamp(stat.st_mtime).isoformat()
-            })
+        etag, entries = scan_directory(path)
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag, weak=True)
         
-        return jsonify({
+        return etag_response(jsonify({
             "success": True,
             "path": path,
-            "items": items
-        })
+            "items": directory_items(entries)
+        }), etag, weak=True)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/file/batch', methods=['POST'])
+def batch_file_operations():
+    """Run read/stat/exists/delete/write operations concurrently.
+    
+    Results are streamed as NDJSON in completion order, one record per
+    operation (tagged with its request index), followed by a summary line.
+    Operations on the same or nested paths are applied sequentially.
+    """
+    operations, error = validate_batch(request.get_json(silent=True))
+    if error:
+        return jsonify({"error": error}), 400
+    
+    futures = [batch_executor.submit(run_file_operation_group, group)
+               for group in group_file_operations(operations)]
+    
+    def generate():
+        failed = 0
+        for future in as_completed(futures):
+            for record in future.result():
+                failed += 0 if record["success"] else 1
+                yield json.dumps(record) + "\n"
+        yield json.dumps({"done": True, "count": len(operations), "failed": failed}) + "\n"
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
 # System Operations
 @app.route('/api/system/execute', methods=['POST'])
 def execute_command():
@@ -182,25 +197,11 @@ def execute_command():
 @app.route('/api/system/info', methods=['GET'])
 def get_system_info():
     try:
-        return jsonify({
-            "success": True,
-            "hostname": os.uname().nodename,
-            "platform": os.uname().sysname,
-            "release": os.uname().release,
-            "cpu_count": psutil.cpu_count(),
-            "cpu_percent": psutil.cpu_percent(interval=1),
-            "memory": {
-                "total": psutil.virtual_memory().total,
-                "available": psutil.virtual_memory().available,
-                "percent": psutil.virtual_memory().percent
-            },
-            "disk": {
-                "total": psutil.disk_usage('/').total,
-                "used": psutil.disk_usage('/').used,
-                "free": psutil.disk_usage('/').free,
-                "percent": psutil.disk_usage('/').percent
-            }
-        })
+        body, etag = system_info_snapshot.get()
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+        
+        return etag_response(app.response_class(body, mimetype='application/json'), etag)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -239,25 +240,34 @@ def kill_process():
         return jsonify({"error": str(e)}), 500
 
 # Docker Operations
+def collect_containers():
+    client = docker.from_env()
+    containers = []
+    
+    for container in client.containers.list(all=True):
+        containers.append({
+            "id": container.short_id,
+            "name": container.name,
+            "image": container.image.tags[0] if container.image.tags else "unknown",
+            "status": container.status,
+            "ports": container.ports
+        })
+    
+    return {
+        "success": True,
+        "containers": containers
+    }
+
+containers_snapshot = Snapshot(collect_containers)
+
 @app.route('/api/docker/containers', methods=['GET'])
 def list_containers():
     try:
-        client = docker.from_env()
-        containers = []
-        
-        for container in client.containers.list(all=True):
-            containers.append({
-                "id": container.short_id,
-                "name": container.name,
-                "image": container.image.tags[0] if container.image.tags else "unknown",
-                "status": container.status,
-                "ports": container.ports
-            })
+        body, etag = containers_snapshot.get()
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
         
-        return jsonify({
-            "success": True,
-            "containers": containers
-        })
+        return etag_response(app.response_class(body, mimetype='application/json'), etag)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
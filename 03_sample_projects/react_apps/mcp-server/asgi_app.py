@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+MCP Server API - ASGI Implementation
+Async version of app.py exposing the same /api/* endpoints.
+Run with: uvicorn --host 0.0.0.0 --port 8080 --workers 2 asgi_app:app
+"""
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.http import parse_etags, quote_etag
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+import shutil
+import psutil
+import docker
+from datetime import datetime
+import json
+import logging
+
+from mcp_common import (
+    is_path_allowed, is_command_allowed,
+    file_etag, scan_directory, directory_items, Snapshot, system_info_snapshot,
+    batch_executor, run_file_operation_group, group_file_operations, validate_batch
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Execution configuration
+COMMAND_TIMEOUT = 30
+DOCKER_MAX_WORKERS = int(os.environ.get('MCP_DOCKER_WORKERS', 4))
+
+# Docker SDK calls are blocking; keep them on a small dedicated pool so a slow
+# daemon cannot exhaust the default executor used for file and psutil calls.
+docker_executor = ThreadPoolExecutor(max_workers=DOCKER_MAX_WORKERS, thread_name_prefix='docker')
+_docker_client = None
+
+def get_docker_client():
+    """Return a shared Docker client (created lazily in the docker pool)"""
+    global _docker_client
+    if _docker_client is None:
+        _docker_client = docker.from_env()
+    return _docker_client
+
+async def run_docker(func, *args):
+    """Run a blocking Docker SDK call on the bounded docker pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(docker_executor, func, *args)
+
+async def run_shell(command, timeout=None):
+    """Run a shell command without blocking the event loop"""
+    process = await asyncio.create_subprocess_shell(
+        command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise
+    return (
+        stdout.decode('utf-8', errors='replace'),
+        stderr.decode('utf-8', errors='replace'),
+        process.returncode
+    )
+
+def error_response(message, status_code=500):
+    return JSONResponse({"error": message}, status_code=status_code)
+
+# Conditional requests
+def if_none_match(request, etag, weak=False):
+    """True when the request's If-None-Match matches etag"""
+    etags = parse_etags(request.headers.get('if-none-match'))
+    return etags.contains_weak(etag) if weak else etags.contains(etag)
+
+def etag_response(response, etag, weak=False):
+    """Attach an ETag and force clients to revalidate before reuse"""
+    response.headers['ETag'] = quote_etag(etag, weak)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def not_modified(etag, weak=False):
+    """Empty 304 response for a matching If-None-Match"""
+    return etag_response(Response(status_code=304), etag, weak)
+
+# Health check endpoint
+async def health_check(request):
+    return JSONResponse({
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "service": "MCP Server API (ASGI)",
+        "version": "1.0.0"
+    })
+
+# File Operations
+def _read_text(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+def _write_text(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+def _delete_path(path):
+    if os.path.isfile(path):
+        os.remove(path)
+    elif os.path.isdir(path):
+        shutil.rmtree(path)
+
+async def read_file(request):
+    try:
+        data = await request.json()
+        path = data.get('path')
+
+        if not is_path_allowed(path):
+            return error_response("Path not allowed", 403)
+
+        etag = file_etag(await asyncio.to_thread(os.stat, path))
+        if if_none_match(request, etag, weak=True):
+            return not_modified(etag, weak=True)
+
+        content = await asyncio.to_thread(_read_text, path)
+
+        return etag_response(JSONResponse({
+            "success": True,
+            "content": content,
+            "path": path
+        }), etag, weak=True)
+    except Exception as e:
+        return error_response(str(e))
+
+async def write_file(request):
+    try:
+        data = await request.json()
+        path = data.get('path')
+        content = data.get('content', '')
+
+        if not is_path_allowed(path):
+            return error_response("Path not allowed", 403)
+
+        await asyncio.to_thread(_write_text, path, content)
+
+        return JSONResponse({
+            "success": True,
+            "path": path,
+            "size": len(content)
+        })
+    except Exception as e:
+        return error_response(str(e))
+
+async def delete_file(request):
+    try:
+        data = await request.json()
+        path = data.get('path')
+
+        if not is_path_allowed(path):
+            return error_response("Path not allowed", 403)
+
+        await asyncio.to_thread(_delete_path, path)
+
+        return JSONResponse({
+            "success": True,
+            "path": path
+        })
+    except Exception as e:
+        return error_response(str(e))
+
+async def list_directory(request):
+    try:
+        data = await request.json()
+        path = data.get('path', '/')
+
+        if not is_path_allowed(path):
+            return error_response("Path not allowed", 403)
+
+        etag, entries = await asyncio.to_thread(scan_directory, path)
+        if if_none_match(request, etag, weak=True):
+            return not_modified(etag, weak=True)
+
+        return etag_response(JSONResponse({
+            "success": True,
+            "path": path,
+            "items": directory_items(entries)
+        }), etag, weak=True)
+    except Exception as e:
+        return error_response(str(e))
+
+async def batch_file_operations(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    operations, error = validate_batch(data)
+    if error:
+        return error_response(error, 400)
+
+    loop = asyncio.get_running_loop()
+    futures = [loop.run_in_executor(batch_executor, run_file_operation_group, group)
+               for group in group_file_operations(operations)]
+
+    async def generate():
+        failed = 0
+        for future in asyncio.as_completed(futures):
+            for record in await future:
+                failed += 0 if record["success"] else 1
+                yield (json.dumps(record) + "\n").encode('utf-8')
+        yield (json.dumps({"done": True, "count": len(operations), "failed": failed}) + "\n").encode('utf-8')
+
+    return StreamingResponse(generate(), media_type='application/x-ndjson')
+
+# System Operations
+async def execute_command(request):
+    try:
+        data = await request.json()
+        command = data.get('command')
+
+        if not is_command_allowed(command):
+            return error_response("Command not allowed", 403)
+
+        stdout, stderr, returncode = await run_shell(command, timeout=COMMAND_TIMEOUT)
+
+        return JSONResponse({
+            "success": True,
+            "stdout": stdout,
+            "stderr": stderr,
+            "returncode": returncode
+        })
+    except asyncio.TimeoutError:
+        return error_response("Command timeout")
+    except Exception as e:
+        return error_response(str(e))
+
+async def get_system_info(request):
+    try:
+        # cpu_percent(interval=1) sleeps for a second; keep it off the loop
+        body, etag = await asyncio.to_thread(system_info_snapshot.get)
+        if if_none_match(request, etag):
+            return not_modified(etag)
+
+        return etag_response(Response(body, media_type='application/json'), etag)
+    except Exception as e:
+        return error_response(str(e))
+
+# Process Management
+def _process_list():
+    processes = []
+    for proc in psutil.process_iter(['pid', 'name', 'status', 'cpu_percent', 'memory_percent']):
+        try:
+            processes.append(proc.info)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return processes
+
+async def list_processes(request):
+    try:
+        processes = await asyncio.to_thread(_process_list)
+
+        return JSONResponse({
+            "success": True,
+            "processes": processes[:100]  # Limit to 100 processes
+        })
+    except Exception as e:
+        return error_response(str(e))
+
+async def kill_process(request):
+    try:
+        data = await request.json()
+        pid = data.get('pid')
+
+        process = psutil.Process(pid)
+        process.terminate()
+
+        return JSONResponse({
+            "success": True,
+            "pid": pid
+        })
+    except Exception as e:
+        return error_response(str(e))
+
+# Docker Operations
+def _container_list():
+    containers = []
+    for container in get_docker_client().containers.list(all=True):
+        containers.append({
+            "id": container.short_id,
+            "name": container.name,
+            "image": container.image.tags[0] if container.image.tags else "unknown",
+            "status": container.status,
+            "ports": container.ports
+        })
+    return {
+        "success": True,
+        "containers": containers
+    }
+
+containers_snapshot = Snapshot(_container_list)
+
+def _container_start(container_id):
+    get_docker_client().containers.get(container_id).start()
+
+def _container_stop(container_id):
+    get_docker_client().containers.get(container_id).stop()
+
+def _container_logs(container_id):
+    return get_docker_client().containers.get(container_id).logs(tail=100).decode('utf-8')
+
+async def list_containers(request):
+    try:
+        body, etag = await run_docker(containers_snapshot.get)
+        if if_none_match(request, etag):
+            return not_modified(etag)
+
+        return etag_response(Response(body, media_type='application/json'), etag)
+    except Exception as e:
+        return error_response(str(e))
+
+async def start_container(request):
+    container_id = request.path_params['container_id']
+    try:
+        await run_docker(_container_start, container_id)
+
+        return JSONResponse({
+            "success": True,
+            "container_id": container_id,
+            "status": "started"
+        })
+    except Exception as e:
+        return error_response(str(e))
+
+async def stop_container(request):
+    container_id = request.path_params['container_id']
+    try:
+        await run_docker(_container_stop, container_id)
+
+        return JSONResponse({
+            "success": True,
+            "container_id": container_id,
+            "status": "stopped"
+        })
+    except Exception as e:
+        return error_response(str(e))
+
+async def get_container_logs(request):
+    container_id = request.path_params['container_id']
+    try:
+        logs = await run_docker(_container_logs, container_id)
+
+        return JSONResponse({
+            "success": True,
+            "container_id": container_id,
+            "logs": logs
+        })
+    except Exception as e:
+        return error_response(str(e))
+
+# Service Management
+async def get_service_status(request):
+    service_name = request.path_params['service_name']
+    try:
+        stdout, _, _ = await run_shell(f"systemctl status {service_name}")
+
+        return JSONResponse({
+            "success": True,
+            "service": service_name,
+            "status": "active" if "active (running)" in stdout else "inactive",
+            "output": stdout
+        })
+    except Exception as e:
+        return error_response(str(e))
+
+async def restart_service(request):
+    service_name = request.path_params['service_name']
+    try:
+        if service_name not in ["nginx", "docker", "mcp-server"]:
+            return error_response("Service not allowed", 403)
+
+        await run_shell(f"systemctl restart {service_name}")
+
+        return JSONResponse({
+            "success": True,
+            "service": service_name,
+            "action": "restarted"
+        })
+    except Exception as e:
+        return error_response(str(e))
+
+def shutdown_executors():
+    docker_executor.shutdown(wait=False)
+
+routes = [
+    Route('/health', health_check, methods=['GET']),
+    Route('/api/file/read', read_file, methods=['POST']),
+    Route('/api/file/write', write_file, methods=['POST']),
+    Route('/api/file/delete', delete_file, methods=['POST']),
+    Route('/api/file/list', list_directory, methods=['POST']),
+    Route('/api/file/batch', batch_file_operations, methods=['POST']),
+    Route('/api/system/execute', execute_command, methods=['POST']),
+    Route('/api/system/info', get_system_info, methods=['GET']),
+    Route('/api/process/list', list_processes, methods=['GET']),
+    Route('/api/process/kill', kill_process, methods=['POST']),
+    Route('/api/docker/containers', list_containers, methods=['GET']),
+    Route('/api/docker/container/{container_id}/start', start_container, methods=['POST']),
+    Route('/api/docker/container/{container_id}/stop', stop_container, methods=['POST']),
+    Route('/api/docker/container/{container_id}/logs', get_container_logs, methods=['GET']),
+    Route('/api/service/{service_name}/status', get_service_status, methods=['GET']),
+    Route('/api/service/{service_name}/restart', restart_service, methods=['POST']),
+]
+
+middleware = [
+    Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'],
+               allow_headers=['*'], expose_headers=['ETag'])
+]
+
+app = Starlette(routes=routes, middleware=middleware, on_shutdown=[shutdown_executors])
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=8080)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+MCP Server API Benchmark
+Compares requests/sec and latency percentiles of the Flask (WSGI) and
+Starlette (ASGI) servers under concurrent load.
+
+Usage:
+  gunicorn --bind 0.0.0.0:8080 --workers 2 app:app
+  uvicorn --host 0.0.0.0 --port 8081 --workers 2 asgi_app:app
+  python benchmark_servers.py --target flask=http://localhost:8080 \\
+                              --target asgi=http://localhost:8081
+"""
+
+import argparse
+import http.client
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+# (method, path, body) - a mix of cheap, blocking and subprocess-backed calls
+DEFAULT_SCENARIO = [
+    ('GET', '/health', None),
+    ('GET', '/api/system/info', None),
+    ('POST', '/api/system/execute', {"command": "echo benchmark"}),
+    ('POST', '/api/file/list', {"path": "/tmp"}),
+    ('GET', '/api/docker/containers', None),
+]
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+def run_worker(base_url, scenario, deadline, timeout):
+    """Issue requests on one keep-alive connection until the deadline"""
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+    latencies = []
+    errors = 0
+    i = 0
+
+    while time.perf_counter() < deadline:
+        method, path, body = scenario[i % len(scenario)]
+        i += 1
+        payload = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload else {}
+        start = time.perf_counter()
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+        except Exception:
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+
+    conn.close()
+    return latencies, errors
+
+def benchmark(name, base_url, scenario, concurrency, duration, timeout):
+    """Run the scenario against one server and summarise the results"""
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(run_worker, base_url, scenario, deadline, timeout)
+                   for _ in range(concurrency)]
+        results = [f.result() for f in futures]
+
+    elapsed = time.perf_counter() - started
+    latencies = sorted(l for worker_latencies, _ in results for l in worker_latencies)
+    errors = sum(e for _, e in results)
+
+    return {
+        'name': name,
+        'url': base_url,
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': (percentile(latencies, 50) or 0) * 1000,
+        'p99_ms': (percentile(latencies, 99) or 0) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the WSGI and ASGI MCP Server API')
+    parser.add_argument('--target', action='append', required=True,
+                        help='name=url of a running server (repeatable)')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per target')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--path', action='append',
+                        help='only exercise the given GET path (repeatable)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    scenario = [('GET', p, None) for p in args.path] if args.path else DEFAULT_SCENARIO
+
+    summaries = []
+    for target in args.target:
+        name, sep, url = target.partition('=')
+        if not sep:
+            name, url = target, target
+        print(f"Benchmarking {name} ({url}) for {args.duration:.0f}s with {args.concurrency} clients...")
+        summaries.append(benchmark(name, url.rstrip('/'), scenario,
+                                   args.concurrency, args.duration, args.timeout))
+
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+        return
+
+    print(f"\n{'server':<10} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for s in summaries:
+        print(f"{s['name']:<10} {s['requests']:>9} {s['errors']:>7} {s['rps']:>9.1f} "
+              f"{s['p50_ms']:>9.1f} {s['p99_ms']:>9.1f} {s['max_ms']:>9.1f}")
+
+if __name__ == '__main__':
+    main()
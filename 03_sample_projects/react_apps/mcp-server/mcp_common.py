@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+MCP Server shared helpers
+Security policy, conditional-request snapshots, batch file operations and
+system info collection used by both app.py (Flask) and asgi_app.py (ASGI).
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import json
+import shutil
+import hashlib
+import threading
+import time
+import psutil
+from datetime import datetime
+
+from mcp_policy import SecurityPolicy
+
+# Security configuration
+ALLOWED_PATHS = [
+    "/root/mcp_project",
+    "/root/mcp_containers",
+    "/var/www",
+    "/tmp"
+]
+
+ALLOWED_COMMANDS = [
+    "ls", "pwd", "cat", "echo", "grep", "find",
+    "docker", "systemctl", "service", "ps", "netstat"
+]
+
+# Compiled once: realpath-resolved prefix trie for paths, per-program
+# argument patterns for commands, both behind an LRU cache
+POLICY = SecurityPolicy(allowed_paths=ALLOWED_PATHS, allowed_commands=ALLOWED_COMMANDS)
+
+def is_path_allowed(path):
+    """Check if path is allowed"""
+    return POLICY.is_path_allowed(path)
+
+def is_command_allowed(command):
+    """Check if command is allowed"""
+    return POLICY.is_command_allowed(command)
+
+# Conditional requests (ETag / If-None-Match)
+SNAPSHOT_TTL = float(os.environ.get('MCP_SNAPSHOT_TTL', 5))
+
+def file_etag(stat_result):
+    """Weak ETag derived from inode, size and mtime (no content hashing)"""
+    return f"{stat_result.st_ino:x}-{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"
+
+def scan_directory(path):
+    """Stat directory entries once; return (etag, entries) for list responses"""
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            stat = entry.stat()
+            entries.append((entry.name, entry.is_dir(), stat.st_size, stat.st_mtime))
+    etag = hashlib.sha1(repr(entries).encode('utf-8')).hexdigest()[:20]
+    return etag, entries
+
+def directory_items(entries):
+    """Convert scan_directory entries into the /api/file/list item format"""
+    return [{
+        "name": name,
+        "type": "directory" if is_dir else "file",
+        "size": size,
+        "modified": datetime.fromtimestamp(mtime).isoformat()
+    } for name, is_dir, size, mtime in entries]
+
+class Snapshot:
+    """Pre-serialized JSON payload refreshed at most once per TTL.
+
+    The ETag is a hash of the serialized body, so it is identical across
+    workers; ``generation`` increments only when the content changes.
+    Concurrent pollers share one refresh instead of each recomputing it.
+    """
+
+    def __init__(self, producer, ttl=SNAPSHOT_TTL):
+        self.producer = producer
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.body = None
+        self.etag = None
+        self.generation = 0
+        self.expires_at = 0.0
+
+    def get(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.body is None or now >= self.expires_at:
+                body = json.dumps(self.producer(), sort_keys=True)
+                etag = hashlib.sha1(body.encode('utf-8')).hexdigest()[:20]
+                if etag != self.etag:
+                    self.body = body
+                    self.etag = etag
+                    self.generation += 1
+                self.expires_at = now + self.ttl
+            return self.body, self.etag
+
+# Batch File Operations
+BATCH_OPERATIONS = ('read', 'stat', 'exists', 'delete', 'write')
+BATCH_MAX_OPERATIONS = int(os.environ.get('MCP_BATCH_MAX_OPERATIONS', 200))
+BATCH_MAX_WORKERS = int(os.environ.get('MCP_BATCH_WORKERS', 8))
+
+# Shared by all batch requests so concurrent batches cannot multiply threads
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix='file-batch')
+
+def run_file_operation(index, operation):
+    """Execute a single batch operation and return its NDJSON record"""
+    op = operation.get('op')
+    path = operation.get('path')
+    record = {"index": index, "op": op, "path": path}
+    
+    if op not in BATCH_OPERATIONS:
+        record.update({"success": False, "error": f"Unknown operation: {op}"})
+        return record
+    if not path or not is_path_allowed(path):
+        record.update({"success": False, "error": "Path not allowed"})
+        return record
+    
+    try:
+        if op == 'read':
+            etag = file_etag(os.stat(path))
+            if operation.get('if_none_match') == etag:
+                record.update({"success": True, "not_modified": True, "etag": etag})
+            else:
+                with open(path, 'r') as f:
+                    content = f.read()
+                record.update({"success": True, "content": content, "etag": etag})
+        elif op == 'stat':
+            stat = os.stat(path)
+            record.update({
+                "success": True,
+                "type": "directory" if os.path.isdir(path) else "file",
+                "size": stat.st_size,
+                "mode": oct(stat.st_mode & 0o7777),
+                "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                "etag": file_etag(stat)
+            })
+        elif op == 'exists':
+            record.update({"success": True, "exists": os.path.exists(path)})
+        elif op == 'delete':
+            if os.path.isfile(path):
+                os.remove(path)
+            elif os.path.isdir(path):
+                shutil.rmtree(path)
+            record.update({"success": True})
+        elif op == 'write':
+            content = operation.get('content', '')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(content)
+            record.update({"success": True, "size": len(content)})
+    except Exception as e:
+        record.update({"success": False, "error": str(e)})
+    
+    return record
+
+def run_file_operation_group(group):
+    """Run operations on overlapping paths in submission order"""
+    return [run_file_operation(index, operation) for index, operation in group]
+
+def group_file_operations(operations):
+    """Group (index, operation) pairs whose paths overlap, keeping order.
+
+    Paths that are equal or nested (e.g. a directory and a file inside it)
+    share a group, so a delete of a directory cannot race a write below it.
+    """
+    by_path = {}
+    for index, operation in enumerate(operations):
+        key = os.path.realpath(str(operation.get('path') or ''))
+        by_path.setdefault(key, []).append((index, operation))
+    
+    # Sorting by components puts every descendant directly after its ancestor
+    groups = []
+    root = None
+    for key in sorted(by_path, key=lambda p: p.split(os.sep)):
+        if root is not None and (key == root or key.startswith(root.rstrip(os.sep) + os.sep)):
+            groups[-1].extend(by_path[key])
+        else:
+            root = key
+            groups.append(list(by_path[key]))
+    return [sorted(group, key=lambda item: item[0]) for group in groups]
+
+def validate_batch(data):
+    """Return the operation list or an error message"""
+    operations = (data or {}).get('operations')
+    if not isinstance(operations, list) or not all(isinstance(o, dict) for o in operations):
+        return None, "operations must be a list of objects"
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return None, f"Too many operations (max {BATCH_MAX_OPERATIONS})"
+    return operations, None
+
+def collect_system_info():
+    return {
+        "success": True,
+        "hostname": os.uname().nodename,
+        "platform": os.uname().sysname,
+        "release": os.uname().release,
+        "cpu_count": psutil.cpu_count(),
+        "cpu_percent": psutil.cpu_percent(interval=1),
+        "memory": {
+            "total": psutil.virtual_memory().total,
+            "available": psutil.virtual_memory().available,
+            "percent": psutil.virtual_memory().percent
+        },
+        "disk": {
+            "total": psutil.disk_usage('/').total,
+            "used": psutil.disk_usage('/').used,
+            "free": psutil.disk_usage('/').free,
+            "percent": psutil.disk_usage('/').percent
+        }
+    }
+
+system_info_snapshot = Snapshot(collect_system_info)
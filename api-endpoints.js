@@ -1,3 +1,6 @@
+// Last get_system_info result, revalidated with its etag on every poll
+let mcpSystemInfo = { etag: null, system: null };
+
 // MCP Server Proxy Endpoint
 app.get("/api/mcp-health", async (req, res) => {
   try {
@@ -7,13 +10,17 @@ app.get("/api/mcp-health", async (req, res) => {
       body: JSON.stringify({
         jsonrpc: "2.0",
         method: "get_system_info",
+        params: mcpSystemInfo.etag ? { if_none_match: mcpSystemInfo.etag } : {},
         id: 1
       })
     });
     const data = await response.json();
+    if (data.result && !data.result.not_modified) {
+      mcpSystemInfo = { etag: data.result.etag || null, system: data.result.system };
+    }
     res.json({
       status: "operational",
-      system: data.result?.system || "Unknown",
+      system: mcpSystemInfo.system || "Unknown",
       connectivity: "connected",
       timestamp: new Date().toISOString()
     });
@@ -7,14 +7,28 @@ Provides comprehensive visibility across both deployment systems
 """
 
 import requests
+import asyncio
 import json
 import time
 import subprocess
 import os
+import base64
+import random
+import re
+import math
+import socket
+import sqlite3
+import ssl
+import tempfile
 import threading
-from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
-from typing import Dict, List, Optional, Any
+from array import array
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dataclasses import dataclass, asdict, replace
+from typing import Callable, Dict, List, Optional, Any
+from urllib.parse import urlsplit
 
 @dataclass
 class HealthStatus:
@@ -24,6 +38,7 @@ class HealthStatus:
     response_time: Optional[float]
     timestamp: str
     details: Dict[str, Any]
+    wall_time: Optional[float] = None  # seconds the whole check took
 
 @dataclass
 class DeploymentInfo:
@@ -35,6 +50,902 @@ class DeploymentInfo:
     release_path: Optional[str]
     container_count: Optional[int]
     details: Dict[str, Any]
+    duration: Optional[float] = None  # seconds, when the log line records it
+
+# One line of a deployment.log, as written by hybrid-deploy.js, mcp-deploy.js
+# and the workflows, e.g.
+#   2024-05-01T10:00:00.000Z: MCP API deployment successful - <sha>
+#   2024-05-01T10:00:00.000Z: SSH Docker deployment failed - <sha>: <error>
+#   2024-05-01T10:00:00.000Z: Production deployment successful - <sha> (GitHub Actions #42) | Image: mcp-app:<ts>
+DEPLOY_LOG_LINE = re.compile(
+    r'^(?P<timestamp>.+?): (?P<kind>[\w ]*?)\s*[Dd]eployment (?P<outcome>successful|failed)(?P<rest>.*)$')
+DEPLOY_LOG_SHA = re.compile(r'^\s*-\s*(?P<sha>[0-9a-f]{7,40})\b(?::\s*(?P<error>.*))?')
+DEPLOY_LOG_RUN = re.compile(r'GitHub Actions(?: #(?P<run>\d+))?')
+DEPLOY_LOG_IMAGE = re.compile(r'\| Image: (?P<image>\S+)')
+DEPLOY_LOG_DURATION = re.compile(r'\b(?:in|duration[:=]?)\s*(?P<seconds>\d+(?:\.\d+)?)\s*s\b')
+
+# Reads what was appended to a log since a cursor in one round trip. The
+# first output line is "<inode> <size> <start>"; start falls back to 0
+# when the file was replaced (new inode) or truncated (smaller than the
+# cursor).
+DEPLOY_LOG_READ = """f=%(path)s; set -- $(stat -c '%%i %%s' "$f" 2>/dev/null); [ -n "$1" ] || exit 0
+if [ "$1" = "%(inode)s" ] && [ "$2" -ge %(offset)d ]; then start=%(offset)d; else start=0; fi
+echo "$1 $2 $start"; tail -c +$((start + 1)) "$f" | head -c %(max_bytes)d | base64"""
+DEPLOY_LOG_CHUNK = 262144  # bytes per read
+
+def parse_log_time(text: str) -> Optional[datetime]:
+    """Local naive datetime of a log timestamp (ISO 8601 or date(1) output)"""
+    try:
+        parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = datetime.strptime(text.replace('UTC', '').strip(), '%a %b %d %H:%M:%S %Y')
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+    return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+
+def parse_deployment_line(method: str, line: str) -> Optional[DeploymentInfo]:
+    """DeploymentInfo for a deployment.log line, None for other lines"""
+    # Entries echoed from JavaScript end with a literal "\n"
+    line = line.strip()
+    if line.endswith('\\n'):
+        line = line[:-2].rstrip()
+    match = DEPLOY_LOG_LINE.match(line)
+    if not match:
+        return None
+    when = parse_log_time(match['timestamp'])
+    rest = match['rest']
+    details: Dict[str, Any] = {'log_entry': line, 'kind': match['kind'].strip() or None}
+    sha = DEPLOY_LOG_SHA.match(rest)
+    if sha and sha['error']:
+        details['error'] = sha['error']
+    run = DEPLOY_LOG_RUN.search(rest)
+    if run:
+        details['github_run'] = int(run['run']) if run['run'] else None
+    image = DEPLOY_LOG_IMAGE.search(rest)
+    if image:
+        details['image'] = image['image']
+    duration = DEPLOY_LOG_DURATION.search(rest)
+    return DeploymentInfo(
+        method=method,
+        status='success' if match['outcome'] == 'successful' else 'failed',
+        timestamp=when.isoformat() if when else match['timestamp'],
+        commit_sha=sha['sha'] if sha else 'unknown',
+        release_path=None,
+        container_count=None,
+        details=details,
+        duration=float(duration['seconds']) if duration else None
+    )
+
+class OpenMetricsWriter:
+    """Builds an OpenMetrics text exposition, one metric family at a time"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> str:
+        if not labels:
+            return ''
+        def escape(value):
+            return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+    @staticmethod
+    def _number(value: float) -> str:
+        return repr(float(value)) if isinstance(value, float) else str(value)
+
+    def family(self, name: str, kind: str, help_text: str, unit: Optional[str] = None):
+        self.lines.append(f'# TYPE {name} {kind}')
+        if unit:
+            self.lines.append(f'# UNIT {name} {unit}')
+        self.lines.append(f'# HELP {name} {help_text}')
+
+    def sample(self, name: str, value: Optional[float], labels: Optional[Dict[str, Any]] = None):
+        if value is not None:
+            self.lines.append(f'{name}{self._labels(labels or {})} {self._number(value)}')
+
+    def histogram(self, name: str, sketch: 'LatencySketch', bounds: List[float],
+                  labels: Optional[Dict[str, Any]] = None):
+        labels = labels or {}
+        for bound, count in zip(bounds, sketch.cumulative_counts(bounds)):
+            self.sample(f'{name}_bucket', count, {**labels, 'le': repr(float(bound))})
+        self.sample(f'{name}_bucket', sketch.count, {**labels, 'le': '+Inf'})
+        self.sample(f'{name}_count', sketch.count, labels)
+        self.sample(f'{name}_sum', sketch.sum, labels)
+
+    def render(self) -> str:
+        return '\n'.join(self.lines + ['# EOF']) + '\n'
+
+# Status strings are stored as small integer codes; new ones are interned
+# on first sight
+STATUS_NAMES = ['healthy', 'unhealthy', 'timeout']
+
+def _optional(value: float) -> Optional[float]:
+    """NaN (a missing sample) back to None"""
+    return None if value != value else value
+
+class SeriesRing:
+    """Fixed-capacity ring of one service's samples in numeric columns
+
+    Timestamps are epoch seconds; a missing latency is stored as NaN.
+    Once full, each append overwrites the oldest sample.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.response_times = array('d', bytes(8 * capacity))
+        self.wall_times = array('d', bytes(8 * capacity))
+        self.statuses = array('B', bytes(capacity))
+        self.start = 0
+        self.count = 0
+
+    def append(self, timestamp: float, response_time: float, wall_time: float, status: int):
+        index = (self.start + self.count) % self.capacity
+        if self.count == self.capacity:
+            self.start = (self.start + 1) % self.capacity
+        else:
+            self.count += 1
+        self.timestamps[index] = timestamp
+        self.response_times[index] = response_time
+        self.wall_times[index] = wall_time
+        self.statuses[index] = status
+
+    def prune(self, cutoff: float):
+        """Drop samples older than cutoff (samples arrive in time order)"""
+        while self.count and self.timestamps[self.start] < cutoff:
+            self.start = (self.start + 1) % self.capacity
+            self.count -= 1
+
+    def indices(self, last: Optional[int] = None):
+        """Ring positions, oldest first, optionally only the newest `last`"""
+        skip = self.count - min(last, self.count) if last is not None else 0
+        return [(self.start + i) % self.capacity for i in range(skip, self.count)]
+
+class HealthHistory:
+    """Health check history: a SeriesRing per service for the numbers and
+    only the most recent HealthStatus (with its details) per service"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.series: Dict[str, SeriesRing] = {}
+        self.latest: Dict[str, HealthStatus] = {}
+        self.status_names = list(STATUS_NAMES)
+        self.lock = threading.Lock()
+
+    def _status_code(self, status: str) -> int:
+        if status not in self.status_names:
+            self.status_names.append(status)
+        return self.status_names.index(status)
+
+    def append(self, health: HealthStatus):
+        timestamp = datetime.fromisoformat(health.timestamp).timestamp()
+        nan = float('nan')
+        with self.lock:
+            series = self.series.get(health.service)
+            if series is None:
+                series = self.series[health.service] = SeriesRing(self.capacity)
+            series.append(timestamp,
+                          nan if health.response_time is None else health.response_time,
+                          nan if health.wall_time is None else health.wall_time,
+                          self._status_code(health.status))
+            self.latest[health.service] = health
+
+    def extend(self, healths: List[HealthStatus]):
+        for health in healths:
+            self.append(health)
+
+    def prune(self, cutoff: float):
+        with self.lock:
+            for series in self.series.values():
+                series.prune(cutoff)
+
+    def __len__(self):
+        return sum(series.count for series in self.series.values())
+
+    def latest_statuses(self) -> List[HealthStatus]:
+        """Most recent result of every service, in first-seen order"""
+        with self.lock:
+            return list(self.latest.values())
+
+    def response_times(self, service: str, last: Optional[int] = None) -> List[float]:
+        """Recorded latencies of service, oldest first, skipping missing ones"""
+        with self.lock:
+            series = self.series.get(service)
+            if series is None:
+                return []
+            values = [_optional(series.response_times[i]) for i in series.indices(last)]
+        return [value for value in values if value is not None]
+
+    def samples(self, service: str, last: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Samples of service as dicts, oldest first"""
+        with self.lock:
+            series = self.series.get(service)
+            if series is None:
+                return []
+            return [{
+                'timestamp': datetime.fromtimestamp(series.timestamps[i]).isoformat(),
+                'status': self.status_names[series.statuses[i]],
+                'response_time': _optional(series.response_times[i]),
+                'wall_time': _optional(series.wall_times[i]),
+            } for i in series.indices(last)]
+
+class LatencySketch:
+    """Log-bucketed latency histogram (HDR / DDSketch style)
+
+    Bucket bounds grow by a constant factor, so every quantile is within
+    ALPHA relative error while a sketch never holds more than a few
+    hundred counters, however many samples it has seen. Sketches merge
+    exactly, which is how windows, restarts and hosts are combined.
+    """
+
+    ALPHA = 0.01
+    GAMMA = (1 + ALPHA) / (1 - ALPHA)
+    MIN_VALUE = 1e-4  # seconds; faster samples share one zero bucket
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float):
+        if value < self.MIN_VALUE:
+            self.zero += 1
+        else:
+            index = math.ceil(math.log(value) / math.log(self.GAMMA))
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: 'LatencySketch') -> 'LatencySketch':
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero += other.zero
+        self.count += other.count
+        self.sum += other.sum
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero
+        if rank < seen:
+            return self.min
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Midpoint of (GAMMA^(i-1), GAMMA^i], clamped to what was seen
+                value = 2 * self.GAMMA ** index / (self.GAMMA + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def cumulative_counts(self, bounds: List[float]) -> List[int]:
+        """Samples <= each bound (ascending), for histogram buckets"""
+        counts = []
+        for bound in bounds:
+            counts.append(self.zero + sum(count for index, count in self.buckets.items()
+                                          if 2 * self.GAMMA ** index / (self.GAMMA + 1) <= bound))
+        return counts
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+            'mean': self.sum / self.count if self.count else None,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'alpha': self.ALPHA, 'count': self.count, 'sum': self.sum, 'min': self.min,
+                'max': self.max, 'zero': self.zero, 'buckets': sorted(self.buckets.items())}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LatencySketch':
+        if data.get('alpha') != cls.ALPHA:
+            raise ValueError(f"sketch accuracy {data.get('alpha')} does not match {cls.ALPHA}")
+        sketch = cls()
+        sketch.buckets = {int(index): count for index, count in data['buckets']}
+        sketch.zero = data['zero']
+        sketch.count = data['count']
+        sketch.sum = data['sum']
+        sketch.min = data['min']
+        sketch.max = data['max']
+        return sketch
+
+class LatencyWindow:
+    """One sketch per minute for a service, for sliding-window quantiles"""
+
+    def __init__(self, minutes: int = 60):
+        self.minutes = deque(maxlen=minutes)  # (minute number, LatencySketch)
+
+    def add(self, timestamp: float, value: float):
+        minute = int(timestamp // 60)
+        if not self.minutes or self.minutes[-1][0] != minute:
+            self.minutes.append((minute, LatencySketch()))
+        self.minutes[-1][1].add(value)
+
+    def sketch(self, minutes: int) -> LatencySketch:
+        """Merged sketch of the last `minutes` minutes"""
+        since = int(time.time() // 60) - minutes
+        merged = LatencySketch()
+        for minute, sketch in self.minutes:
+            if minute > since:
+                merged.merge(sketch)
+        return merged
+
+def default_metrics_db() -> str:
+    """Per-user state path for the metrics database, independent of the cwd"""
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_STATE_HOME') or os.path.expanduser('~/.local/state')
+    return os.path.join(base, 'hybrid-monitoring', 'metrics.db')
+
+class MetricsStore:
+    """On-disk health metrics (SQLite, WAL mode)
+
+    Raw samples are buffered and written in one transaction per flush,
+    which also folds them into per-minute and per-hour rollups with
+    UPSERTs. compact() applies the retention of each table. Queries over
+    a window read the rollup that fits it, by primary key.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS samples (
+        service TEXT NOT NULL,
+        ts REAL NOT NULL,
+        status TEXT NOT NULL,
+        response_time REAL,
+        wall_time REAL
+    );
+    CREATE INDEX IF NOT EXISTS samples_service_ts ON samples (service, ts);
+    CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts);
+    """
+    ROLLUP_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        service TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        checks INTEGER NOT NULL,
+        healthy INTEGER NOT NULL,
+        timed INTEGER NOT NULL,
+        rt_sum REAL NOT NULL,
+        rt_min REAL,
+        rt_max REAL,
+        PRIMARY KEY (service, bucket)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS {table}_bucket ON {table} (bucket);
+    """
+    UPSERT = """
+    INSERT INTO {table} (service, bucket, checks, healthy, timed, rt_sum, rt_min, rt_max)
+    VALUES (:service, CAST(:ts AS INTEGER) / {width} * {width}, 1, :status = 'healthy', :response_time IS NOT NULL,
+            coalesce(:response_time, 0), :response_time, :response_time)
+    ON CONFLICT (service, bucket) DO UPDATE SET
+        checks = checks + 1,
+        healthy = healthy + excluded.healthy,
+        timed = timed + excluded.timed,
+        rt_sum = rt_sum + excluded.rt_sum,
+        rt_min = min(coalesce(rt_min, excluded.rt_min), coalesce(excluded.rt_min, rt_min)),
+        rt_max = max(coalesce(rt_max, excluded.rt_max), coalesce(excluded.rt_max, rt_max))
+    """
+    SKETCH_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        service TEXT NOT NULL,
+        bucket INTEGER NOT NULL,
+        sketch TEXT NOT NULL,
+        PRIMARY KEY (service, bucket)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS {table}_bucket ON {table} (bucket);
+    """
+    # rollup/sketch table -> (bucket width in seconds, retention in hours)
+    ROLLUPS = {'rollup_minute': (60, 7 * 24), 'rollup_hour': (3600, 90 * 24)}
+    SKETCHES = {'sketch_minute': (60, 7 * 24), 'sketch_hour': (3600, 90 * 24)}
+
+    def __init__(self, path: str, raw_retention: float = 24, flush_interval: float = 60):
+        self.path = path
+        self.raw_retention = raw_retention
+        self.flush_interval = flush_interval
+        self.pending: List[Dict[str, Any]] = []
+        self.last_flush = time.monotonic()
+        self.last_compact = 0.0
+        self.lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        # auto_vacuum only takes effect on a new database
+        self.db.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        with self.db:
+            self.db.executescript(self.SCHEMA + ''.join(
+                self.ROLLUP_SCHEMA.format(table=table) for table in self.ROLLUPS) + ''.join(
+                self.SKETCH_SCHEMA.format(table=table) for table in self.SKETCHES))
+
+    def record(self, healths: List[HealthStatus]):
+        """Buffer check results; written once flush_interval has passed"""
+        with self.lock:
+            for health in healths:
+                self.pending.append({
+                    'service': health.service,
+                    'ts': datetime.fromisoformat(health.timestamp).timestamp(),
+                    'status': health.status,
+                    'response_time': health.response_time,
+                    'wall_time': health.wall_time,
+                })
+            due = time.monotonic() - self.last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered samples and their rollups in one transaction"""
+        with self.lock:
+            rows, self.pending = self.pending, []
+            self.last_flush = time.monotonic()
+            if not rows:
+                return
+            with self.db:
+                self.db.executemany(
+                    'INSERT INTO samples (service, ts, status, response_time, wall_time) '
+                    'VALUES (:service, :ts, :status, :response_time, :wall_time)', rows)
+                for table, (width, _) in self.ROLLUPS.items():
+                    self.db.executemany(self.UPSERT.format(table=table, width=width), rows)
+                for table, (width, _) in self.SKETCHES.items():
+                    self._merge_sketches(table, width, rows)
+        if time.monotonic() - self.last_compact >= 3600:
+            self.compact()
+
+    def _merge_sketches(self, table: str, width: int, rows: List[Dict[str, Any]]):
+        """Fold rows' latencies into the stored sketch of each bucket"""
+        sketches: Dict[tuple, LatencySketch] = {}
+        for row in rows:
+            if row['response_time'] is not None:
+                key = (row['service'], int(row['ts']) // width * width)
+                sketches.setdefault(key, LatencySketch()).add(row['response_time'])
+        for (service, bucket), sketch in sketches.items():
+            stored = self.db.execute(f'SELECT sketch FROM {table} WHERE service = ? AND bucket = ?',
+                                     (service, bucket)).fetchone()
+            if stored:
+                sketch.merge(LatencySketch.from_dict(json.loads(stored[0])))
+            self.db.execute(f'INSERT OR REPLACE INTO {table} (service, bucket, sketch) VALUES (?, ?, ?)',
+                            (service, bucket, json.dumps(sketch.to_dict(), separators=(',', ':'))))
+
+    def compact(self):
+        """Delete samples and rollups past their retention"""
+        now = time.time()
+        with self.lock:
+            with self.db:
+                self.db.execute('DELETE FROM samples WHERE ts < ?', (now - self.raw_retention * 3600,))
+                for table, (_, retention) in {**self.ROLLUPS, **self.SKETCHES}.items():
+                    self.db.execute(f'DELETE FROM {table} WHERE bucket < ?', (now - retention * 3600,))
+            # executescript steps the pragma to completion; execute() frees one page
+            self.db.executescript('PRAGMA incremental_vacuum;')
+            self.last_compact = time.monotonic()
+
+    def _rollup_for(self, hours: float) -> str:
+        return 'rollup_minute' if hours <= 48 else 'rollup_hour'
+
+    def latency(self, service: str, hours: float) -> Dict[str, Any]:
+        """Checks, availability and avg/min/max latency of service over the
+        last `hours`, from the rollup that covers the window"""
+        table = self._rollup_for(hours)
+        with self.lock:
+            row = self.db.execute(
+                f'SELECT sum(checks) AS checks, sum(healthy) AS healthy, sum(timed) AS timed, '
+                f'sum(rt_sum) AS rt_sum, min(rt_min) AS rt_min, max(rt_max) AS rt_max '
+                f'FROM {table} WHERE service = ? AND bucket >= ?',
+                (service, time.time() - hours * 3600)).fetchone()
+        if not row['checks']:
+            return {'checks': 0}
+        return {
+            'checks': row['checks'],
+            'availability': row['healthy'] / row['checks'],
+            'avg_response_time': row['rt_sum'] / row['timed'] if row['timed'] else None,
+            'min_response_time': row['rt_min'],
+            'max_response_time': row['rt_max'],
+        }
+
+    def latency_series(self, service: str, hours: float, table: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-bucket latency of service over the last `hours`, oldest first"""
+        table = table or self._rollup_for(hours)
+        assert table in self.ROLLUPS
+        with self.lock:
+            rows = self.db.execute(
+                f'SELECT bucket, checks, healthy, timed, rt_sum, rt_min, rt_max FROM {table} '
+                f'WHERE service = ? AND bucket >= ? ORDER BY bucket',
+                (service, time.time() - hours * 3600)).fetchall()
+        return [{
+            'timestamp': datetime.fromtimestamp(row['bucket']).isoformat(),
+            'checks': row['checks'],
+            'healthy': row['healthy'],
+            'avg_response_time': row['rt_sum'] / row['timed'] if row['timed'] else None,
+            'min_response_time': row['rt_min'],
+            'max_response_time': row['rt_max'],
+        } for row in rows]
+
+    def latency_sketch(self, service: str, hours: float) -> LatencySketch:
+        """Merged latency sketch of service over the last `hours`"""
+        table = 'sketch_minute' if hours <= 6 else 'sketch_hour'
+        merged = LatencySketch()
+        with self.lock:
+            rows = self.db.execute(f'SELECT sketch FROM {table} WHERE service = ? AND bucket >= ?',
+                                   (service, time.time() - hours * 3600)).fetchall()
+        for row in rows:
+            merged.merge(LatencySketch.from_dict(json.loads(row[0])))
+        return merged
+
+    def services(self) -> List[str]:
+        with self.lock:
+            return [row[0] for row in self.db.execute('SELECT DISTINCT service FROM rollup_hour ORDER BY service')]
+
+    def sample_count(self) -> int:
+        with self.lock:
+            return self.db.execute('SELECT count(*) FROM samples').fetchone()[0]
+
+    def close(self):
+        if self.db is None:
+            return
+        self.flush()
+        with self.lock:
+            self.db.close()
+            self.db = None
+
+# Runs a whole check's probes on the remote host in one round trip. The
+# probe set is spliced in as base64 JSON ({name: {command, timeout,
+# requires}}); probes run concurrently, a probe with "requires" waits for
+# that probe and is skipped unless it exited 0. Prints one JSON document
+# {name: {returncode, stdout, stderr, duration[, error][, skipped]}}.
+PROBE_BUNDLE_SCRIPT = r"""python3 - <<'PROBE_BUNDLE'
+import base64, json, subprocess, sys, threading, time
+probes = json.loads(base64.b64decode('%(probes)s'))
+results, done = {}, {name: threading.Event() for name in probes}
+def run(name, probe):
+    try:
+        required = probe.get('requires')
+        if required:
+            done[required].wait()
+            if results[required]['returncode'] != 0:
+                results[name] = {'returncode': None, 'stdout': '', 'stderr': '', 'duration': 0.0,
+                                 'skipped': 'requires ' + required}
+                return
+        started = time.time()
+        try:
+            proc = subprocess.run(probe['command'], shell=True, capture_output=True,
+                                  text=True, errors='replace', timeout=probe['timeout'])
+            results[name] = {'returncode': proc.returncode, 'stdout': proc.stdout[:%(max_output)d],
+                             'stderr': proc.stderr[:%(max_output)d]}
+        except subprocess.TimeoutExpired:
+            results[name] = {'returncode': None, 'stdout': '', 'stderr': '', 'error': 'probe timeout'}
+        results[name]['duration'] = round(time.time() - started, 4)
+    finally:
+        done[name].set()
+threads = [threading.Thread(target=run, args=item) for item in probes.items()]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+json.dump(results, sys.stdout)
+PROBE_BUNDLE"""
+
+class _StaleConnection(Exception):
+    """A reused keep-alive connection was closed by the server"""
+
+class AsyncHTTPProber:
+    """Concurrent HTTP probes over a keep-alive connection pool
+
+    Runs its own event loop on a daemon thread, so the pool (and the DNS
+    cache) outlive a single check. Each probe sends HEAD, or GET and stops
+    after the first body byte, and reports DNS, connect, time-to-first-byte
+    and total time separately. A reused connection reports zero DNS and
+    connect time.
+    """
+
+    MAX_IDLE = 4          # idle connections kept per host
+    IDLE_TIMEOUT = 30     # seconds an idle connection is trusted
+    DNS_TTL = 60          # seconds a resolved address is reused
+    DRAIN_LIMIT = 65536   # first_byte mode drains bodies up to this size to keep the connection
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.idle: Dict[tuple, List[tuple]] = {}   # (scheme, host, port) -> [(reader, writer, idle since)]
+        self.dns: Dict[tuple, tuple] = {}          # (host, port) -> (address, resolved at)
+        self.ssl_context = ssl.create_default_context()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='http-prober', daemon=True)
+        self.thread.start()
+
+    def probe_all(self, endpoints: Dict[str, Dict[str, Any]], timeout: float) -> Dict[str, Dict[str, Any]]:
+        """Probe {name: {'url', 'mode'}} concurrently; returns {name: result}"""
+        async def gather():
+            results = await asyncio.gather(*(self.probe(e['url'], e.get('mode', 'head'), timeout)
+                                             for e in endpoints.values()))
+            return dict(zip(endpoints, results))
+        return asyncio.run_coroutine_threadsafe(gather(), self.loop).result(timeout + 5)
+
+    async def probe(self, url: str, mode: str, timeout: float) -> Dict[str, Any]:
+        try:
+            try:
+                return await asyncio.wait_for(self._request(url, mode, reuse=True), timeout)
+            except (ConnectionError, asyncio.IncompleteReadError, _StaleConnection):
+                # The server dropped an idle keep-alive connection; go again fresh
+                return await asyncio.wait_for(self._request(url, mode, reuse=False), timeout)
+        except asyncio.TimeoutError:
+            return {'status': 'unhealthy', 'error': f'timed out after {timeout:.1f}s'}
+        except Exception as e:
+            return {'status': 'unhealthy', 'error': str(e) or type(e).__name__}
+
+    async def _connect(self, scheme, host, port, reuse):
+        """(reader, writer, dns seconds, connect seconds, reused)"""
+        key = (scheme, host, port)
+        idle = self.idle.get(key, [])
+        while reuse and idle:
+            reader, writer, since = idle.pop()
+            if time.monotonic() - since < self.IDLE_TIMEOUT and not reader.at_eof():
+                return reader, writer, 0.0, 0.0, True
+            writer.close()
+
+        started = time.perf_counter()
+        cached = self.dns.get((host, port))
+        if cached and time.monotonic() - cached[1] < self.DNS_TTL:
+            address = cached[0]
+        else:
+            infos = await self.loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            address = infos[0][4][0]
+            self.dns[(host, port)] = (address, time.monotonic())
+        resolved = time.perf_counter()
+        reader, writer = await asyncio.open_connection(
+            address, port,
+            ssl=self.ssl_context if scheme == 'https' else None,
+            server_hostname=host if scheme == 'https' else None)
+        return reader, writer, resolved - started, time.perf_counter() - resolved, False
+
+    async def _request(self, url, mode, reuse):
+        parts = urlsplit(url)
+        scheme, host = parts.scheme or 'http', parts.hostname
+        port = parts.port or (443 if scheme == 'https' else 80)
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        method = 'HEAD' if mode == 'head' else 'GET'
+
+        started = time.perf_counter()
+        reader, writer, dns, connect, reused = await self._connect(scheme, host, port, reuse)
+        try:
+            sent = time.perf_counter()
+            writer.write(f'{method} {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n'
+                         f'User-Agent: hybrid-monitoring\r\nAccept: */*\r\n\r\n'.encode())
+            await writer.drain()
+            status_line = await reader.readline()
+            if not status_line:
+                raise _StaleConnection() if reused else ConnectionError('connection closed without a response')
+            ttfb = time.perf_counter() - sent
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            status_code = int(status_line.split()[1])
+            length = headers.get('content-length')
+            keep = headers.get('connection', '').lower() != 'close'
+            # HEAD, 1xx, 204 and 304 never carry a body; waiting for one
+            # would hang until the probe timeout
+            has_body = method == 'GET' and status_code >= 200 and status_code not in (204, 304)
+            chunked = 'chunked' in headers.get('transfer-encoding', '').lower()
+            if has_body and not chunked and length is not None:
+                if int(length) <= self.DRAIN_LIMIT:
+                    await reader.readexactly(int(length))
+                else:
+                    await reader.read(1)
+                    keep = False
+            elif has_body:
+                # Chunked or close-delimited body: one byte is enough to time it
+                await reader.read(1)
+                keep = False
+            total = time.perf_counter() - started
+        except BaseException:
+            writer.close()
+            raise
+
+        if keep and len(self.idle.setdefault((scheme, host, port), [])) < self.MAX_IDLE:
+            self.idle[(scheme, host, port)].append((reader, writer, time.monotonic()))
+        else:
+            writer.close()
+        return {
+            'status': 'healthy' if status_code == 200 else 'unhealthy',
+            'response_time': total,
+            'status_code': status_code,
+            'content_length': int(length) if length is not None else None,
+            'mode': mode,
+            'reused_connection': reused,
+            'timings': {'dns': dns, 'connect': connect, 'ttfb': ttfb, 'total': total},
+        }
+
+    def close(self):
+        async def shutdown():
+            for connections in self.idle.values():
+                for _, writer, _ in connections:
+                    writer.close()
+            self.idle.clear()
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+@dataclass
+class CheckState:
+    """Scheduling state of one health check in monitor mode"""
+    name: str
+    interval: float             # base interval (seconds)
+    cost: float                 # budget units one run costs on the target host
+    current_interval: float
+    next_due: float             # time.monotonic()
+    runs: int = 0
+    failures: int = 0           # consecutive non-healthy results
+    stable_runs: int = 0        # consecutive results equal to the previous one
+    fast_runs_left: int = 0
+    signature: Optional[tuple] = None
+    future: Any = None
+    deadline: Optional[float] = None
+    timed_out: bool = False
+
+class CheckScheduler:
+    """Runs each health check on its own adaptive timetable
+
+    A check's next run is its base interval, stretched up to
+    stable_factor while results stay the same, cut to fast_interval for a
+    few runs after a state change (status flip or new deployment), and
+    backed off exponentially while it keeps failing. Every delay gets
+    +/-10% jitter so checks do not align. Runs are paid for from a token
+    bucket refilled at cost_budget units per minute; a check that cannot
+    be afforded is postponed, which bounds the load on the target host.
+    """
+
+    def __init__(self, monitor: 'HybridMonitoringSystem'):
+        self.monitor = monitor
+        config = monitor.config
+        self.fast_interval = config['fast_interval']
+        self.fast_runs = config['fast_runs']
+        self.stable_factor = config['stable_factor']
+        self.max_backoff = config['max_backoff']
+        self.budget = config['cost_budget']
+        self.tokens = self.budget
+        self.refilled = time.monotonic()
+        self.stop_event = threading.Event()
+        self.wakeup = threading.Event()  # set when a check finishes or on stop
+        self.states: Dict[str, CheckState] = {}
+        now = time.monotonic()
+        for name in monitor.health_checks:
+            schedule = config['check_schedule'].get(name, {})
+            interval = schedule.get('interval', config['monitoring_interval'])
+            cost = schedule.get('cost', 1)
+            if cost > self.budget:
+                # The bucket never holds more than the budget, so the check
+                # (and every check queued behind it) would wait forever
+                print(f"⚠️  {name}: cost {cost} exceeds cost_budget {self.budget}; clamped to {self.budget}")
+                cost = self.budget
+            self.states[name] = CheckState(
+                name=name, interval=interval, cost=cost,
+                current_interval=interval,
+                # Jittered start spreads the first round over a few seconds
+                next_due=now + random.uniform(0, min(interval, 5)))
+
+    def _jitter(self, delay):
+        return delay * random.uniform(0.9, 1.1)
+
+    def _refill(self, now):
+        self.tokens = min(self.budget, self.tokens + (now - self.refilled) * self.budget / 60)
+        self.refilled = now
+
+    def next_interval(self, state: CheckState, health: HealthStatus) -> float:
+        """Delay before the check's next run, given its latest result"""
+        details = health.details or {}
+        signature = (health.status, details.get('last_deployment'))
+        changed = state.signature is not None and signature != state.signature
+        state.signature = signature
+        if health.status == 'healthy':
+            state.failures = 0
+        else:
+            state.failures += 1
+        if changed:
+            state.stable_runs = 0
+            state.fast_runs_left = self.fast_runs
+        else:
+            state.stable_runs += 1
+
+        if state.fast_runs_left:
+            state.fast_runs_left -= 1
+            return self.fast_interval
+        if state.failures:
+            return min(state.interval * 2 ** (state.failures - 1), self.max_backoff)
+        # Stable and healthy: slow down gradually, 10% per unchanged run
+        return state.interval * min(1 + state.stable_runs / 10, self.stable_factor)
+
+    def _submit(self, state: CheckState, now: float):
+        state.deadline = now + self.monitor.config['cycle_deadline']
+        state.timed_out = False
+        state.future = self.monitor.check_pool.submit(self.monitor.run_check, state.name, state.deadline)
+        state.future.add_done_callback(lambda _: self.wakeup.set())
+
+    def _complete(self, state: CheckState, health: HealthStatus, now: float):
+        state.runs += 1
+        state.current_interval = self.next_interval(state, health)
+        state.next_due = now + self._jitter(state.current_interval)
+        self.monitor.record_health([health])
+
+    def tick(self):
+        """Collect finished checks and start the ones that are due;
+        returns seconds until something needs attention"""
+        now = time.monotonic()
+        self._refill(now)
+        wake = now + 60
+        blocked = False
+        # Longest-waiting first, so cheap checks cannot starve costly ones
+        for state in sorted(self.states.values(), key=lambda state: state.next_due):
+            if state.future is not None:
+                if state.future.done():
+                    future, state.future = state.future, None
+                    if not state.timed_out:
+                        self._complete(state, future.result(), now)
+                elif not state.timed_out and now >= state.deadline:
+                    # Report the overrun once; the run keeps its slot until it ends
+                    state.timed_out = True
+                    self._complete(state, HealthStatus(
+                        service=state.name, status='timeout', response_time=None,
+                        timestamp=datetime.now().isoformat(),
+                        details={'error': f"exceeded the {self.monitor.config['cycle_deadline']}s check deadline"}
+                    ), now)
+                    continue
+                else:
+                    if not state.timed_out:
+                        wake = min(wake, state.deadline)
+                    continue
+            if now >= state.next_due:
+                if not blocked and self.tokens >= state.cost:
+                    self.tokens -= state.cost
+                    self._submit(state, now)
+                    wake = min(wake, state.deadline)
+                    continue
+                # Over budget: wait for enough tokens, keeping the place in line
+                blocked = True
+                wake = min(wake, now + max(0.0, state.cost - self.tokens) * 60 / self.budget)
+                continue
+            wake = min(wake, state.next_due)
+        return max(0.05, wake - now)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                delay = self.tick()
+            except Exception as e:
+                print(f"❌ Monitoring error: {e}")
+                delay = 1
+            self.wakeup.wait(delay)
+            self.wakeup.clear()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wakeup.set()
+
+    def summary(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {name: {
+            'interval': round(state.current_interval, 1),
+            'next_run_in': None if state.future is not None else round(max(0, state.next_due - now), 1),
+            'runs': state.runs,
+            'failures': state.failures,
+            'cost': state.cost,
+        } for name, state in self.states.items()}
 
 class HybridMonitoringSystem:
     def __init__(self, config=None):
@@ -46,20 +957,143 @@ class HybridMonitoringSystem:
             'docker_path': '/var/deployment',
             'monitoring_interval': 30,  # seconds
             'health_timeout': 10,       # seconds
-            'history_retention': 24     # hours
+            'cycle_deadline': 25,       # seconds; slower checks are reported as timeouts
+            'history_retention': 24,    # hours
+            'history_capacity': None,   # samples kept per service; None sizes it from retention
+            # On-disk metrics (None disables); raw samples follow
+            # history_retention, rollups are kept 7 days (minute) / 90 days (hour)
+            'metrics_db': default_metrics_db(),
+            'metrics_flush_interval': 60,  # seconds between batched writes
+            'latency_windows': [5, 60, 1440],  # minutes; percentile windows in report/export
+            # exporter command: /metrics (OpenMetrics) served from memory
+            'exporter_host': '0.0.0.0',
+            'exporter_port': 9470,
+            'latency_buckets': [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],  # seconds
+            # Monitor mode scheduling (see CheckScheduler). cost is in
+            # budget units per run; cost_budget is units per minute.
+            'check_schedule': {
+                'mcp_api': {'interval': 30, 'cost': 1},
+                'docker_system': {'interval': 60, 'cost': 3},    # docker stats --no-stream
+                'service_endpoints': {'interval': 30, 'cost': 1},
+                'github_runner': {'interval': 120, 'cost': 2},   # journalctl
+            },
+            'cost_budget': 10,
+            'fast_interval': 10,        # seconds, for fast_runs runs after a state change
+            'fast_runs': 3,
+            'stable_factor': 4,         # max stretch of an interval while nothing changes
+            'max_backoff': 300,         # seconds, cap of the failure backoff
+            # Probed by check_service_endpoints; {ssh_host} is substituted.
+            # mode 'head' sends HEAD, 'first_byte' a GET read up to its
+            # first body byte (for servers without HEAD support)
+            'endpoints': {
+                'main_website': {'url': 'http://{ssh_host}', 'mode': 'head'},
+                'health_endpoint': {'url': 'http://{ssh_host}/health', 'mode': 'head'},
+                'service_endpoint': {'url': 'http://{ssh_host}/service', 'mode': 'head'},
+                'mcp_api_direct': {'url': 'http://{ssh_host}:8080', 'mode': 'first_byte'},
+            },
+            # One persistent SSH connection (OpenSSH ControlMaster) carries
+            # every probe; it outlives the process by ssh_control_persist
+            # seconds so back-to-back CLI runs reuse it too
+            'ssh_multiplexing': os.name != 'nt',  # Windows OpenSSH has no ControlMaster
+            'ssh_control_persist': 300  # seconds
         }
         
-        self.health_history: List[HealthStatus] = []
-        self.deployment_history: List[DeploymentInfo] = []
+        # Twice the samples the retention window needs at the configured
+        # interval, so faster probing still keeps the full window
+        capacity = self.config.get('history_capacity') or \
+            2 * self.config['history_retention'] * 3600 // self.config['monitoring_interval']
+        self.health_history = HealthHistory(max(int(capacity), 16))
+        # Filled incrementally from both systems' deployment.log: oldest
+        # first, indexed by 7-character SHA prefix
+        self.deployment_history = deque()
+        self.deployment_index: Dict[str, List[DeploymentInfo]] = {}
+        self.latest_deployments: Dict[str, DeploymentInfo] = {}  # method -> newest, kept past retention
+        self.log_cursors: Dict[str, Dict[str, Any]] = {}
+        self.ingest_lock = threading.Lock()
+        # In-memory sliding windows; the metrics store covers longer
+        # windows and earlier runs
+        self.latency_windows: Dict[str, LatencyWindow] = {}
+        # Since-start sketches behind the exporter's histograms: per check,
+        # and per (endpoint, phase)
+        self.latency_totals: Dict[str, LatencySketch] = {}
+        self.endpoint_totals: Dict[tuple, LatencySketch] = {}
+        self.metrics_lock = threading.Lock()
+        self.started_at = time.time()
+        self.metrics_store = MetricsStore(
+            self.config['metrics_db'],
+            raw_retention=self.config['history_retention'],
+            flush_interval=self.config.get('metrics_flush_interval', 60)
+        ) if self.config.get('metrics_db') else None
         self.is_monitoring = False
+        self.scheduler: Optional[CheckScheduler] = None
+        self.http_prober = AsyncHTTPProber()
+
+        # Checks run concurrently, and so do the independent probes inside
+        # each check. Probes get their own pool so a check waiting on its
+        # probes can never starve them of workers.
+        self.health_checks: Dict[str, Callable[[], HealthStatus]] = {
+            'mcp_api': self.check_mcp_api_health,
+            'docker_system': self.check_docker_system_health,
+            'service_endpoints': self.check_service_endpoints,
+            'github_runner': self.check_github_runner_status,
+        }
+        self.check_pool = ThreadPoolExecutor(max_workers=2 * len(self.health_checks),
+                                             thread_name_prefix='check')
+        self.probe_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='probe')
+        self.running_checks = {}  # check name -> future that overran a cycle deadline
+        self.last_cycle: Dict[str, Any] = {}
+        self._local = threading.local()  # per-thread cycle deadline (time.monotonic())
+
+        self.ssh_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.ssh_master_ok = False
+        self.ssh_master_checked = 0.0
+        self.ssh_stats = {'mux_calls': 0, 'mux_time': 0.0, 'direct_calls': 0, 'direct_time': 0.0,
+                          'master_starts': 0, 'master_connect_time': 0.0}
         
         print(f"[INIT] Hybrid Monitoring System initialized")
         print(f"   MCP Server: {self.config['mcp_server_url']}")
         print(f"   SSH Host: {self.config['ssh_host']}")
         print(f"   Monitoring Interval: {self.config['monitoring_interval']}s")
 
+    def _budget(self, timeout):
+        """timeout capped to what is left of the current cycle deadline"""
+        deadline = getattr(self._local, 'deadline', None)
+        if deadline is None:
+            return timeout
+        return max(1, min(timeout, deadline - time.monotonic()))
+
+    def _with_deadline(self, deadline, fn, *args):
+        self._local.deadline = deadline
+        try:
+            return fn(*args)
+        finally:
+            self._local.deadline = None
+
+    def run_probes(self, probes: Dict[str, Callable[[], Dict[str, Any]]]):
+        """Run independent probes concurrently within the cycle deadline
+
+        Returns {name: result}; a probe still running at the deadline is
+        reported as failed and left to finish in the background.
+        """
+        deadline = getattr(self._local, 'deadline', None)
+        futures = {name: self.probe_pool.submit(self._with_deadline, deadline, probe)
+                   for name, probe in probes.items()}
+        done, _ = wait(futures.values(),
+                       timeout=None if deadline is None else max(0, deadline - time.monotonic()))
+        results = {}
+        for name, future in futures.items():
+            if future not in done:
+                results[name] = {'success': False, 'response_time': None, 'error': 'probe deadline exceeded'}
+            elif future.exception() is not None:
+                results[name] = {'success': False, 'response_time': None, 'error': str(future.exception())}
+            else:
+                results[name] = future.result()
+        return results
+
     def execute_mcp_command(self, command, timeout=60):
         """Execute command via MCP API"""
+        timeout = self._budget(timeout)
         url = self.config['mcp_server_url']
         payload = {
             'jsonrpc': '2.0',
@@ -92,12 +1126,81 @@ class HybridMonitoringSystem:
                 'error': str(e)
             }
 
-    def execute_ssh_command(self, command, timeout=30):
-        """Execute command via SSH"""
-        ssh_cmd = [
+    def _ssh_args(self):
+        """ssh options shared by probes and the master connection"""
+        args = [
             'ssh', '-i', self.config['ssh_key_path'],
             '-o', 'StrictHostKeyChecking=no',
             '-o', 'ConnectTimeout=10',
+        ]
+        if self.config.get('ssh_multiplexing'):
+            args += ['-o', f'ControlPath={self._ssh_control_path()}']
+        return args
+
+    def _ssh_control_path(self):
+        # Short, private directory: unix socket paths are limited to ~100 bytes
+        directory = os.path.join(tempfile.gettempdir(), f'hybrid-monitoring-{os.getuid()}')
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        return os.path.join(directory, '%C')
+
+    def ensure_ssh_master(self):
+        """Start the ControlMaster connection unless one is already up
+
+        Checked at most every 30s (or right after a failed call); while
+        no master is running probes simply connect directly.
+        """
+        if not self.config.get('ssh_multiplexing'):
+            return False
+        with self.ssh_lock:
+            if time.monotonic() - self.ssh_master_checked < 30:
+                return self.ssh_master_ok
+            target = f"root@{self.config['ssh_host']}"
+            try:
+                check = subprocess.run(self._ssh_args() + ['-O', 'check', target],
+                                       capture_output=True, timeout=5)
+                if check.returncode != 0:
+                    # -f backgrounds the master once authenticated; keepalives
+                    # let it notice a dead link and exit so the next call reconnects
+                    start_time = time.time()
+                    started = subprocess.run(
+                        self._ssh_args() + [
+                            '-o', 'ControlMaster=yes',
+                            '-o', f"ControlPersist={self.config['ssh_control_persist']}",
+                            '-o', 'ServerAliveInterval=15',
+                            '-o', 'ServerAliveCountMax=3',
+                            '-N', '-f', target
+                        ],
+                        capture_output=True, timeout=15
+                    )
+                    if started.returncode == 0:
+                        self.ssh_stats['master_starts'] += 1
+                        self.ssh_stats['master_connect_time'] += time.time() - start_time
+                    self.ssh_master_ok = started.returncode == 0
+                else:
+                    self.ssh_master_ok = True
+            except (subprocess.TimeoutExpired, OSError):
+                self.ssh_master_ok = False
+            self.ssh_master_checked = time.monotonic()
+            return self.ssh_master_ok
+
+    def close_ssh_master(self):
+        """Stop the ControlMaster connection (monitor shutdown)"""
+        if self.config.get('ssh_multiplexing') and self.ssh_master_ok:
+            subprocess.run(self._ssh_args() + ['-O', 'exit', f"root@{self.config['ssh_host']}"],
+                           capture_output=True, timeout=5)
+            self.ssh_master_ok = False
+
+    def execute_ssh_command(self, command, timeout=30):
+        """Execute command via SSH
+
+        Runs as a new channel on the ControlMaster connection when one is up
+        (no TCP or key exchange), otherwise as a direct connection.
+        """
+        timeout = self._budget(timeout)
+        mux = self.ensure_ssh_master()
+        ssh_cmd = self._ssh_args() + [
+            # Never become a master here: concurrent probes would race for it
+            '-o', 'ControlMaster=no',
             f"root@{self.config['ssh_host']}",
             command
         ]
@@ -111,10 +1214,18 @@ class HybridMonitoringSystem:
                 timeout=timeout
             )
             response_time = time.time() - start_time
+            transport = 'mux' if mux else 'direct'
+            with self.stats_lock:
+                self.ssh_stats[f'{transport}_calls'] += 1
+                self.ssh_stats[f'{transport}_time'] += response_time
+            if result.returncode == 255 and mux:
+                # ssh itself failed; re-check the master before the next call
+                self.ssh_master_checked = 0.0
             
             return {
                 'success': result.returncode == 0,
                 'response_time': response_time,
+                'transport': transport,
                 'stdout': result.stdout,
                 'stderr': result.stderr,
                 'returncode': result.returncode
@@ -132,40 +1243,133 @@ class HybridMonitoringSystem:
                 'error': str(e)
             }
 
+    def run_probe_bundle(self, probes: Dict[str, Any], via='ssh', timeout=None):
+        """Run named shell probes on the remote host in a single round trip
+
+        probes maps a name to a command, or to {'command', 'timeout',
+        'requires'}. Returns {'success', 'response_time', 'probes'} where
+        each probe result carries success/returncode/stdout/stderr/duration.
+        success is False only when the transport failed; a host without
+        python3 falls back to one call per probe.
+        """
+        timeout = timeout or self.config['health_timeout']
+        spec = {}
+        for name, probe in probes.items():
+            probe = {'command': probe} if isinstance(probe, str) else dict(probe)
+            probe.setdefault('timeout', timeout)
+            spec[name] = probe
+        script = PROBE_BUNDLE_SCRIPT % {
+            'probes': base64.b64encode(json.dumps(spec).encode()).decode(),
+            'max_output': 65536,
+        }
+        # Dependent probes run back to back; add slack for interpreter
+        # start-up and transfer
+        budget = max(p['timeout'] for p in spec.values())
+        if any(p.get('requires') for p in spec.values()):
+            budget *= 2
+        budget += 5
+        if via == 'mcp':
+            result = self.execute_mcp_command(script, timeout=budget)
+            output = result.get('data', {}).get('stdout', '') if result['success'] else ''
+        else:
+            result = self.execute_ssh_command(script, timeout=budget)
+            output = result.get('stdout', '')
+        bundle = {'success': result['success'], 'response_time': result.get('response_time'),
+                  'transport': result.get('transport', via)}
+        if not result['success'] and not output:
+            bundle['error'] = result.get('error') or result.get('stderr', '').strip()[:200]
+            bundle['probes'] = {name: {'success': False, 'error': bundle['error']} for name in spec}
+            return bundle
+        # The host answered, so connectivity is established either way
+        bundle['success'] = True
+        try:
+            remote = json.loads(output)
+        except ValueError:
+            return self._run_probes_unbundled(spec, via, bundle)
+        bundle['probes'] = {}
+        for name in spec:
+            probe = remote.get(name) or {'returncode': None, 'error': 'missing from bundle'}
+            probe['success'] = probe.get('returncode') == 0
+            bundle['probes'][name] = probe
+        return bundle
+
+    def _run_probes_unbundled(self, spec, via, bundle):
+        """Fallback for hosts without python3: one call per probe"""
+        execute = self.execute_mcp_command if via == 'mcp' else self.execute_ssh_command
+        calls = self.run_probes({name: (lambda p=probe: execute(p['command'], timeout=p['timeout']))
+                                 for name, probe in spec.items() if not probe.get('requires')})
+        for name, probe in spec.items():
+            required = probe.get('requires')
+            if required and calls[required].get('success') and \
+                    (calls[required].get('data') or calls[required]).get('returncode', 0) == 0:
+                calls[name] = execute(probe['command'], timeout=probe['timeout'])
+            elif required:
+                calls[name] = {'success': False, 'skipped': f'requires {required}'}
+        bundle['probes'] = {}
+        for name, call in calls.items():
+            output = call.get('data', call) if via == 'mcp' else call
+            returncode = output.get('returncode')
+            bundle['probes'][name] = {
+                'success': returncode == 0,
+                'returncode': returncode,
+                'stdout': output.get('stdout', ''),
+                'stderr': output.get('stderr', ''),
+                'duration': call.get('response_time'),
+                **({'error': call['error']} if 'error' in call else {}),
+                **({'skipped': call['skipped']} if 'skipped' in call else {}),
+            }
+        bundle['bundled'] = False
+        return bundle
+
+    @staticmethod
+    def probe_timings(bundle):
+        """{probe: seconds} from a run_probe_bundle result, for details"""
+        return {name: probe.get('duration') for name, probe in bundle['probes'].items()}
+
     def check_mcp_api_health(self):
         """Check MCP API system health"""
         timestamp = datetime.now().isoformat()
+        legacy_path = self.config['legacy_path']
         
-        # Basic MCP server connectivity
-        mcp_result = self.execute_mcp_command('echo "MCP API health check"', timeout=self.config['health_timeout'])
+        # One execute_command carries every probe; the echo doubles as the
+        # connectivity check
+        bundle = self.run_probe_bundle({
+            'connectivity': 'echo "MCP API health check"',
+            'system_info': 'uptime && free -h | head -2',
+            'legacy_app': f'ls -la {legacy_path}/current/',
+            'last_deployment': f'tail -1 {legacy_path}/deployment.log 2>/dev/null',
+        }, via='mcp', timeout=self.config['health_timeout'])
+        probes = bundle['probes']
         
         details = {
-            'connectivity': mcp_result['success'],
-            'response_time': mcp_result.get('response_time'),
+            'connectivity': bundle['success'],
+            'response_time': bundle.get('response_time'),
         }
         
-        if mcp_result['success']:
+        if bundle['success']:
+            details['probe_timings'] = self.probe_timings(bundle)
+
             # Get system information
-            system_info = self.execute_mcp_command('uptime && free -h | head -2', timeout=10)
-            if system_info['success']:
-                details['system_info'] = system_info['data'].get('stdout', '').strip()
+            if probes['system_info']['success']:
+                details['system_info'] = probes['system_info']['stdout'].strip()
             
             # Check legacy application status
-            app_status = self.execute_mcp_command(f'ls -la {self.config["legacy_path"]}/current/', timeout=10)
-            if app_status['success']:
+            if probes['legacy_app']['success']:
                 details['legacy_app'] = 'present'
                 
             # Check deployment log
-            log_check = self.execute_mcp_command(f'tail -1 {self.config["legacy_path"]}/deployment.log 2>/dev/null', timeout=10)
-            if log_check['success'] and log_check['data'].get('stdout'):
-                details['last_deployment'] = log_check['data']['stdout'].strip()
+            log_check = probes['last_deployment']
+            if log_check['success'] and log_check['stdout'].strip():
+                details['last_deployment'] = log_check['stdout'].strip()
+        elif bundle.get('error'):
+            details['error'] = bundle['error']
 
-        status = 'healthy' if mcp_result['success'] else 'unhealthy'
+        status = 'healthy' if bundle['success'] else 'unhealthy'
         
         return HealthStatus(
             service='mcp_api',
             status=status,
-            response_time=mcp_result.get('response_time'),
+            response_time=bundle.get('response_time'),
             timestamp=timestamp,
             details=details
         )
@@ -173,24 +1377,32 @@ class HybridMonitoringSystem:
     def check_docker_system_health(self):
         """Check Docker system health"""
         timestamp = datetime.now().isoformat()
+        docker_path = self.config['docker_path']
         
-        # SSH connectivity check
-        ssh_result = self.execute_ssh_command('echo "SSH Docker health check"')
+        bundle = self.run_probe_bundle({
+            'docker': 'docker --version && docker info | head -5',
+            'containers': f'cd {docker_path} && docker compose ps',
+            'resources': 'docker stats --no-stream --format "table {{.Container}}\\t{{.CPUPerc}}\\t{{.MemUsage}}" | head -5',
+            'last_deployment': f'tail -1 {docker_path}/deployment.log 2>/dev/null',
+        }, via='ssh')
+        probes = bundle['probes']
         
         details = {
-            'ssh_connectivity': ssh_result['success'],
-            'ssh_response_time': ssh_result.get('response_time'),
+            'ssh_connectivity': bundle['success'],
+            'ssh_response_time': bundle.get('response_time'),
         }
         
-        if ssh_result['success']:
+        if bundle['success']:
+            details['probe_timings'] = self.probe_timings(bundle)
+
             # Docker daemon status
-            docker_check = self.execute_ssh_command('docker --version && docker info | head -5')
+            docker_check = probes['docker']
             if docker_check['success']:
                 details['docker_daemon'] = 'running'
                 details['docker_info'] = docker_check['stdout'][:200]
             
             # Container status
-            container_check = self.execute_ssh_command(f'cd {self.config["docker_path"]} && docker compose ps')
+            container_check = probes['containers']
             if container_check['success']:
                 details['containers'] = container_check['stdout']
                 # Count running containers
@@ -198,21 +1410,23 @@ class HybridMonitoringSystem:
                 details['running_container_count'] = running_containers
             
             # Resource usage
-            resource_check = self.execute_ssh_command('docker stats --no-stream --format "table {{.Container}}\\t{{.CPUPerc}}\\t{{.MemUsage}}" | head -5')
+            resource_check = probes['resources']
             if resource_check['success']:
                 details['resource_usage'] = resource_check['stdout']
                 
             # Recent deployment log
-            log_check = self.execute_ssh_command(f'tail -1 {self.config["docker_path"]}/deployment.log 2>/dev/null')
+            log_check = probes['last_deployment']
             if log_check['success'] and log_check['stdout'].strip():
                 details['last_deployment'] = log_check['stdout'].strip()
+        elif bundle.get('error'):
+            details['error'] = bundle['error']
 
-        status = 'healthy' if ssh_result['success'] else 'unhealthy'
+        status = 'healthy' if bundle['success'] else 'unhealthy'
         
         return HealthStatus(
             service='docker_system',
             status=status,
-            response_time=ssh_result.get('response_time'),
+            response_time=bundle.get('response_time'),
             timestamp=timestamp,
             details=details
         )
@@ -221,39 +1435,14 @@ class HybridMonitoringSystem:
         """Check external service endpoints"""
         timestamp = datetime.now().isoformat()
         
-        endpoints = [
-            ('main_website', f"http://{self.config['ssh_host']}"),
-            ('health_endpoint', f"http://{self.config['ssh_host']}/health"),
-            ('service_endpoint', f"http://{self.config['ssh_host']}/service"),
-            ('mcp_api_direct', f"http://{self.config['ssh_host']}:8080"),
-        ]
+        endpoints = {name: dict(endpoint, url=endpoint['url'].format(ssh_host=self.config['ssh_host']))
+                     for name, endpoint in self.config['endpoints'].items()}
         
-        endpoint_results = {}
-        total_response_time = 0
-        healthy_endpoints = 0
-        
-        for name, url in endpoints:
-            try:
-                start_time = time.time()
-                response = requests.get(url, timeout=self.config['health_timeout'])
-                response_time = time.time() - start_time
-                
-                endpoint_results[name] = {
-                    'status': 'healthy' if response.status_code == 200 else 'unhealthy',
-                    'response_time': response_time,
-                    'status_code': response.status_code,
-                    'content_length': len(response.content) if response.content else 0
-                }
-                
-                if response.status_code == 200:
-                    healthy_endpoints += 1
-                    total_response_time += response_time
-                    
-            except Exception as e:
-                endpoint_results[name] = {
-                    'status': 'unhealthy',
-                    'error': str(e)
-                }
+        # All endpoints at once over the prober's keep-alive pool
+        endpoint_results = self.http_prober.probe_all(endpoints, self._budget(self.config['health_timeout']))
+        healthy = [info for info in endpoint_results.values() if info.get('status_code') == 200]
+        healthy_endpoints = len(healthy)
+        total_response_time = sum(info['response_time'] for info in healthy)
         
         overall_status = 'healthy' if healthy_endpoints > 0 else 'unhealthy'
         avg_response_time = total_response_time / healthy_endpoints if healthy_endpoints > 0 else None
@@ -276,109 +1465,355 @@ class HybridMonitoringSystem:
     def check_github_runner_status(self):
         """Check GitHub Runner status (if available)"""
         timestamp = datetime.now().isoformat()
+        unit = 'actions.runner.HirotakaKaminishi-mcp-cicd-pipeline.mcp-server-runner.service'
         
-        # Check runner service status
-        service_check = self.execute_ssh_command(
-            'systemctl is-active actions.runner.HirotakaKaminishi-mcp-cicd-pipeline.mcp-server-runner.service 2>/dev/null'
-        )
+        bundle = self.run_probe_bundle({
+            # Check runner service status
+            'service': f'systemctl is-active {unit} 2>/dev/null',
+            # Check runner processes
+            'processes': 'ps aux | grep -E "Runner|actions" | grep -v grep | wc -l',
+            # Check recent activity (only once the service is known active)
+            'recent_activity': {'command': f'journalctl -u {unit} --since "1 hour ago" | tail -1',
+                                'requires': 'service'},
+        }, via='ssh')
+        probes = bundle['probes']
+        service_check = probes['service']
         
         details = {
-            'service_status': service_check.get('stdout', '').strip() if service_check['success'] else 'unknown'
+            'service_status': service_check['stdout'].strip() if service_check['success'] else 'unknown'
         }
+        if bundle['success']:
+            details['probe_timings'] = self.probe_timings(bundle)
         
-        # Check runner processes
-        process_check = self.execute_ssh_command('ps aux | grep -E "Runner|actions" | grep -v grep | wc -l')
+        process_check = probes['processes']
         if process_check['success']:
             details['process_count'] = int(process_check['stdout'].strip() or '0')
         
-        # Check recent activity
-        if service_check['success'] and 'active' in service_check.get('stdout', ''):
-            log_check = self.execute_ssh_command(
-                'journalctl -u actions.runner.HirotakaKaminishi-mcp-cicd-pipeline.mcp-server-runner.service --since "1 hour ago" | tail -1'
-            )
-            if log_check['success']:
-                details['recent_activity'] = log_check['stdout'][:200]
+        log_check = probes['recent_activity']
+        if log_check['success']:
+            details['recent_activity'] = log_check['stdout'][:200]
         
         status = 'healthy' if details.get('process_count', 0) > 0 else 'unhealthy'
         
         return HealthStatus(
             service='github_runner',
             status=status,
-            response_time=service_check.get('response_time'),
+            response_time=bundle.get('response_time'),
             timestamp=timestamp,
             details=details
         )
 
+    def run_check(self, name, deadline=None):
+        """Run one health check, timing it; exceptions become an unhealthy status"""
+        started = time.monotonic()
+        try:
+            health = self._with_deadline(deadline, self.health_checks[name])
+        except Exception as e:
+            health = HealthStatus(service=name, status='unhealthy', response_time=None,
+                                  timestamp=datetime.now().isoformat(), details={'error': str(e)})
+        health.wall_time = time.monotonic() - started
+        return health
+
     def comprehensive_health_check(self):
-        """Perform comprehensive health check across all systems"""
+        """Perform comprehensive health check across all systems
+
+        Checks run concurrently under config['cycle_deadline']. A check still
+        running at the deadline is reported with status 'timeout' and, while
+        it keeps running, is skipped by later cycles instead of piling up.
+        """
         print(f"[CHECK] [{datetime.now().strftime('%H:%M:%S')}] Performing comprehensive health check...")
+        started = time.monotonic()
+        deadline = started + self.config['cycle_deadline']
         
         # Run all health checks
-        health_checks = [
-            self.check_mcp_api_health(),
-            self.check_docker_system_health(),
-            self.check_service_endpoints(),
-            self.check_github_runner_status()
-        ]
+        futures = {}
+        for name in self.health_checks:
+            overrun = self.running_checks.get(name)
+            if overrun is not None and not overrun.done():
+                continue
+            self.running_checks.pop(name, None)
+            futures[name] = self.check_pool.submit(self.run_check, name, deadline)
+        done, _ = wait(futures.values(), timeout=max(0, deadline - time.monotonic()))
+
+        health_checks = []
+        for name in self.health_checks:
+            future = futures.get(name)
+            if future in done:
+                health_checks.append(future.result())
+                continue
+            if future is not None:
+                self.running_checks[name] = future
+            health_checks.append(HealthStatus(
+                service=name,
+                status='timeout',
+                response_time=None,
+                timestamp=datetime.now().isoformat(),
+                details={'error': 'still running from an earlier cycle' if future is None
+                         else f"exceeded the {self.config['cycle_deadline']}s cycle deadline"}
+            ))
+
+        self.last_cycle = {
+            'timestamp': datetime.now().isoformat(),
+            'wall_time': time.monotonic() - started,
+            'check_wall_times': {h.service: h.wall_time for h in health_checks},
+            'timed_out': [h.service for h in health_checks if h.status == 'timeout'],
+        }
+        timings = ', '.join(f"{h.service} {h.wall_time:.2f}s" if h.wall_time is not None
+                            else f"{h.service} timeout" for h in health_checks)
+        print(f"[CHECK] Cycle finished in {self.last_cycle['wall_time']:.2f}s ({timings})")
         
-        # Store in history
+        self.record_health(health_checks)
+        return health_checks
+
+    def record_health(self, health_checks):
+        """Store check results in history, latency windows and the metrics store"""
         self.health_history.extend(health_checks)
+        # The checks' tail -1 of each deployment.log is a cheap change
+        # detector; only a new last line triggers an ingest
+        for health in health_checks:
+            method = {'mcp_api': 'mcp_api', 'docker_system': 'docker_compose'}.get(health.service)
+            last_line = (health.details or {}).get('last_deployment')
+            if method and last_line and last_line != self.log_cursors.get(method, {}).get('last_line'):
+                self.probe_pool.submit(self.ingest_deployment_log, method)
+        with self.metrics_lock:
+            for health in health_checks:
+                if health.response_time is not None:
+                    self.latency_windows.setdefault(
+                        health.service, LatencyWindow(max(self.config['latency_windows']))).add(
+                        time.time(), health.response_time)
+                    self.latency_totals.setdefault(health.service, LatencySketch()).add(health.response_time)
+                if health.service == 'service_endpoints':
+                    for name, info in health.details.get('endpoints', {}).items():
+                        for phase, seconds in info.get('timings', {}).items():
+                            self.endpoint_totals.setdefault((name, phase), LatencySketch()).add(seconds)
+        if self.metrics_store:
+            self.metrics_store.record(health_checks)
         
         # Cleanup old history
         self.cleanup_old_history()
-        
-        return health_checks
+
+    def render_openmetrics(self):
+        """OpenMetrics exposition of the in-memory state; never runs a probe"""
+        out = OpenMetricsWriter()
+        bounds = self.config['latency_buckets']
+        latest = self.health_history.latest_statuses()
+        now = time.time()
+
+        out.family('hybrid_monitor_check_healthy', 'gauge', 'Whether the last run of the check was healthy')
+        for health in latest:
+            out.sample('hybrid_monitor_check_healthy', int(health.status == 'healthy'), {'check': health.service})
+        out.family('hybrid_monitor_check_last_run_timestamp_seconds', 'gauge', 'When the check last ran', 'seconds')
+        for health in latest:
+            out.sample('hybrid_monitor_check_last_run_timestamp_seconds',
+                       datetime.fromisoformat(health.timestamp).timestamp(), {'check': health.service})
+        out.family('hybrid_monitor_check_wall_time_seconds', 'gauge', 'Duration of the last run of the check', 'seconds')
+        for health in latest:
+            out.sample('hybrid_monitor_check_wall_time_seconds', health.wall_time, {'check': health.service})
+        if self.scheduler:
+            out.family('hybrid_monitor_check_interval_seconds', 'gauge', 'Current scheduling interval of the check', 'seconds')
+            for name, state in self.scheduler.summary().items():
+                out.sample('hybrid_monitor_check_interval_seconds', state['interval'], {'check': name})
+
+        with self.metrics_lock:
+            totals = {service: LatencySketch().merge(sketch) for service, sketch in self.latency_totals.items()}
+            endpoint_totals = {key: LatencySketch().merge(sketch) for key, sketch in self.endpoint_totals.items()}
+        out.family('hybrid_monitor_check_response_seconds', 'histogram', 'Response time reported by the check', 'seconds')
+        for service, sketch in sorted(totals.items()):
+            out.histogram('hybrid_monitor_check_response_seconds', sketch, bounds, {'check': service})
+
+        endpoints = next((h.details.get('endpoints', {}) for h in latest if h.service == 'service_endpoints'), {})
+        out.family('hybrid_monitor_endpoint_up', 'gauge', 'Whether the endpoint answered 200 on its last probe')
+        for name, info in endpoints.items():
+            out.sample('hybrid_monitor_endpoint_up', int(info.get('status') == 'healthy'), {'endpoint': name})
+        out.family('hybrid_monitor_endpoint_status_code', 'gauge', 'HTTP status of the last probe')
+        for name, info in endpoints.items():
+            out.sample('hybrid_monitor_endpoint_status_code', info.get('status_code'), {'endpoint': name})
+        out.family('hybrid_monitor_endpoint_phase_seconds', 'histogram',
+                   'Endpoint probe time by phase (dns, connect, ttfb, total)', 'seconds')
+        for (name, phase), sketch in sorted(endpoint_totals.items()):
+            out.histogram('hybrid_monitor_endpoint_phase_seconds', sketch, bounds, {'endpoint': name, 'phase': phase})
+
+        details = {h.service: h.details for h in latest}
+        out.family('hybrid_monitor_containers_running', 'gauge', 'Running docker compose containers')
+        if 'docker_system' in details:
+            out.sample('hybrid_monitor_containers_running', details['docker_system'].get('running_container_count'))
+        out.family('hybrid_monitor_runner_processes', 'gauge', 'GitHub Actions runner processes')
+        if 'github_runner' in details:
+            out.sample('hybrid_monitor_runner_processes', details['github_runner'].get('process_count'))
+
+        deployed = {method: parse_log_time(deploy.timestamp) for method, deploy in self.latest_deployments.items()}
+        deployed = {method: when.timestamp() for method, when in sorted(deployed.items()) if when is not None}
+        out.family('hybrid_monitor_deployment_last_timestamp_seconds', 'gauge',
+                   'Time of the newest deployment log entry', 'seconds')
+        for method, when in deployed.items():
+            out.sample('hybrid_monitor_deployment_last_timestamp_seconds', when, {'method': method})
+        out.family('hybrid_monitor_deployment_age_seconds', 'gauge', 'Seconds since the newest deployment', 'seconds')
+        for method, when in deployed.items():
+            out.sample('hybrid_monitor_deployment_age_seconds', now - when, {'method': method})
+        out.family('hybrid_monitor_deployment_success', 'gauge', 'Whether the newest deployment succeeded')
+        for method, deploy in sorted(self.latest_deployments.items()):
+            out.sample('hybrid_monitor_deployment_success', int(deploy.status == 'success'), {'method': method})
+
+        out.family('hybrid_monitor_ssh_calls', 'counter', 'SSH commands by transport')
+        for transport in ('mux', 'direct'):
+            out.sample('hybrid_monitor_ssh_calls_total', self.ssh_stats[f'{transport}_calls'], {'transport': transport})
+        out.family('hybrid_monitor_start_time_seconds', 'gauge', 'When the monitor started', 'seconds')
+        out.sample('hybrid_monitor_start_time_seconds', self.started_at)
+        return out.render()
+
+    def start_exporter(self, port=None):
+        """Serve /metrics while the scheduler runs the checks
+
+        Scrapes only read in-memory state, so their rate does not change
+        the load on the monitored hosts.
+        """
+        port = port or self.config['exporter_port']
+        monitor = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = monitor.render_openmetrics().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/openmetrics-text; version=1.0.0; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((self.config['exporter_host'], port), MetricsHandler)
+        self.is_monitoring = True
+        self.scheduler = CheckScheduler(self)
+        threading.Thread(target=self.scheduler.run, daemon=True).start()
+        print(f"📡 Serving OpenMetrics on http://{self.config['exporter_host']}:{port}/metrics")
+        print("   Press Ctrl+C to stop")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Exporter stopped by user")
+        finally:
+            server.server_close()
+            self.is_monitoring = False
+            self.scheduler.stop()
+            self.close_ssh_master()
+
+    def latency_sketch(self, service, minutes):
+        """Latency sketch of service over the last `minutes`"""
+        if self.metrics_store:
+            self.metrics_store.flush()
+            return self.metrics_store.latency_sketch(service, minutes / 60)
+        window = self.latency_windows.get(service)
+        return window.sketch(minutes) if window else LatencySketch()
+
+    @staticmethod
+    def window_label(minutes):
+        return f"{minutes // 1440}d" if minutes % 1440 == 0 else \
+            f"{minutes // 60}h" if minutes % 60 == 0 else f"{minutes}m"
+
+    def deployment_logs(self):
+        """method -> (transport, path) of each system's deployment log"""
+        return {
+            'mcp_api': ('mcp', f"{self.config['legacy_path']}/deployment.log"),
+            'docker_compose': ('ssh', f"{self.config['docker_path']}/deployment.log"),
+        }
+
+    def ingest_deployment_log(self, method):
+        """Parse the lines appended to one system's deployment.log since the
+        last call into deployment_history; returns how many were added
+
+        A byte-offset cursor (plus the file's inode, to notice rotation)
+        means every line is fetched and parsed once. A partial last line
+        is left for the next call. The chunk travels base64-encoded so the
+        cursor advances by the file's raw bytes, whatever newline or text
+        decoding the transport applies.
+        """
+        via, path = self.deployment_logs()[method]
+        with self.ingest_lock:
+            cursor = self.log_cursors.setdefault(
+                method, {'inode': '', 'offset': 0, 'last_line': None, 'last_timestamp': '', 'rotations': 0})
+            added = 0
+            # A few chunks per call; a long backlog is caught up over calls
+            for _ in range(8):
+                command = DEPLOY_LOG_READ % {'path': path, 'inode': cursor['inode'],
+                                             'offset': cursor['offset'], 'max_bytes': DEPLOY_LOG_CHUNK}
+                if via == 'mcp':
+                    result = self.execute_mcp_command(command, timeout=self.config['health_timeout'])
+                    output = result['data'].get('stdout', '') if result['success'] else ''
+                else:
+                    result = self.execute_ssh_command(command, timeout=self.config['health_timeout'])
+                    output = result.get('stdout', '') if result['success'] else ''
+                header, _, chunk = output.partition('\n')
+                if len(header.split()) != 3:
+                    break  # unreachable or no log yet
+                inode, size, start = header.split()
+                start, size = int(start), int(size)
+                replay_until = ''
+                if start == 0 and cursor['offset']:
+                    # Rotated: the new file repeats entries already ingested
+                    cursor['rotations'] += 1
+                    replay_until = cursor['last_timestamp']
+                try:
+                    data = base64.b64decode(chunk)
+                except ValueError:
+                    break  # truncated transfer; retry from the same offset
+                end = data.rfind(b'\n') + 1
+                if not end and len(data) >= DEPLOY_LOG_CHUNK:
+                    end = len(data)  # one over-long line: skip it
+                for line in data[:end].decode(errors='replace').splitlines():
+                    deploy = parse_deployment_line(method, line)
+                    if line.strip():
+                        cursor['last_line'] = line.strip()
+                    if deploy is None or deploy.timestamp <= replay_until:
+                        continue
+                    cursor['last_timestamp'] = deploy.timestamp
+                    self.add_deployment(deploy)
+                    added += 1
+                cursor['inode'], cursor['offset'] = inode, start + end
+                if cursor['offset'] >= size or len(data) < DEPLOY_LOG_CHUNK:
+                    break
+            return added
+
+    def ingest_deployment_logs(self):
+        """Ingest both systems' logs concurrently"""
+        return sum(self.probe_pool.map(self.ingest_deployment_log, self.deployment_logs()))
+
+    def add_deployment(self, deploy):
+        self.deployment_history.append(deploy)
+        if deploy.commit_sha != 'unknown':
+            self.deployment_index.setdefault(deploy.commit_sha[:7], []).append(deploy)
+        self.latest_deployments[deploy.method] = deploy
+
+    def find_deployments(self, commit_sha):
+        """Ingested deployments of a commit (full or abbreviated SHA, 7+ chars)"""
+        return [d for d in self.deployment_index.get(commit_sha[:7], [])
+                if d.commit_sha.startswith(commit_sha) or commit_sha.startswith(d.commit_sha)]
 
     def get_deployment_status(self):
         """Get current deployment status from both systems"""
+        self.ingest_deployment_logs()
         deployments = []
         
         # MCP API deployment status
-        mcp_deploy = self.execute_mcp_command(
-            f'tail -3 {self.config["legacy_path"]}/deployment.log 2>/dev/null | grep -E "(successful|failed)"'
-        )
-        
-        if mcp_deploy['success'] and mcp_deploy['data'].get('stdout'):
-            last_mcp = mcp_deploy['data']['stdout'].strip().split('\n')[-1]
-            deployments.append(DeploymentInfo(
-                method='mcp_api',
-                status='success' if 'successful' in last_mcp else 'failed',
-                timestamp=last_mcp.split(':')[0] if ':' in last_mcp else datetime.now().isoformat(),
-                commit_sha=self.extract_commit_sha(last_mcp),
-                release_path=None,
-                container_count=None,
-                details={'log_entry': last_mcp}
-            ))
+        if 'mcp_api' in self.latest_deployments:
+            deployments.append(self.latest_deployments['mcp_api'])
         
         # Docker deployment status
-        docker_deploy = self.execute_ssh_command(
-            f'tail -3 {self.config["docker_path"]}/deployment.log 2>/dev/null | grep -E "(successful|failed)"'
-        )
-        
-        if docker_deploy['success'] and docker_deploy['stdout'].strip():
-            last_docker = docker_deploy['stdout'].strip().split('\n')[-1]
-            
+        if 'docker_compose' in self.latest_deployments:
             # Get container count
             container_count_result = self.execute_ssh_command(
                 f'cd {self.config["docker_path"]} && docker compose ps -q | wc -l'
             )
             container_count = int(container_count_result['stdout'].strip()) if container_count_result['success'] else None
-            
-            deployments.append(DeploymentInfo(
-                method='docker_compose',
-                status='success' if 'successful' in last_docker else 'failed',
-                timestamp=last_docker.split(':')[0] if ':' in last_docker else datetime.now().isoformat(),
-                commit_sha=self.extract_commit_sha(last_docker),
-                release_path=None,
-                container_count=container_count,
-                details={'log_entry': last_docker}
-            ))
+            deployments.append(replace(self.latest_deployments['docker_compose'], container_count=container_count))
         
         return deployments
 
     def extract_commit_sha(self, log_entry):
         """Extract commit SHA from deployment log entry"""
-        import re
         sha_match = re.search(r'[a-f0-9]{8,40}', log_entry)
         return sha_match.group() if sha_match else 'unknown'
 
@@ -387,8 +1822,15 @@ class HybridMonitoringSystem:
         cutoff_time = datetime.now() - timedelta(hours=self.config['history_retention'])
         cutoff_str = cutoff_time.isoformat()
         
-        self.health_history = [h for h in self.health_history if h.timestamp > cutoff_str]
-        self.deployment_history = [d for d in self.deployment_history if d.timestamp > cutoff_str]
+        self.health_history.prune(cutoff_time.timestamp())
+        with self.ingest_lock:
+            while self.deployment_history and self.deployment_history[0].timestamp <= cutoff_str:
+                deploy = self.deployment_history.popleft()
+                indexed = self.deployment_index.get(deploy.commit_sha[:7], [])
+                if deploy in indexed:
+                    indexed.remove(deploy)
+                    if not indexed:
+                        del self.deployment_index[deploy.commit_sha[:7]]
 
     def generate_health_report(self):
         """Generate comprehensive health report"""
@@ -452,19 +1894,23 @@ class HybridMonitoringSystem:
         print("\n📈 PERFORMANCE METRICS:")
         print("-" * 40)
         
-        # Calculate average response times from recent history
-        if len(self.health_history) > 1:
-            recent_health = self.health_history[-10:]  # Last 10 checks
-            avg_times = {}
-            
-            for service_name in ['mcp_api', 'docker_system', 'service_endpoints']:
-                service_times = [h.response_time for h in recent_health 
-                               if h.service == service_name and h.response_time]
-                if service_times:
-                    avg_times[service_name] = sum(service_times) / len(service_times)
-            
-            for service, avg_time in avg_times.items():
-                print(f"📊 {service.replace('_', ' ').title()} Avg Response: {avg_time:.2f}s")
+        # Latency percentiles per service over the report windows
+        for service_name in ['mcp_api', 'docker_system', 'service_endpoints', 'github_runner']:
+            lines = []
+            for minutes in self.config['latency_windows']:
+                latency = self.latency_sketch(service_name, minutes).summary()
+                if latency['count']:
+                    lines.append(f"   ⏱️  {self.window_label(minutes)}: p50 {latency['p50']:.2f}s, "
+                                 f"p90 {latency['p90']:.2f}s, p99 {latency['p99']:.2f}s, "
+                                 f"max {latency['max']:.2f}s ({latency['count']} checks)")
+            if self.metrics_store:
+                last_day = self.metrics_store.latency(service_name, 24)
+                if last_day['checks']:
+                    lines.append(f"   🟢 Availability (24h): {last_day['availability'] * 100:.1f}% "
+                                 f"of {last_day['checks']} checks")
+            if lines:
+                print(f"📊 {service_name.replace('_', ' ').title()}:")
+                print('\n'.join(lines))
         
         print("\n💡 RECOMMENDATIONS:")
         print("-" * 40)
@@ -517,22 +1963,12 @@ class HybridMonitoringSystem:
             return
         
         self.is_monitoring = True
-        print(f"🎯 Starting continuous monitoring (interval: {self.config['monitoring_interval']}s)")
+        self.scheduler = CheckScheduler(self)
+        intervals = ', '.join(f"{name} {state.interval}s" for name, state in self.scheduler.states.items())
+        print(f"🎯 Starting continuous monitoring ({intervals}; budget {self.config['cost_budget']}/min)")
         print("   Press Ctrl+C to stop")
         
-        def monitoring_loop():
-            while self.is_monitoring:
-                try:
-                    self.comprehensive_health_check()
-                    time.sleep(self.config['monitoring_interval'])
-                except KeyboardInterrupt:
-                    self.is_monitoring = False
-                    break
-                except Exception as e:
-                    print(f"❌ Monitoring error: {e}")
-                    time.sleep(5)  # Wait before retrying
-        
-        monitoring_thread = threading.Thread(target=monitoring_loop, daemon=True)
+        monitoring_thread = threading.Thread(target=self.scheduler.run, daemon=True)
         monitoring_thread.start()
         
         try:
@@ -541,21 +1977,48 @@ class HybridMonitoringSystem:
                 time.sleep(300)  # Show report every 5 minutes
                 if self.is_monitoring:
                     print(f"\n📊 [{datetime.now().strftime('%H:%M:%S')}] Periodic Health Summary:")
-                    recent_health = self.health_history[-4:] if len(self.health_history) >= 4 else self.health_history
-                    for health in recent_health:
+                    schedule = self.scheduler.summary()
+                    for health in self.health_history.latest_statuses():
                         status_emoji = "✅" if health.status == 'healthy' else "❌"
-                        print(f"   {status_emoji} {health.service}: {health.status}")
+                        interval = schedule.get(health.service, {}).get('interval')
+                        interval_info = f" (every {interval:.0f}s)" if interval else ""
+                        print(f"   {status_emoji} {health.service}: {health.status}{interval_info}")
         except KeyboardInterrupt:
             self.is_monitoring = False
             print("\n🛑 Monitoring stopped by user")
+        finally:
+            self.scheduler.stop()
+            self.close_ssh_master()
+            if self.metrics_store:
+                self.metrics_store.close()
+
+    def ssh_transport_summary(self):
+        """Per-call SSH latency by transport, plus master connection setup"""
+        stats = self.ssh_stats
+        summary = {'multiplexing': bool(self.config.get('ssh_multiplexing')),
+                   'master_starts': stats['master_starts']}
+        for transport in ('mux', 'direct'):
+            calls = stats[f'{transport}_calls']
+            summary[f'{transport}_calls'] = calls
+            summary[f'{transport}_avg_latency'] = stats[f'{transport}_time'] / calls if calls else None
+        if stats['master_starts']:
+            summary['master_avg_connect_time'] = stats['master_connect_time'] / stats['master_starts']
+        return summary
 
     def export_metrics(self, format='json'):
         """Export monitoring metrics"""
+        self.ingest_deployment_logs()
         metrics = {
             'timestamp': datetime.now().isoformat(),
             'config': self.config,
-            'current_health': [asdict(h) for h in self.health_history[-4:]] if self.health_history else [],
+            'current_health': [asdict(h) for h in self.health_history.latest_statuses()],
             'deployment_history': [asdict(d) for d in self.deployment_history],
+            'latest_deployments': {method: asdict(d) for method, d in self.latest_deployments.items()},
+            'last_cycle': self.last_cycle,
+            'ssh_transport': self.ssh_transport_summary(),
+            'schedule': self.scheduler.summary() if self.scheduler else None,
+            'history': {},
+            'latency': {},
             'summary': {
                 'total_health_checks': len(self.health_history),
                 'total_deployments': len(self.deployment_history),
@@ -563,6 +2026,26 @@ class HybridMonitoringSystem:
             }
         }
         
+        if self.metrics_store:
+            self.metrics_store.flush()
+            hours = self.config['history_retention']
+            metrics['history'] = {service: {
+                'window_hours': hours,
+                **self.metrics_store.latency(service, hours),
+                'hourly': self.metrics_store.latency_series(service, hours, table='rollup_hour'),
+            } for service in self.metrics_store.services()}
+            metrics['summary']['total_health_checks'] = self.metrics_store.sample_count()
+        
+        # Percentiles per window; the longest window's sketch is included
+        # so exports from several runs or hosts can be merged
+        services = set(self.latency_windows) | set(self.metrics_store.services() if self.metrics_store else [])
+        for service in sorted(services):
+            windows = {minutes: self.latency_sketch(service, minutes) for minutes in self.config['latency_windows']}
+            metrics['latency'][service] = {
+                **{self.window_label(minutes): sketch.summary() for minutes, sketch in windows.items()},
+                'sketch': windows[max(windows)].to_dict(),
+            }
+        
         if format == 'json':
             return json.dumps(metrics, indent=2)
         else:
@@ -583,12 +2066,14 @@ Commands:
   report                    Generate comprehensive health report
   monitor                   Start continuous monitoring
   export [json]             Export monitoring data
+  exporter [port]           Serve OpenMetrics on /metrics (default port 9470)
   
 Examples:
   python hybrid-monitoring.py health
   python hybrid-monitoring.py report
   python hybrid-monitoring.py monitor
   python hybrid-monitoring.py export json > metrics.json
+  python hybrid-monitoring.py exporter 9470
         """)
         return
     
@@ -603,7 +2088,8 @@ Examples:
             print(f"\n📋 Health Check Results:")
             for health in health_checks:
                 status_emoji = "✅" if health.status == 'healthy' else "❌"
-                print(f"{status_emoji} {health.service}: {health.status}")
+                wall_info = f" ({health.wall_time:.2f}s)" if health.wall_time is not None else ""
+                print(f"{status_emoji} {health.service}: {health.status}{wall_info}")
                 
         elif command == 'report':
             report = monitor.generate_health_report()
@@ -616,6 +2102,10 @@ Examples:
             metrics = monitor.export_metrics(format_type)
             print(metrics)
             
+        elif command == 'exporter':
+            port = int(sys.argv[2]) if len(sys.argv) > 2 else None
+            monitor.start_exporter(port)
+            
         else:
             print(f"❌ Unknown command: {command}")
             sys.exit(1)
@@ -625,6 +2115,9 @@ Examples:
     except Exception as e:
         print(f"❌ Error: {e}")
         sys.exit(1)
+    finally:
+        if monitor.metrics_store:
+            monitor.metrics_store.close()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
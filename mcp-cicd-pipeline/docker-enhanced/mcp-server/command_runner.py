@@ -0,0 +1,601 @@
+#!/usr/bin/env python3
+"""
+Command Runner - resource-limited execution for execute_command
+
+Each command runs under an execution profile that sets RLIMIT_AS, RLIMIT_CPU,
+nice and ionice, and, when the server may write to its cgroup v2 directory,
+places the command in a child cgroup with its own memory.max and cpu.weight.
+A runaway build is then killed (or throttled) on its own instead of pushing
+the whole 128M container, and the server answering health checks, into OOM.
+Without a writable cgroup (the Docker default) memory_mb is enforced instead
+by RLIMIT_DATA per process and a watchdog that kills the command's session
+once the RSS of all its processes exceeds it.
+
+Commands are started through a small launcher (python3 -I -S) rather than a
+preexec_fn: the launcher applies the limits to itself, forks /bin/sh -c and
+reports the shell's wait4() rusage back over a pipe. That keeps fork-time
+work out of the threaded server, and keeps peak RSS honest - a child forked
+straight from the server inherits the server's RSS high-water mark, while
+one forked from the launcher starts from a floor of ~5MB.
+
+Profiles can be overridden with a JSON file named by MCP_EXEC_PROFILES:
+    {"build": {"memory_mb": 96, "cpu_seconds": 900}}
+
+Running commands are registered under a job id so a client that gives up on
+a call can cancel it: cancel() kills the command's process group instead of
+leaving it to run until the timeout.
+"""
+
+import json
+import logging
+import os
+import platform
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# memory_mb:        cgroup memory.max for the whole command tree (cgroup v2 only)
+# address_space_mb: RLIMIT_AS per process; None for node/npm and Go binaries,
+#                   which reserve far more virtual memory than they touch
+# cpu_seconds:      RLIMIT_CPU soft limit (SIGXCPU); SIGKILL follows after CPU_GRACE
+# nice / ionice:    scheduling priority relative to the server
+# cpu_weight:       cgroup cpu.weight (the server's own cgroup keeps 100)
+EXECUTION_PROFILES = {
+    'light': {
+        'memory_mb': 32, 'address_space_mb': 512, 'cpu_seconds': 30,
+        'nice': 5, 'ionice_class': 2, 'ionice_level': 4, 'cpu_weight': 50,
+    },
+    'default': {
+        'memory_mb': 64, 'address_space_mb': 1024, 'cpu_seconds': 300,
+        'nice': 10, 'ionice_class': 2, 'ionice_level': 7, 'cpu_weight': 30,
+    },
+    'build': {
+        'memory_mb': 80, 'address_space_mb': None, 'cpu_seconds': 600,
+        'nice': 15, 'ionice_class': 3, 'ionice_level': 0, 'cpu_weight': 10,
+    },
+}
+
+# (program, argument prefix, profile) when the caller names none. Every
+# command in a pipeline or list is matched by its program name (argv[0]) and
+# the heaviest profile wins; commands matching no rule count as 'default'.
+PROFILE_RULES = [
+    ('npm', '', 'build'), ('npx', '', 'build'), ('yarn', '', 'build'), ('node', '', 'build'),
+    ('docker', 'build', 'build'), ('docker', 'compose build', 'build'),
+    ('docker-compose', 'build', 'build'), ('pip', 'install', 'build'),
+    ('ls', '', 'light'), ('cat', '', 'light'), ('echo', '', 'light'), ('pwd', '', 'light'),
+    ('df', '', 'light'), ('free', '', 'light'), ('uptime', '', 'light'),
+]
+PROFILE_WEIGHTS = {'light': 0, 'default': 1, 'build': 2}
+
+# Go binaries reserve far more address space than they use and abort under
+# RLIMIT_AS (and map whole 64MB heap arenas, which RLIMIT_DATA counts), so
+# any of these in the command line drops both; memory_mb still applies
+# through the cgroup or the RSS watchdog
+UNLIMITED_ADDRESS_SPACE = {'docker', 'docker-compose', 'kubectl', 'helm', 'go', 'node', 'npm', 'npx', 'yarn'}
+
+COMMAND_SEPARATORS = {';', '&', '&&', '||', '|', '|&', '(', ')'}
+REDIRECTIONS = {'>', '>>', '<', '<<', '<<<', '>&', '<&', '&>', '&>>', '>|'}
+
+CPU_GRACE = 5  # seconds between SIGXCPU and the hard-limit SIGKILL
+OOM_SCORE_ADJ = 1000  # let the kernel pick a command over the server on OOM
+CGROUP_ROOT = os.environ.get('MCP_CGROUP_ROOT', '/sys/fs/cgroup')
+EARLY_CANCELS = 256  # cancels remembered for jobs that have not started yet
+RSS_POLL_INTERVAL = 0.1  # seconds between RSS watchdog samples (no cgroup only)
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+# ioprio_set(2) has no libc wrapper; syscall numbers per architecture
+IOPRIO_SET_SYSCALLS = {'x86_64': 251, 'i686': 289, 'i386': 289, 'aarch64': 30, 'armv7l': 314}
+
+# argv: spec JSON, command, report fd
+LAUNCHER = r'''
+import json, os, resource, signal, sys
+spec = json.loads(sys.argv[1])
+report = int(sys.argv[3])
+os.set_inheritable(report, False)
+if spec["cgroup_procs"]:
+    try:
+        with open(spec["cgroup_procs"], "w") as f:
+            f.write(str(os.getpid()))
+    except OSError:
+        pass
+for name, soft, hard in spec["rlimits"]:
+    which = getattr(resource, name)
+    current = resource.getrlimit(which)[1]
+    if current != resource.RLIM_INFINITY:
+        soft, hard = min(soft, current), min(hard, current)
+    try:
+        resource.setrlimit(which, (soft, hard))
+    except (ValueError, OSError):
+        pass
+if spec["nice"]:
+    os.nice(spec["nice"])
+if spec["ioprio_syscall"]:
+    import ctypes
+    ctypes.CDLL(None).syscall(spec["ioprio_syscall"], 1, 0, spec["ioprio"])
+try:
+    with open("/proc/self/oom_score_adj", "w") as f:
+        f.write(str(spec["oom_score_adj"]))
+except OSError:
+    pass
+pid = os.fork()
+if pid == 0:
+    # Python ignores these at startup; the shell must see the defaults
+    signal.signal(signal.SIGPIPE, signal.SIG_DFL)
+    signal.signal(signal.SIGXFSZ, signal.SIG_DFL)
+    os.execv("/bin/sh", ["/bin/sh", "-c", sys.argv[2]])
+_, status, usage = os.wait4(pid, 0)
+os.write(report, json.dumps({"status": status, "utime": usage.ru_utime,
+                             "stime": usage.ru_stime, "maxrss": usage.ru_maxrss}).encode())
+code = os.waitstatus_to_exitcode(status)
+if code < 0:
+    # Die from the same signal so the server sees the real cause
+    if -code != signal.SIGKILL:
+        signal.signal(-code, signal.SIG_DFL)
+    os.kill(os.getpid(), -code)
+os._exit(code)
+'''
+
+
+class CgroupSlice:
+    """Per-command child cgroups under the server's own cgroup v2 directory
+
+    cgroup v2 only lets a cgroup hand controllers to children when it has no
+    processes of its own, so the server first moves itself into a "server"
+    leaf and commands get "exec/<id>" siblings. Docker mounts /sys/fs/cgroup
+    read-only unless the container opts in, in which case this stays disabled.
+    """
+
+    def __init__(self, root=CGROUP_ROOT):
+        self.root = root
+        self.exec_dir = None
+        self._counter = 0
+        self._lock = threading.Lock()
+        try:
+            self.exec_dir = self._setup()
+        except OSError as e:
+            logger.info(f"cgroup v2 slices unavailable: {e}")
+        if self.exec_dir:
+            logger.info(f"Commands run in cgroup slices under {self.exec_dir}")
+
+    @property
+    def available(self):
+        return self.exec_dir is not None
+
+    @staticmethod
+    def _write(path, value):
+        with open(path, 'w') as f:
+            f.write(value)
+
+    def _setup(self):
+        if not os.path.exists(os.path.join(self.root, 'cgroup.controllers')):
+            return None
+        with open('/proc/self/cgroup', 'r') as f:
+            own = next((line[3:].strip() for line in f if line.startswith('0::')), None)
+        if own is None:
+            return None
+        base = os.path.join(self.root, own.lstrip('/'))
+        if os.path.basename(base) == 'server':
+            base = os.path.dirname(base)  # restarted in place; reuse the layout
+        if not os.access(base, os.W_OK):
+            return None
+
+        with open(os.path.join(base, 'cgroup.controllers'), 'r') as f:
+            available = f.read().split()
+        controllers = [c for c in ('memory', 'cpu') if c in available]
+        if 'memory' not in controllers:
+            return None
+
+        server = os.path.join(base, 'server')
+        os.makedirs(server, exist_ok=True)
+        self._write(os.path.join(server, 'cgroup.procs'), str(os.getpid()))
+        enable = ' '.join('+' + c for c in controllers)
+        self._write(os.path.join(base, 'cgroup.subtree_control'), enable)
+
+        exec_dir = os.path.join(base, 'exec')
+        os.makedirs(exec_dir, exist_ok=True)
+        self._write(os.path.join(exec_dir, 'cgroup.subtree_control'), enable)
+        return exec_dir
+
+    def create(self, profile):
+        """Create a cgroup for one command; returns its path or None"""
+        if not self.available:
+            return None
+        with self._lock:
+            self._counter += 1
+            name = f"cmd-{os.getpid()}-{self._counter}"
+        path = os.path.join(self.exec_dir, name)
+        try:
+            os.mkdir(path)
+            if profile.get('memory_mb'):
+                self._write(os.path.join(path, 'memory.max'), str(profile['memory_mb'] * 1024 * 1024))
+                if os.path.exists(os.path.join(path, 'memory.swap.max')):
+                    self._write(os.path.join(path, 'memory.swap.max'), '0')
+            if profile.get('cpu_weight') and os.path.exists(os.path.join(path, 'cpu.weight')):
+                self._write(os.path.join(path, 'cpu.weight'), str(profile['cpu_weight']))
+        except OSError as e:
+            logger.warning(f"Cannot create cgroup {path}: {e}")
+            self.remove(path)
+            return None
+        return path
+
+    @staticmethod
+    def stats(path):
+        """memory.peak (kernel 5.19+) and OOM kill count of a command cgroup"""
+        stats = {}
+        try:
+            with open(os.path.join(path, 'memory.peak'), 'r') as f:
+                stats['cgroup_memory_peak_kb'] = int(f.read()) // 1024
+        except (OSError, ValueError):
+            pass
+        try:
+            with open(os.path.join(path, 'memory.events'), 'r') as f:
+                events = dict(line.split() for line in f if line.strip())
+            stats['oom_kills'] = int(events.get('oom_kill', 0))
+        except (OSError, ValueError):
+            pass
+        return stats
+
+    def remove(self, path):
+        """Kill anything left in the cgroup and delete it"""
+        try:
+            if os.path.exists(os.path.join(path, 'cgroup.kill')):
+                self._write(os.path.join(path, 'cgroup.kill'), '1')
+        except OSError:
+            pass
+        for _ in range(10):
+            try:
+                os.rmdir(path)
+                return
+            except FileNotFoundError:
+                return
+            except OSError:
+                time.sleep(0.05)
+        logger.warning(f"Cannot remove cgroup {path}")
+
+
+def load_profiles():
+    """Built-in profiles merged with the MCP_EXEC_PROFILES override file"""
+    profiles = {name: dict(values) for name, values in EXECUTION_PROFILES.items()}
+    path = os.environ.get('MCP_EXEC_PROFILES')
+    if path:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for name, values in json.load(f).items():
+                    profiles.setdefault(name, dict(EXECUTION_PROFILES['default'])).update(values)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring execution profiles from {path}: {e}")
+    return profiles
+
+
+class CommandRunner:
+    """Runs shell commands under execution profiles and reports their usage"""
+
+    def __init__(self, profiles=None, cgroups=None):
+        self.profiles = profiles or load_profiles()
+        self.cgroups = cgroups if cgroups is not None else CgroupSlice()
+        self.ioprio_syscall = IOPRIO_SET_SYSCALLS.get(platform.machine())
+        self.lock = threading.Lock()
+        self.jobs = {}  # job id -> {'pid', 'cancelled'} while the command runs
+        # A cancel can overtake its command (sent just after the request);
+        # it is kept here and applied when the job registers
+        self.early_cancels = OrderedDict()
+        self.counters = {'completed': 0, 'timed_out': 0, 'cancelled': 0,
+                         'disconnected': 0, 'cancel_unmatched': 0}
+
+    def stats(self):
+        """Job counters for health_check"""
+        with self.lock:
+            return dict(self.counters, running=len(self.jobs))
+
+    def cancel(self, job_id, reason='cancelled'):
+        """Kill a running job's process group; False if it is not running
+
+        reason is 'cancelled' (the client asked) or 'disconnected' (the
+        client went away mid-stream) and ends up in the job's result.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                self.counters['cancel_unmatched'] += 1
+                self.early_cancels[job_id] = reason
+                while len(self.early_cancels) > EARLY_CANCELS:
+                    self.early_cancels.popitem(last=False)
+                return False
+            if job['cancelled']:
+                return True
+            job['cancelled'] = reason
+        logger.info(f"Cancelling job {job_id} ({reason})")
+        self._kill_group(job['pid'])
+        return True
+
+    @staticmethod
+    def split_commands(command):
+        """Best-effort argv lists for each command in a shell command line"""
+        lexer = shlex.shlex(command.replace('\n', ';'), posix=True, punctuation_chars=True)
+        lexer.whitespace_split = True
+        try:
+            tokens = list(lexer)
+        except ValueError:
+            tokens = command.split()
+        commands, argv, skip_next = [], [], False
+        for token in tokens:
+            if skip_next:
+                skip_next = False
+            elif token in COMMAND_SEPARATORS:
+                if argv:
+                    commands.append(argv)
+                argv = []
+            elif token in REDIRECTIONS:
+                skip_next = True
+            elif argv or '=' not in token:
+                # Leading VAR=value assignments are not the program
+                argv.append(token)
+        if argv:
+            commands.append(argv)
+        return [[os.path.basename(argv[0])] + argv[1:] for argv in commands]
+
+    @staticmethod
+    def profile_for(argv):
+        arg_string = ' '.join(argv[1:])
+        for program, prefix, name in PROFILE_RULES:
+            if argv[0] == program and arg_string.startswith(prefix):
+                return name
+        return 'default'
+
+    def select_profile(self, command, requested=None):
+        if requested in self.profiles:
+            return requested
+        names = [self.profile_for(argv) for argv in self.split_commands(command)] or ['default']
+        name = max(names, key=lambda n: PROFILE_WEIGHTS.get(n, 1))
+        return name if name in self.profiles else 'default'
+
+    def profile_limits(self, name, command):
+        """Limits for the named profile, adjusted for the programs in command"""
+        limits = self.profiles[name]
+        if any(argv[0] in UNLIMITED_ADDRESS_SPACE for argv in self.split_commands(command)):
+            limits = dict(limits, address_space_mb=None, data_limit=False)
+        return limits
+
+    def launcher_spec(self, profile, cgroup):
+        """Limits for the launcher to apply to itself before forking the shell"""
+        rlimits = []
+        if profile.get('address_space_mb'):
+            limit = profile['address_space_mb'] * 1024 * 1024
+            rlimits.append(('RLIMIT_AS', limit, limit))
+        if cgroup is None and profile.get('memory_mb') and profile.get('data_limit', True):
+            # No memory.max to stop the tree; at least bound each process
+            limit = profile['memory_mb'] * 1024 * 1024
+            rlimits.append(('RLIMIT_DATA', limit, limit))
+        if profile.get('cpu_seconds'):
+            cpu = profile['cpu_seconds']
+            rlimits.append(('RLIMIT_CPU', cpu, cpu + CPU_GRACE))
+        ioprio = None
+        if self.ioprio_syscall and profile.get('ionice_class'):
+            # IOPRIO_PRIO_VALUE(class, level)
+            ioprio = (profile['ionice_class'] << 13) | profile.get('ionice_level', 0)
+        return {
+            'cgroup_procs': os.path.join(cgroup, 'cgroup.procs') if cgroup else None,
+            'rlimits': rlimits,
+            'nice': profile.get('nice') or 0,
+            'ioprio_syscall': self.ioprio_syscall if ioprio is not None else None,
+            'ioprio': ioprio,
+            'oom_score_adj': OOM_SCORE_ADJ,
+        }
+
+    @staticmethod
+    def session_rss(sid):
+        """Resident bytes of every process in session sid (from /proc)"""
+        total = 0
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat', 'rb') as f:
+                    # Fields after the parenthesised comm: state ppid pgrp session ... rss
+                    fields = f.read().rsplit(b')', 1)[1].split()
+            except (OSError, IndexError):
+                continue
+            if int(fields[3]) == sid:
+                total += int(fields[21]) * PAGE_SIZE
+        return total
+
+    def _watch_memory(self, pid, limit_mb, job, done):
+        """Kill the command's session once its total RSS passes limit_mb"""
+        limit = limit_mb * 1024 * 1024
+        while not done.wait(RSS_POLL_INTERVAL):
+            rss = self.session_rss(pid)
+            job['rss_peak'] = max(job.get('rss_peak', 0), rss)
+            if rss > limit:
+                logger.warning(f"Command pid {pid} exceeded {limit_mb}MB RSS; killing it")
+                job['memory_killed'] = True
+                self._kill_group(pid)
+                return
+
+    @staticmethod
+    def _read_output(pipe, sink, on_output, tail_bytes):
+        """Collect one pipe, passing each chunk to on_output as it arrives"""
+        buffer = sink['data']
+        while True:
+            chunk = pipe.read1(65536)
+            if not chunk:
+                break
+            sink['bytes'] += len(chunk)
+            if on_output is not None:
+                try:
+                    on_output(sink['stream'], chunk)
+                except Exception as e:
+                    # The listener is gone; keep collecting so the command
+                    # is not blocked on a full pipe
+                    logger.warning(f"Dropping {sink['stream']} listener: {e}")
+                    on_output = None
+            buffer += chunk
+            if tail_bytes and len(buffer) > 2 * tail_bytes:
+                del buffer[:-tail_bytes]
+
+    def run(self, command, cwd=None, timeout=300, profile=None, on_output=None, tail_bytes=None,
+            job_id=None):
+        """Run command; returns stdout/stderr/returncode plus a resources block
+
+        on_output(stream, chunk) is called from reader threads with raw bytes
+        as they arrive. With tail_bytes only the last tail_bytes of each
+        stream are kept and returned, along with the total byte counts.
+        job_id names the job for cancel(); one is generated when omitted.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        name = self.select_profile(command, profile)
+        limits = self.profile_limits(name, command)
+        cgroup = self.cgroups.create(limits)
+        report_read, report_write = os.pipe()
+        started = time.monotonic()
+        timed_out = False
+
+        try:
+            proc = subprocess.Popen(
+                [sys.executable, '-I', '-S', '-c', LAUNCHER,
+                 json.dumps(self.launcher_spec(limits, cgroup)), command, str(report_write)],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=cwd,
+                pass_fds=(report_write,),
+                start_new_session=True
+            )
+        except Exception:
+            os.close(report_read)
+            if cgroup:
+                self.cgroups.remove(cgroup)
+            raise
+        finally:
+            os.close(report_write)
+
+        with self.lock:
+            job = {'pid': proc.pid, 'cancelled': self.early_cancels.pop(job_id, None)}
+            self.jobs[job_id] = job
+        if job['cancelled']:
+            self._kill_group(proc.pid)
+        watch_done = threading.Event()
+        if cgroup is None and limits.get('memory_mb'):
+            # start_new_session made the launcher a session leader (sid == pid)
+            threading.Thread(target=self._watch_memory, name=f'rss-watch-{proc.pid}',
+                             args=(proc.pid, limits['memory_mb'], job, watch_done), daemon=True).start()
+
+        output = {key: {'stream': key, 'data': bytearray(), 'bytes': 0} for key in ('stdout', 'stderr')}
+        readers = [
+            threading.Thread(target=self._read_output,
+                             args=(pipe, output[key], on_output, tail_bytes), daemon=True)
+            for key, pipe in (('stdout', proc.stdout), ('stderr', proc.stderr))
+        ]
+        for reader in readers:
+            reader.start()
+        deadline = started + timeout
+        for reader in readers:
+            reader.join(max(0, deadline - time.monotonic()))
+        if any(reader.is_alive() for reader in readers):
+            timed_out = True
+            self._kill_group(proc.pid)
+            for reader in readers:
+                reader.join(1)
+
+        # The pipes can close before the shell exits; keep to the deadline
+        while not timed_out:
+            try:
+                proc.wait(max(0, deadline - time.monotonic()))
+                break
+            except subprocess.TimeoutExpired:
+                timed_out = True
+                self._kill_group(proc.pid)
+        proc.wait()
+        watch_done.set()
+        for pipe in (proc.stdout, proc.stderr):
+            pipe.close()
+        with self.lock:
+            del self.jobs[job_id]
+            cancelled = job['cancelled']
+            self.counters['timed_out' if timed_out else cancelled or 'completed'] += 1
+        usage = self._read_report(report_read)
+
+        elapsed = time.monotonic() - started
+        cgroup_stats = {}
+        if cgroup:
+            cgroup_stats = self.cgroups.stats(cgroup)
+            self.cgroups.remove(cgroup)
+
+        resources = {
+            'profile': name,
+            'wall_time': round(elapsed, 3),
+            'cpu_user': round(usage['utime'], 3) if usage else None,
+            'cpu_system': round(usage['stime'], 3) if usage else None,
+            'cpu_time': round(usage['utime'] + usage['stime'], 3) if usage else None,
+            'peak_rss_kb': usage['maxrss'] if usage else None,
+            'cgroup': cgroup is not None,
+            'limits': {key: limits.get(key) for key in
+                       ('memory_mb', 'address_space_mb', 'cpu_seconds', 'nice')},
+        }
+        resources.update(cgroup_stats)
+        if 'rss_peak' in job:
+            resources['session_rss_peak_kb'] = job['rss_peak'] // 1024
+        if job.get('memory_killed'):
+            resources['memory_killed'] = True
+        resources['limit_exceeded'] = None if cancelled else self._limit_exceeded(
+            proc.returncode, resources, limits, timed_out)
+
+        result = {
+            'stdout': self._decode(output['stdout']['data'], tail_bytes),
+            'stderr': self._decode(output['stderr']['data'], tail_bytes),
+            'returncode': proc.returncode,
+            'resources': resources,
+        }
+        if tail_bytes:
+            result['stdout_bytes'] = output['stdout']['bytes']
+            result['stderr_bytes'] = output['stderr']['bytes']
+            result['truncated'] = any(output[key]['bytes'] > tail_bytes for key in output)
+        if timed_out:
+            result.update(error='Command timeout', returncode=-1)
+        elif cancelled:
+            result.update(error=f'Command {cancelled}', returncode=-1, cancelled=True)
+        return result
+
+    @staticmethod
+    def _decode(data, tail_bytes):
+        if tail_bytes:
+            data = data[-tail_bytes:]
+        return bytes(data).decode('utf-8', errors='replace')
+
+    @staticmethod
+    def _read_report(fd):
+        """Shell rusage written by the launcher; None if it was killed first"""
+        try:
+            data = os.read(fd, 4096)
+            return json.loads(data) if data else None
+        except (OSError, ValueError):
+            return None
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _kill_group(pid):
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    @staticmethod
+    def _limit_exceeded(returncode, resources, limits, timed_out):
+        if timed_out:
+            return 'timeout'
+        if resources.get('oom_kills') or resources.get('memory_killed'):
+            return 'memory'
+        # A shell reports a child killed by a signal as 128 + signum
+        killed_by = -returncode if returncode < 0 else returncode - 128
+        cpu_limit = limits.get('cpu_seconds')
+        if killed_by == signal.SIGXCPU or (
+                killed_by == signal.SIGKILL and cpu_limit
+                and (resources['cpu_time'] or 0) >= cpu_limit):
+            return 'cpu'
+        return None
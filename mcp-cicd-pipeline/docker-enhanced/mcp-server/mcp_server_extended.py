@@ -15,8 +15,13 @@ import time
 import logging
 import shutil
 import socket
+import hashlib
+import codecs
+import uuid
 from pathlib import Path
 
+from command_runner import CommandRunner
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,8 +33,95 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_system_info_cache = {}
+command_runner = CommandRunner()
+
+def stat_etag(path):
+    """Weak validator for a file or directory, derived from stat() only"""
+    st = os.stat(path)
+    return f'W/"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+def system_info_snapshot():
+    """uname output is fixed for the process lifetime; compute it once"""
+    if not _system_info_cache:
+        result = subprocess.run(['uname', '-a'], capture_output=True, text=True)
+        system = result.stdout.strip()
+        _system_info_cache['data'] = {'system': system}
+        _system_info_cache['etag'] = '"%s"' % hashlib.sha1(system.encode('utf-8')).hexdigest()[:16]
+    return _system_info_cache['data'], _system_info_cache['etag']
+
+# Served by list_methods so clients can build their tool schemas from it;
+# a new method only needs an entry here and a branch in do_POST
+METHOD_REGISTRY = {
+    'get_system_info': {
+        'description': 'Get system information from remote server',
+        'params': {},
+        'read_only': True
+    },
+    'list_directory': {
+        'description': 'List directory contents on remote server',
+        'params': {
+            'path': {'type': 'string', 'description': 'Directory path to list', 'required': True}
+        },
+        'read_only': True
+    },
+    'execute_command': {
+        'description': 'Execute shell commands on remote server (cwd /var/deployment)',
+        # params.stream=true answers with chunked NDJSON output records
+        'streaming': True,
+        # params.job_id lets cancel_command kill the running command
+        'cancellable': True,
+        'params': {
+            'command': {'type': 'string', 'description': 'Command to execute', 'required': True},
+            'profile': {'type': 'string', 'enum': sorted(command_runner.profiles),
+                        'description': 'Resource profile (default: chosen from the command)'}
+        }
+    },
+    'read_file': {
+        'description': 'Read file contents from remote server',
+        'params': {
+            'path': {'type': 'string', 'description': 'File path to read', 'required': True}
+        },
+        'read_only': True
+    },
+    'write_file': {
+        'description': 'Write file contents to remote server',
+        'params': {
+            'path': {'type': 'string', 'description': 'File path to write', 'required': True},
+            'content': {'type': 'string', 'description': 'Content to write', 'required': True}
+        }
+    },
+    'manage_service': {
+        'description': 'Manage services on remote server',
+        'params': {
+            'service': {'type': 'string', 'description': 'Service name', 'required': True},
+            'action': {'type': 'string', 'enum': ['start', 'stop', 'restart', 'status'],
+                       'description': 'Action to perform (start/stop/restart/status)', 'required': True}
+        }
+    },
+    'deploy_application': {
+        'description': 'Copy an application into /var/deployment/<app_name> on remote server',
+        'params': {
+            'app_name': {'type': 'string', 'description': 'Application name', 'required': True},
+            'source_path': {'type': 'string', 'description': 'Directory to copy from', 'required': True}
+        }
+    },
+    'health_check': {
+        'description': 'Check MCP server and Docker availability on remote server',
+        'params': {},
+        'read_only': True
+    }
+}
+REGISTRY_ETAG = '"%s"' % hashlib.sha1(json.dumps(METHOD_REGISTRY, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
 class MCPHandler(http.server.BaseHTTPRequestHandler):
     timeout = 60  # Set request timeout to 60 seconds
+    # Keep-alive lets clients reuse connections; every response must
+    # therefore carry a Content-Length
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; without TCP_NODELAY a reused
+    # connection waits ~40ms on the client's delayed ACK for the body
+    disable_nagle_algorithm = True
     
     def log_message(self, format, *args):
         logger.info("%s - - [%s] %s" % (self.client_address[0], 
@@ -46,9 +138,86 @@ class MCPHandler(http.server.BaseHTTPRequestHandler):
         except Exception as e:
             logger.error(f"Error writing response: {e}")
 
+    def _send_cors_headers(self):
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+
+    def _send_json(self, status, payload, cors=False):
+        """Send a JSON response with an explicit Content-Length"""
+        body = json.dumps(payload)
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body.encode('utf-8'))))
+        if cors:
+            self._send_cors_headers()
+        self.end_headers()
+        self._safe_write_response(body)
+
+    def _stream_command(self, request, params):
+        """execute_command with params.stream: chunked NDJSON
+
+        Emits {"type": "output", "stream", "data"} records while the command
+        runs, then one {"type": "result", "id", "result"} record holding only
+        the last params.tail_bytes of each stream.
+        """
+        command = params.get('command', '')
+        tail_bytes = int(params.get('tail_bytes', 4096))
+        # A job id is needed even when the client sent none: a reader that
+        # disconnects mid-stream cancels the command through it
+        job_id = params.get('job_id') or uuid.uuid4().hex
+        write_lock = threading.Lock()
+        decoders = {stream: codecs.getincrementaldecoder('utf-8')(errors='replace')
+                    for stream in ('stdout', 'stderr')}
+
+        def send_record(record):
+            data = (json.dumps(record) + '\n').encode('utf-8')
+            with write_lock:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                self.wfile.flush()
+
+        def on_output(stream, chunk):
+            text = decoders[stream].decode(chunk)
+            if text:
+                try:
+                    send_record({'type': 'output', 'stream': stream, 'data': text})
+                except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError):
+                    command_runner.cancel(job_id, 'disconnected')
+                    raise
+
+        self.send_response(200)
+        self.send_header('Content-type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self._send_cors_headers()
+        self.end_headers()
+
+        logger.info(f"Executing command (streaming): {command}")
+        try:
+            result_data = command_runner.run(
+                command,
+                cwd='/var/deployment',
+                timeout=300,
+                profile=params.get('profile'),
+                on_output=on_output,
+                tail_bytes=tail_bytes,
+                job_id=job_id
+            )
+        except Exception as e:
+            result_data = {'error': str(e), 'returncode': -1}
+
+        try:
+            send_record({'type': 'result', 'id': request.get('id', 1), 'result': result_data})
+            with write_lock:
+                self.wfile.write(b'0\r\n\r\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError) as e:
+            logger.warning(f"Client connection lost during streamed response: {e}")
+            self.close_connection = True
+
     def do_POST(self):
         content_length = int(self.headers.get('Content-Length', 0))
         post_data = self.rfile.read(content_length)
+        request = {}
 
         try:
             request = json.loads(post_data.decode('utf-8'))
@@ -57,46 +226,65 @@ class MCPHandler(http.server.BaseHTTPRequestHandler):
             
             logger.info(f"Received request: {method}")
 
+            # Read methods accept params.if_none_match (the etag of a previous
+            # result) and answer {'not_modified': True} without re-reading.
+            if_none_match = params.get('if_none_match')
+
             if method == 'get_system_info':
-                result = subprocess.run(['uname', '-a'], capture_output=True, text=True)
-                result_data = {'system': result.stdout.strip()}
+                system_data, etag = system_info_snapshot()
+                if if_none_match == etag:
+                    result_data = {'not_modified': True, 'etag': etag}
+                else:
+                    result_data = dict(system_data, etag=etag)
                 
             elif method == 'list_directory':
                 path = params.get('path', '/')
                 try:
-                    files = os.listdir(path)
-                    result_data = {'files': files, 'path': path}
+                    # Directory mtime changes whenever an entry is added,
+                    # removed or renamed, which is all this listing reports
+                    etag = stat_etag(path)
+                    if if_none_match == etag:
+                        result_data = {'not_modified': True, 'etag': etag, 'path': path}
+                    else:
+                        files = os.listdir(path)
+                        result_data = {'files': files, 'path': path, 'etag': etag}
                 except Exception as e:
                     result_data = {'error': f'Cannot list directory: {str(e)}'}
                     
+            elif method == 'execute_command' and params.get('stream'):
+                self._stream_command(request, params)
+                return
+
             elif method == 'execute_command':
                 command = params.get('command', '')
                 logger.info(f"Executing command: {command}")
                 try:
-                    result = subprocess.run(
-                        command, 
-                        shell=True, 
-                        capture_output=True, 
-                        text=True, 
+                    # Runs under an execution profile (rlimits, nice/ionice,
+                    # cgroup slice) and reports peak RSS / CPU time
+                    result_data = command_runner.run(
+                        command,
+                        cwd='/var/deployment',
                         timeout=300,
-                        cwd='/var/deployment'
+                        profile=params.get('profile'),
+                        job_id=params.get('job_id')
                     )
-                    result_data = {
-                        'stdout': result.stdout, 
-                        'stderr': result.stderr, 
-                        'returncode': result.returncode
-                    }
-                except subprocess.TimeoutExpired:
-                    result_data = {'error': 'Command timeout', 'returncode': -1}
+                    usage = result_data['resources']
+                    logger.info(f"Command finished: profile={usage['profile']} "
+                                f"rc={result_data['returncode']} cpu={usage['cpu_time']}s "
+                                f"peak_rss={usage['peak_rss_kb']}KB")
                 except Exception as e:
                     result_data = {'error': str(e), 'returncode': -1}
                     
             elif method == 'read_file':
                 file_path = params.get('path', '')
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    result_data = {'content': content, 'path': file_path}
+                    etag = stat_etag(file_path)
+                    if if_none_match == etag:
+                        result_data = {'not_modified': True, 'etag': etag, 'path': file_path}
+                    else:
+                        with open(file_path, 'r', encoding='utf-8') as f:
+                            content = f.read()
+                        result_data = {'content': content, 'path': file_path, 'etag': etag}
                 except Exception as e:
                     result_data = {'error': f'Cannot read file: {str(e)}'}
                     
@@ -150,6 +338,17 @@ class MCPHandler(http.server.BaseHTTPRequestHandler):
                 except Exception as e:
                     result_data = {'error': f'Deployment failed: {str(e)}'}
                     
+            elif method == 'cancel_command':
+                # job_id is the one the client passed to execute_command
+                job_id = params.get('job_id', '')
+                result_data = {'job_id': job_id, 'cancelled': command_runner.cancel(job_id)}
+
+            elif method == 'list_methods':
+                if if_none_match == REGISTRY_ETAG:
+                    result_data = {'not_modified': True, 'etag': REGISTRY_ETAG}
+                else:
+                    result_data = {'methods': METHOD_REGISTRY, 'etag': REGISTRY_ETAG}
+
             elif method == 'health_check':
                 result_data = {
                     'status': 'healthy',
@@ -157,7 +356,8 @@ class MCPHandler(http.server.BaseHTTPRequestHandler):
                     'services': {
                         'mcp_server': 'running',
                         'docker': 'available' if shutil.which('docker') else 'unavailable'
-                    }
+                    },
+                    'commands': command_runner.stats()
                 }
                 
             else:
@@ -169,48 +369,35 @@ class MCPHandler(http.server.BaseHTTPRequestHandler):
                 'result': result_data
             }
 
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
-            self._safe_write_response(json.dumps(response))
+            self._send_json(200, response, cors=True)
 
         except Exception as e:
             logger.error(f"Error processing request: {str(e)}")
             error_response = {
                 'jsonrpc': '2.0', 
-                'id': 1, 
+                'id': request.get('id') if isinstance(request, dict) else None, 
                 'error': {
                     'code': -32603, 
                     'message': str(e)
                 }
             }
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self._safe_write_response(json.dumps(error_response))
+            self._send_json(500, error_response)
 
     def do_GET(self):
         if self.path == '/':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
             health_info = {
                 'status': 'MCP Server Extended is running',
                 'version': '2.0',
                 'timestamp': time.time()
             }
-            self._safe_write_response(json.dumps(health_info))
+            self._send_json(200, health_info)
         else:
             self.send_error(404)
 
     def do_OPTIONS(self):
         self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self._send_cors_headers()
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
 def signal_handler(signum, frame):
@@ -240,7 +427,7 @@ def main():
 
     with ThreadedTCPServer(("", PORT), MCPHandler) as httpd:
         logger.info(f'MCP Server Extended running on port {PORT} (Multi-threaded)')
-        logger.info('Available methods: get_system_info, list_directory, execute_command, read_file, write_file, manage_service, deploy_application, health_check')
+        logger.info(f"Available methods: {', '.join(METHOD_REGISTRY)}, list_methods, cancel_command")
         
         try:
             httpd.serve_forever()
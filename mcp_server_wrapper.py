@@ -4,66 +4,1313 @@ MCP Server Wrapper - HTTP to STDIO Bridge
 Bridges HTTP MCP server to STDIO for Claude integration
 """
 
+import time
+
+# Measured from before the imports, for the startup latency report
+LAUNCHED = time.perf_counter()
+
+import os
 import sys
 import json
-import requests
+import posixpath
+import shlex
 import asyncio
+import hashlib
+import itertools
+import random
+import threading
 import traceback
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+# Configure logging (MCP_WRAPPER_LOG_LEVEL=DEBUG logs every request)
+logging.basicConfig(level=os.environ.get("MCP_WRAPPER_LOG_LEVEL", "INFO").upper(),
+                    format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class MCPServerWrapper:
-    def __init__(self, server_url: str = "http://192.168.111.200:8080"):
+# requests (with urllib3) is most of the wrapper's import time. It is
+# imported by the warm-up thread while the client is still initializing,
+# or by the first upstream call, whichever comes first.
+requests = None
+
+def _import_requests():
+    global requests
+    if requests is None:
+        import requests.adapters
+    return requests
+
+# Upstream calls handled concurrently; requests beyond this wait for a slot
+MAX_IN_FLIGHT = int(os.environ.get("MCP_WRAPPER_MAX_IN_FLIGHT", 8))
+
+# (connect, read) timeouts; the upstream allows commands up to 300s
+DEFAULT_TIMEOUT = (3.05, 30)
+UPSTREAM_TIMEOUTS = {
+    "execute_command": (3.05, 310),
+    "deploy_application": (3.05, 310),
+    "manage_service": (3.05, 60),
+    "health_check": (3.05, 5),
+    "get_system_info": (3.05, 10),
+    "cancel_command": (3.05, 5),
+}
+# Safe to repeat after a timeout or dropped connection
+IDEMPOTENT_METHODS = {"get_system_info", "list_directory", "read_file", "health_check", "list_methods",
+                      "cancel_command"}
+# Sent on their own connection so they never queue behind the calls they control
+CONTROL_METHODS = {"cancel_command"}
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 1.0
+RETRY_STATUS = {502, 503, 504}
+
+class LatencyStats:
+    """Per-method upstream latency: totals plus percentiles over recent calls"""
+
+    def __init__(self, window: int = 512):
+        self.window = window
+        self.lock = threading.Lock()
+        self.methods: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, method: str, seconds: float, ok: bool):
+        with self.lock:
+            entry = self.methods.get(method)
+            if entry is None:
+                entry = self.methods[method] = {
+                    "count": 0, "errors": 0, "total": 0.0, "max": 0.0,
+                    "recent": deque(maxlen=self.window)
+                }
+            entry["count"] += 1
+            entry["errors"] += 0 if ok else 1
+            entry["total"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+            entry["recent"].append(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            snapshot = {method: dict(entry, recent=sorted(entry["recent"]))
+                        for method, entry in self.methods.items()}
+        summary = {}
+        for method, entry in snapshot.items():
+            recent = entry["recent"]
+            summary[method] = {
+                "count": entry["count"],
+                "errors": entry["errors"],
+                "avg_ms": round(entry["total"] / entry["count"] * 1000, 1),
+                "p50_ms": round(recent[len(recent) // 2] * 1000, 1),
+                "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 1),
+                "max_ms": round(entry["max"] * 1000, 1)
+            }
+        return summary
+
+class CircuitBreaker:
+    """Fail fast while the upstream is down
+
+    closed: calls pass; failure_threshold consecutive transport failures open it.
+    open: calls are rejected without touching the network for reset_timeout.
+    half-open: one probe call is let through; success closes, failure re-opens.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0, name: str = "Upstream"):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def available(self) -> bool:
+        """allow() without side effects: False only while open and cooling down"""
+        return self.state != self.OPEN or self.retry_in() == 0
+
+    def record_success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                logger.info(f"{self.name} recovered; circuit closed")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"{self.name} failing ({self.failures} consecutive); "
+                                   f"circuit open for {self.reset_timeout:.0f}s")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+class UpstreamError(Exception):
+    """Transport-level failure talking to the upstream server"""
+
+def _never_sent(exc: Exception) -> bool:
+    """True when the request cannot have reached the server"""
+    from urllib3.exceptions import NewConnectionError
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, NewConnectionError)
+
+class UpstreamClient:
+    """JSON-RPC over HTTP to the upstream MCP server
+
+    Keep-alive connection pool, per-method (connect, read) timeouts, jittered
+    retries for idempotent methods and a circuit breaker. Non-idempotent
+    methods are only retried when the request never left this host.
+    """
+
+    def __init__(self, server_url: str, pool_size: int = MAX_IN_FLIGHT,
+                 breaker: Optional[CircuitBreaker] = None):
         self.server_url = server_url.rstrip('/')
-        self.session = requests.Session()
-        self.session.timeout = 30
-        
-    def send_http_request(self, method: str, params: Optional[Dict] = None) -> Dict[str, Any]:
-        """Send HTTP request to MCP server using JSON-RPC format"""
+        self.pool_size = pool_size
+        self._session = None
+        self._control_session = None
+        self.session_lock = threading.Lock()
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=int(os.environ.get("MCP_UPSTREAM_FAILURES", 5)),
+            reset_timeout=float(os.environ.get("MCP_UPSTREAM_RESET", 10)),
+            name=f"Upstream {self.server_url}"
+        )
+        self._request_ids = itertools.count(1)
+        self.stats = LatencyStats()
+        self.retries = 0
+        self.rejected = 0
+
+    def _open_sessions(self):
+        with self.session_lock:
+            if self._session is not None:
+                return
+            _import_requests()
+            session = requests.Session()
+            # The upstream is on the LAN; skip per-call proxy/.netrc lookups
+            session.trust_env = False
+            # One keep-alive connection per concurrent call; pool_block makes
+            # extra callers wait for a free connection instead of opening more
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                                                    pool_block=True)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            control_session = requests.Session()
+            control_session.trust_env = False
+            self._control_session = control_session
+            self._session = session
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._open_sessions()
+        return self._session
+
+    @property
+    def control_session(self):
+        if self._session is None:
+            self._open_sessions()
+        return self._control_session
+
+    def warm_up(self) -> bool:
+        """Open a keep-alive connection and check the server answers"""
+        started = time.perf_counter()
+        ok = False
         try:
-            payload = {
-                "jsonrpc": "2.0",
-                "method": method,
-                "params": params or {},
-                "id": 1
-            }
-            
-            response = self.session.post(
-                self.server_url,
-                json=payload,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if "result" in result:
-                    return {"result": result["result"]}
-                elif "error" in result:
-                    return {"error": result["error"]}
-                else:
-                    return {"result": result}
-            else:
-                return {"error": f"HTTP {response.status_code}: {response.text}"}
-                
+            response = self.session.get(self.server_url + "/", timeout=UPSTREAM_TIMEOUTS["health_check"])
+            ok = response.status_code == 200
+            response.content  # drain, so the connection goes back to the pool
+        except Exception as e:
+            logger.warning(f"Upstream {self.server_url} not reachable at startup: {e}")
+        elapsed = time.perf_counter() - started
+        self.stats.record("warm_up", elapsed, ok)
+        if ok:
+            self.breaker.record_success()
+            logger.info(f"Upstream {self.server_url} connected in {elapsed * 1000:.1f}ms")
+        return ok
+
+    def log_stats(self):
+        """Log per-method upstream latency (called at shutdown)"""
+        for method, stats in sorted(self.stats.summary().items()):
+            logger.info(f"Upstream {method}: {stats['count']} calls, {stats['errors']} errors, "
+                        f"avg {stats['avg_ms']}ms, p50 {stats['p50_ms']}ms, "
+                        f"p95 {stats['p95_ms']}ms, max {stats['max_ms']}ms")
+        logger.info(f"Upstream retries: {self.retries}, rejected by open circuit: {self.rejected}")
+
+    def _payload(self, method: str, params: Dict) -> Dict[str, Any]:
+        # itertools.count is atomic under the GIL, so ids stay unique across threads
+        return {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params,
+            "id": next(self._request_ids)
+        }
+
+    def _post(self, method: str, params: Dict, timeout) -> Dict[str, Any]:
+        """One HTTP attempt; raises UpstreamError on transport failures"""
+        payload = self._payload(method, params)
+        request_id = payload["id"]
+        session = self.control_session if method in CONTROL_METHODS else self.session
+        response = session.post(
+            self.server_url,
+            json=payload,
+            headers={"Content-Type": "application/json"},
+            timeout=timeout
+        )
+        if response.status_code in RETRY_STATUS:
+            raise UpstreamError(f"HTTP {response.status_code}: {response.text}")
+        if response.status_code != 200:
+            return {"error": f"HTTP {response.status_code}: {response.text}"}
+
+        result = response.json()
+        if isinstance(result, dict) and "id" in result and result["id"] != request_id:
+            logger.error(f"Upstream id mismatch for {method}: sent {request_id}, got {result['id']}")
+            return {"error": f"Upstream response id mismatch (sent {request_id}, got {result['id']})"}
+        if "result" in result:
+            return {"result": result["result"]}
+        elif "error" in result:
+            return {"error": result["error"]}
+        else:
+            return {"result": result}
+
+    def call(self, method: str, params: Optional[Dict] = None) -> Dict[str, Any]:
+        """Call an upstream method; returns {"result": ...} or {"error": ...}
+
+        Errors where the upstream could not be reached also carry
+        "unavailable": True.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            return {"error": f"Upstream unavailable (circuit open, retrying in "
+                             f"{self.breaker.retry_in():.1f}s): {self.server_url}", "unavailable": True}
+
+        timeout = UPSTREAM_TIMEOUTS.get(method, DEFAULT_TIMEOUT)
+        idempotent = method in IDEMPOTENT_METHODS
+        started = time.perf_counter()
+        ok = False
+        attempt = 0
+        try:
+            while True:
+                try:
+                    result = self._post(method, params or {}, timeout)
+                    self.breaker.record_success()
+                    ok = "result" in result
+                    return result
+                except (requests.exceptions.RequestException, UpstreamError) as e:
+                    retryable = idempotent or (isinstance(e, requests.exceptions.RequestException)
+                                               and _never_sent(e))
+                    attempt += 1
+                    if not retryable or attempt >= RETRY_ATTEMPTS or not self.breaker.allow():
+                        self.breaker.record_failure()
+                        logger.error(f"Request failed: {e}")
+                        return {"error": f"Connection error: {str(e)}", "unavailable": True}
+                    # Full jitter keeps concurrent retries from arriving together
+                    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+                    logger.warning(f"Upstream {method} failed ({e}); retry {attempt} in {delay * 1000:.0f}ms")
+                    self.retries += 1
+                    time.sleep(delay)
+        except Exception as e:
+            # Must settle the breaker: left HALF_OPEN it would reject every call
+            self.breaker.record_failure()
+            logger.error(f"Unexpected error: {e}")
+            return {"error": f"Unexpected error: {str(e)}"}
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stats.record(method, elapsed, ok)
+            logger.debug(f"Upstream {method}: {elapsed * 1000:.1f}ms")
+
+    def stream(self, method: str, params: Dict, on_record) -> Dict[str, Any]:
+        """Call a streaming method; on_record receives each output record and
+        the final {"result": ...} or {"error": ...} is returned. Not retried:
+        output may already have been delivered."""
+        if not self.breaker.allow():
+            self.rejected += 1
+            return {"error": f"Upstream unavailable (circuit open, retrying in "
+                             f"{self.breaker.retry_in():.1f}s): {self.server_url}", "unavailable": True}
+
+        payload = self._payload(method, params)
+        started = time.perf_counter()
+        ok = False
+        try:
+            with self.session.post(self.server_url, json=payload, stream=True,
+                                   timeout=UPSTREAM_TIMEOUTS.get(method, DEFAULT_TIMEOUT)) as response:
+                if response.status_code != 200:
+                    self.breaker.record_success()
+                    return {"error": f"HTTP {response.status_code}: {response.text}"}
+                final = None
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    record = json.loads(line)
+                    if record.get("type") == "result":
+                        final = record
+                    else:
+                        on_record(record)
+            self.breaker.record_success()
+            if final is None:
+                return {"error": "Upstream stream ended without a result"}
+            if final.get("id") != payload["id"]:
+                return {"error": f"Upstream response id mismatch (sent {payload['id']}, got {final.get('id')})"}
+            ok = True
+            return {"result": final.get("result")}
         except requests.exceptions.RequestException as e:
-            logger.error(f"Request failed: {e}")
+            self.breaker.record_failure()
+            logger.error(f"Streaming request failed: {e}")
             return {"error": f"Connection error: {str(e)}"}
         except Exception as e:
+            # Must settle the breaker: left HALF_OPEN it would reject every call
+            self.breaker.record_failure()
             logger.error(f"Unexpected error: {e}")
             return {"error": f"Unexpected error: {str(e)}"}
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stats.record(method, elapsed, ok)
+            logger.debug(f"Upstream {method} (streamed): {elapsed * 1000:.1f}ms")
+
+# Upstream hosts and routing. MCP_BACKENDS holds JSON (inline, or the path
+# of a file containing it); without it the wrapper talks to server_url only:
+#   {"backends": {"prod": "http://192.168.111.200:8080", "build": "http://..."},
+#    "routes": [{"tool": "deploy_application", "backend": "build"},
+#               {"path": "/var/log", "backend": ["prod", "build"]}],
+#    "fan_out": ["get_system_info", "health_check"]}
+# A route matches when all of its tool/path conditions do; the first match
+# wins and unmatched calls go to the first backend. A list of backends is a
+# replica group: idempotent calls go to the member with the fewest calls
+# outstanding, others to the first available member.
+FAN_OUT_METHODS = ("get_system_info", "health_check")
+ROUTED_PATH_PARAMS = ("path", "source_path")
+
+def load_backend_config(server_url: str) -> Dict[str, Any]:
+    raw = os.environ.get("MCP_BACKENDS", "").strip()
+    if not raw:
+        return {"backends": {"default": server_url}}
+    if not raw.startswith("{"):
+        with open(raw, encoding="utf-8") as f:
+            raw = f.read()
+    config = json.loads(raw)
+    if not config.get("backends"):
+        raise ValueError("MCP_BACKENDS: no backends configured")
+    return config
+
+def _under(path: str, prefix: str) -> bool:
+    path = posixpath.normpath(path)
+    prefix = posixpath.normpath(prefix)
+    return path == prefix or path.startswith(prefix.rstrip("/") + "/")
+
+class BackendPool:
+    """Routes upstream calls across one or more MCP servers
+
+    Each backend has its own UpstreamClient, so keep-alive pool, retries
+    and circuit breaker are per host. A backend whose breaker is open is
+    ejected from routing until its reset timeout lets a probe through.
+    With several backends, FAN_OUT methods called without a host run on
+    all of them concurrently and return {"hosts": {name: result}}.
+    """
+
+    def __init__(self, backends: Dict[str, str], routes=(), fan_out=FAN_OUT_METHODS,
+                 pool_size: int = MAX_IN_FLIGHT):
+        self.clients = {name: UpstreamClient(url, pool_size=pool_size) for name, url in backends.items()}
+        self.names = list(self.clients)
+        self.default = self.names[0]
+        self.routes = []
+        for rule in routes:
+            tools = rule.get("tool")
+            targets = rule["backend"]
+            targets = [targets] if isinstance(targets, str) else list(targets)
+            unknown = [name for name in targets if name not in self.clients]
+            if unknown:
+                raise ValueError(f"MCP_BACKENDS: route {rule} names unknown backend(s) {unknown}")
+            self.routes.append({
+                "tools": {tools} if isinstance(tools, str) else set(tools or ()),
+                "path": rule.get("path"),
+                "backends": targets
+            })
+        self.fan_out = set(fan_out) if len(self.clients) > 1 else set()
+        self.outstanding = dict.fromkeys(self.names, 0)
+        self.lock = threading.Lock()
+        self._turn = itertools.count()
+        self.executor = (ThreadPoolExecutor(max_workers=len(self.names), thread_name_prefix="mcp-fanout")
+                         if len(self.names) > 1 else None)
+        # Cancels get their own threads: queued behind fan-out or warm-up
+        # work they would arrive after the calls they are meant to stop
+        self.control_executor = (ThreadPoolExecutor(max_workers=len(self.names), thread_name_prefix="mcp-cancel")
+                                 if len(self.names) > 1 else None)
+
+    @classmethod
+    def from_config(cls, server_url: str, pool_size: int = MAX_IN_FLIGHT) -> "BackendPool":
+        config = load_backend_config(server_url)
+        return cls(config["backends"], config.get("routes", ()),
+                   config.get("fan_out", FAN_OUT_METHODS), pool_size)
+
+    def candidates(self, method: str, params: Dict[str, Any]) -> list:
+        paths = [params[key] for key in ROUTED_PATH_PARAMS if isinstance(params.get(key), str)]
+        for rule in self.routes:
+            if rule["tools"] and method not in rule["tools"]:
+                continue
+            if rule["path"] and not any(_under(path, rule["path"]) for path in paths):
+                continue
+            return rule["backends"]
+        return [self.default]
+
+    def order(self, method: str, params: Dict[str, Any], host: Optional[str] = None) -> list:
+        """Backends to try for one call, best first; later ones are only
+        used when an idempotent call finds the earlier ones unreachable.
+        Raises ValueError for an unknown host."""
+        if host:
+            if host not in self.clients:
+                raise ValueError(f"Unknown host {host!r} (configured: {', '.join(self.names)})")
+            return [host]
+        group = self.candidates(method, params)
+        # Every member ejected: try them anyway, the breaker answers fast
+        healthy = [name for name in group if self.clients[name].breaker.available()] or group
+        if len(healthy) == 1 or method not in IDEMPOTENT_METHODS:
+            return healthy[:1]
+        # Least outstanding; rotating the start breaks ties round-robin
+        start = next(self._turn) % len(healthy)
+        rotated = healthy[start:] + healthy[:start]
+        with self.lock:
+            return sorted(rotated, key=self.outstanding.__getitem__)
+
+    def pick(self, method: str, params: Dict[str, Any], host: Optional[str] = None) -> str:
+        return self.order(method, params, host)[0]
+
+    def _track(self, name: str, delta: int):
+        with self.lock:
+            self.outstanding[name] += delta
+
+    def call(self, method: str, params: Optional[Dict] = None, host: Optional[str] = None) -> Dict[str, Any]:
+        params = params or {}
+        if not host and method in self.fan_out:
+            return self.call_all(method, params)
+        try:
+            names = self.order(method, params, host)
+        except ValueError as e:
+            return {"error": str(e)}
+        for name in names:
+            self._track(name, 1)
+            try:
+                result = self.clients[name].call(method, params)
+            finally:
+                self._track(name, -1)
+            if not result.get("unavailable"):
+                break
+            if name != names[-1]:
+                logger.warning(f"Backend {name} unavailable for {method}; failing over")
+        return result
+
+    def stream(self, method: str, params: Dict, on_record, host: Optional[str] = None) -> Dict[str, Any]:
+        try:
+            name = self.pick(method, params, host)
+        except ValueError as e:
+            return {"error": str(e)}
+        self._track(name, 1)
+        try:
+            return self.clients[name].stream(method, params, on_record)
+        finally:
+            self._track(name, -1)
+
+    def call_all(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Run method on every backend concurrently and merge the results"""
+        futures = {name: self.executor.submit(self.call, method, params, name) for name in self.names}
+        hosts = {}
+        for name, future in futures.items():
+            result = future.result()
+            hosts[name] = result["result"] if "result" in result else {"error": result.get("error")}
+        failed = sum(1 for data in hosts.values() if isinstance(data, dict) and "error" in data)
+        if failed == len(hosts):
+            return {"error": f"{method} failed on all hosts: "
+                             + "; ".join(f"{name}: {data['error']}" for name, data in hosts.items())}
+        return {"result": {"hosts": hosts, "ok": len(hosts) - failed, "failed": failed}}
+
+    def cancel(self, job_id: str) -> bool:
+        """cancel_command on every backend (job ids are unique); True if one
+        of them was running the job"""
+        if self.control_executor is None:
+            results = [self.clients[self.default].call("cancel_command", {"job_id": job_id})]
+        else:
+            results = list(self.control_executor.map(
+                lambda client: client.call("cancel_command", {"job_id": job_id}), self.clients.values()))
+        return any(isinstance(r.get("result"), dict) and r["result"].get("cancelled") for r in results)
+
+    def log_stats(self):
+        """Per-backend upstream stats (called at shutdown)"""
+        for name, client in self.clients.items():
+            if len(self.clients) > 1:
+                logger.info(f"Backend {name} ({client.server_url}), breaker {client.breaker.state}:")
+            client.log_stats()
+
+# Tool definitions used until the upstream answers list_methods (or when it
+# predates it); same shape as METHOD_REGISTRY in the upstream server
+STATIC_REGISTRY = {
+    "execute_command": {
+        "description": "Execute shell commands on remote server",
+        "params": {
+            "command": {"type": "string", "description": "Command to execute", "required": True}
+        }
+    },
+    "read_file": {
+        "description": "Read file contents from remote server",
+        "params": {
+            "path": {"type": "string", "description": "File path to read", "required": True}
+        },
+        "read_only": True
+    },
+    "write_file": {
+        "description": "Write file contents to remote server",
+        "params": {
+            "path": {"type": "string", "description": "File path to write", "required": True},
+            "content": {"type": "string", "description": "Content to write", "required": True}
+        }
+    },
+    "list_directory": {
+        "description": "List directory contents on remote server",
+        "params": {
+            "path": {"type": "string", "description": "Directory path to list", "required": True}
+        },
+        "read_only": True
+    },
+    "get_system_info": {
+        "description": "Get system information from remote server",
+        "params": {},
+        "read_only": True
+    },
+    "manage_service": {
+        "description": "Manage services on remote server",
+        "params": {
+            "service": {"type": "string", "description": "Service name", "required": True},
+            "action": {"type": "string", "description": "Action to perform (start/stop/restart/status)", "required": True}
+        }
+    }
+}
+
+# How long a discovered catalog is trusted before revalidating it upstream
+CATALOG_TTL = float(os.environ.get("MCP_CATALOG_TTL", 300))
+# Retry delay after a failed discovery (upstream down or without list_methods)
+CATALOG_RETRY = 30.0
+
+def tool_schema(name: str, spec: Dict[str, Any], cached: bool = False, hosts=(),
+                fan_out: bool = False) -> Dict[str, Any]:
+    """MCP tool definition for one registry entry"""
+    properties = {}
+    required = []
+    for param, definition in spec.get("params", {}).items():
+        properties[param] = {k: v for k, v in definition.items() if k != "required"}
+        if definition.get("required"):
+            required.append(param)
+    if cached:
+        properties["cache"] = {
+            "type": "string",
+            "enum": ["bypass"],
+            "description": "Set to \"bypass\" to skip the wrapper's result cache"
+        }
+    if hosts:
+        properties["host"] = {
+            "type": "string",
+            "enum": list(hosts),
+            "description": ("Host to query (default: all hosts, results merged)" if fan_out
+                            else "Host to run on (default: chosen by routing rules)")
+        }
+    schema = {"type": "object", "properties": properties}
+    if required:
+        schema["required"] = required
+    schema["additionalProperties"] = False
+    return {"name": name, "description": spec.get("description", ""), "inputSchema": schema}
+
+def prompt_schema(name: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """MCP prompt definition for one registry entry"""
+    return {
+        "name": name,
+        "description": spec.get("description", ""),
+        "arguments": [
+            {
+                "name": param,
+                "description": definition.get("description", ""),
+                "required": bool(definition.get("required"))
+            }
+            for param, definition in spec.get("params", {}).items()
+        ]
+    }
+
+class ToolCatalog:
+    """Tool and prompt schemas generated from the upstream method registry
+
+    Discovery uses list_methods with the cached etag, so revalidating an
+    unchanged registry costs one small round trip. on_change is called
+    when the tool set changes after the client has already listed it.
+    """
+
+    def __init__(self, ttl: float = CATALOG_TTL, cached_tools=(), hosts=(), fan_out=()):
+        self.ttl = ttl
+        self.cached_tools = set(cached_tools)
+        # Backend names offered as the host argument when there are several
+        self.hosts = list(hosts) if len(hosts) > 1 else []
+        self.fan_out = set(fan_out)
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.on_change = None
+        self.source = "static"
+        self.etag = None
+        self.digest = None
+        self.served = False
+        self.next_refresh = 0.0
+        self._build(STATIC_REGISTRY)
+
+    def _build(self, registry: Dict[str, Dict]) -> bool:
+        tools = [tool_schema(name, spec, spec.get("read_only", False) and name in self.cached_tools,
+                             self.hosts, name in self.fan_out)
+                 for name, spec in registry.items()]
+        tools += [tool_schema(name, spec) for name, spec in WRAPPER_TOOLS.items() if name not in registry]
+        digest = hashlib.sha1(json.dumps(tools, sort_keys=True).encode("utf-8")).hexdigest()
+        changed = digest != self.digest
+        self.registry = registry
+        self.tools = tools
+        self.prompts = {name: prompt_schema(name, spec) for name, spec in registry.items()}
+        self.digest = digest
+        return changed
+
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() >= self.next_refresh
+
+    def refresh(self, upstream: "UpstreamClient") -> bool:
+        """Revalidate against the upstream registry; True if the tool set changed"""
+        if not self.refresh_lock.acquire(blocking=False):
+            return False  # another thread is already refreshing
+        try:
+            response = upstream.call("list_methods", {"if_none_match": self.etag} if self.etag else {})
+            result = response.get("result")
+            if isinstance(result, dict) and result.get("not_modified"):
+                self.next_refresh = time.monotonic() + self.ttl
+                return False
+            methods = result.get("methods") if isinstance(result, dict) else None
+            if not isinstance(methods, dict):
+                error = response.get("error") or (result or {}).get("error")
+                logger.warning(f"Tool discovery failed, serving {self.source} catalog: {error}")
+                self.next_refresh = time.monotonic() + min(self.ttl, CATALOG_RETRY)
+                return False
+
+            with self.lock:
+                changed = self._build(methods)
+                self.etag = result.get("etag")
+                self.source = "upstream"
+                notify = changed and self.served
+            self.next_refresh = time.monotonic() + self.ttl
+            if changed:
+                logger.info(f"Discovered {len(methods)} upstream tools (etag {self.etag})")
+            if notify and self.on_change:
+                self.on_change()
+            return changed
+        finally:
+            self.refresh_lock.release()
+
+    def list_tools(self) -> list:
+        with self.lock:
+            self.served = True
+            return list(self.tools)
+
+    def list_prompts(self) -> list:
+        with self.lock:
+            self.served = True
+            return list(self.prompts.values())
+
+    def get_prompt(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.prompts.get(name)
+
+    def has_tool(self, name: str) -> bool:
+        return name in self.registry
+
+    def streams(self, name: str) -> bool:
+        """True when the upstream can stream this method's output"""
+        return bool(self.registry.get(name, {}).get("streaming"))
+
+    def cancellable(self, name: str) -> bool:
+        """True when the upstream can cancel this method by job id"""
+        return bool(self.registry.get(name, {}).get("cancellable"))
+
+    def upstream_params(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Arguments declared by the tool's schema; unknown tools pass everything"""
+        spec = self.registry.get(name)
+        if spec is None:
+            return arguments
+        declared = spec.get("params", {})
+        return {key: value for key, value in arguments.items() if key in declared}
+
+# Read-through cache for read-only tools: seconds a result is served without
+# asking upstream; after that it is revalidated with the result's etag
+CACHE_ENABLED = os.environ.get("MCP_RESULT_CACHE", "1") != "0"
+CACHE_TTLS = {"get_system_info": 300, "list_directory": 5, "read_file": 10}
+CACHE_MAX_ENTRIES = int(os.environ.get("MCP_CACHE_MAX_ENTRIES", 256))
+CACHE_MAX_BYTES = int(os.environ.get("MCP_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+# Working directory of upstream execute_command; relative paths resolve here
+UPSTREAM_CWD = "/var/deployment"
+
+def _paths_overlap(a: str, b: str) -> bool:
+    """True when one path is the other or one of its ancestors"""
+    if a == b:
+        return True
+    shorter, longer = (a, b) if len(a) < len(b) else (b, a)
+    return longer.startswith(shorter.rstrip("/") + "/")
+
+def _normalize(path: str) -> str:
+    return posixpath.normpath(posixpath.join(UPSTREAM_CWD, path))
+
+def _file_path(path: Optional[str]) -> Optional[str]:
+    """Normalized absolute path of a file tool argument, None if relative
+    (file tools resolve those against the server's own cwd, not UPSTREAM_CWD)"""
+    if path and path.startswith("/"):
+        return posixpath.normpath(path)
+    return None
+
+def command_paths(command: str) -> list:
+    """Paths a shell command may modify: its working directory plus every
+    path-like token. Deliberately broad; a spurious invalidation only costs
+    one extra upstream read."""
+    try:
+        tokens = shlex.split(command)
+    except ValueError:
+        tokens = command.split()
+    paths = [UPSTREAM_CWD]
+    for token in tokens:
+        value = token.split("=", 1)[1] if token.startswith("-") and "=" in token else token
+        if "/" in value:
+            paths.append(_normalize(value))
+    return paths
+
+class CacheEntry:
+    __slots__ = ("result", "expires", "etag", "path", "size")
+
+    def __init__(self, result, expires, etag, path, size):
+        self.result = result
+        self.expires = expires
+        self.etag = etag
+        self.path = path
+        self.size = size
+
+class ResultCache:
+    """Size-bounded LRU of read-only tool results
+
+    Fresh entries are returned without touching the network. Expired ones
+    are revalidated with params.if_none_match, so an unchanged file costs a
+    stat on the server rather than a full transfer. Writes made through
+    this wrapper invalidate every entry on an overlapping path.
+    """
+
+    def __init__(self, ttls: Dict[str, float] = CACHE_TTLS, max_entries: int = CACHE_MAX_ENTRIES,
+                 max_bytes: int = CACHE_MAX_BYTES):
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.bytes = 0
+        # Bumped on every invalidation; a read that started before one
+        # must not store its (possibly stale) result
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.stats = {tool: {"hits": 0, "revalidated": 0, "misses": 0, "bypassed": 0} for tool in ttls}
+
+    def cacheable(self, tool: str) -> bool:
+        return tool in self.ttls
+
+    @staticmethod
+    def key(tool: str, params: Dict[str, Any], scope: str = "") -> str:
+        return scope + "\0" + tool + "\0" + json.dumps(params, sort_keys=True)
+
+    def fetch(self, tool: str, params: Dict[str, Any], send, bypass: bool = False,
+              scope: str = "") -> Dict[str, Any]:
+        """Return a cached result or fetch it with send(tool, params);
+        scope separates results fetched from different hosts"""
+        key = self.key(tool, params, scope)
+        generation = self.generation
+        etag = None
+        if not bypass:
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None:
+                    self.entries.move_to_end(key)
+                    if entry.expires > time.monotonic():
+                        self.stats[tool]["hits"] += 1
+                        return entry.result
+                    etag = entry.etag
+
+        if etag:
+            result = send(tool, dict(params, if_none_match=etag))
+            data = result.get("result")
+            if isinstance(data, dict) and data.get("not_modified"):
+                with self.lock:
+                    entry = self.entries.get(key)
+                    if entry is not None and self.generation == generation:
+                        entry.expires = time.monotonic() + self.ttls[tool]
+                        self.stats[tool]["revalidated"] += 1
+                        return entry.result
+                # Evicted or invalidated meanwhile; fetch the full result
+                result = send(tool, params)
+        else:
+            result = send(tool, params)
+
+        self.stats[tool]["bypassed" if bypass else "misses"] += 1
+        data = result.get("result")
+        if isinstance(data, dict) and "error" not in data:
+            self._store(key, tool, params, result, generation)
+        return result
+
+    def _store(self, key: str, tool: str, params: Dict[str, Any], result: Dict[str, Any], generation: int):
+        size = len(json.dumps(result))
+        if size > self.max_bytes:
+            return
+        path = params.get("path")
+        if path is not None and _file_path(path) is None:
+            return  # relative: a write could not be matched against it
+        entry = CacheEntry(result, time.monotonic() + self.ttls[tool], result["result"].get("etag"),
+                           _file_path(path), size)
+        with self.lock:
+            if self.generation != generation:
+                return
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.size
+            self.entries[key] = entry
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= evicted.size
+
+    def invalidate(self, paths: list):
+        """Drop entries whose path overlaps any of the given absolute paths"""
+        with self.lock:
+            self.generation += 1
+            stale = [key for key, entry in self.entries.items()
+                     if entry.path and any(_paths_overlap(entry.path, p) for p in paths)]
+            for key in stale:
+                self.bytes -= self.entries.pop(key).size
+        if stale:
+            logger.debug(f"Cache invalidated {len(stale)} entries for {paths}")
+
+    def invalidate_for(self, tool: str, params: Dict[str, Any]):
+        """Invalidate whatever a mutating tool call may have changed"""
+        if tool == "write_file":
+            path = params.get("path")
+            # A relative path could be anywhere; drop every path entry
+            self.invalidate([_file_path(path) or "/"])
+        elif tool == "execute_command":
+            self.invalidate(command_paths(params.get("command", "")))
+        elif tool == "deploy_application":
+            self.invalidate([_normalize(params.get("app_name", ""))])
+
+    def log_stats(self):
+        """Log per-tool hit ratios (called at shutdown)"""
+        for tool, stats in sorted(self.stats.items()):
+            lookups = sum(stats.values())
+            if not lookups:
+                continue
+            served = stats["hits"] + stats["revalidated"]
+            logger.info(f"Cache {tool}: {served}/{lookups} served from cache ({served / lookups:.0%}; "
+                        f"{stats['hits']} fresh, {stats['revalidated']} revalidated), "
+                        f"{stats['misses']} misses, {stats['bypassed']} bypassed")
+        logger.info(f"Cache size: {len(self.entries)} entries, {self.bytes} bytes")
+
+# Streamed tool calls: bytes of each output stream kept for the final
+# result, and how output chunks are batched into notifications/progress
+STREAM_TAIL_BYTES = int(os.environ.get("MCP_STREAM_TAIL_BYTES", 4096))
+PROGRESS_INTERVAL = 0.1
+PROGRESS_MAX_CHARS = 8192
+
+class ProgressReporter:
+    """Batches streamed output into notifications/progress for one call
+
+    progress is the number of output characters sent so far; message holds
+    the new output. A chunk is held back at most PROGRESS_INTERVAL seconds.
+    """
+
+    def __init__(self, notify, token):
+        self.notify = notify
+        self.token = token
+        self.lock = threading.Lock()
+        self.pending = []
+        self.pending_chars = 0
+        self.total = 0
+        self.last_sent = 0.0
+        self.timer = None
+
+    def output(self, record: Dict[str, Any]):
+        data = record.get("data")
+        if not data:
+            return
+        with self.lock:
+            self.pending.append(data)
+            self.pending_chars += len(data)
+            self.total += len(data)
+            due = (self.pending_chars >= PROGRESS_MAX_CHARS
+                   or time.monotonic() - self.last_sent >= PROGRESS_INTERVAL)
+            if not due and self.timer is None:
+                self.timer = threading.Timer(PROGRESS_INTERVAL, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.pending:
+                return
+            message = "".join(self.pending)
+            self.pending = []
+            self.pending_chars = 0
+            self.last_sent = time.monotonic()
+            # Sent under the lock so notifications keep their order
+            self.notify({
+                "jsonrpc": "2.0",
+                "method": "notifications/progress",
+                "params": {"progressToken": self.token, "progress": self.total, "message": message}
+            })
+
+# Tool results longer than RESULT_MAX_CHARS are replaced by a head/tail
+# preview and a handle; the full text stays in a bounded wrapper-side spool
+# and is paged with the fetch_result_page tool
+RESULT_MAX_CHARS = int(os.environ.get("MCP_RESULT_MAX_CHARS", 64 * 1024))
+RESULT_PREVIEW_HEAD = 6000
+RESULT_PREVIEW_TAIL = 2000
+SPOOL_MAX_CHARS = int(os.environ.get("MCP_SPOOL_MAX_CHARS", 32 * 1024 * 1024))
+SPOOL_MAX_ENTRIES = 64
+SPOOL_TTL = 1800.0
+
+# Tools answered by the wrapper itself, listed after the upstream ones
+WRAPPER_TOOLS = {
+    "fetch_result_page": {
+        "description": "Fetch more of a truncated tool result by its handle",
+        "params": {
+            "handle": {"type": "string", "description": "Handle from the truncated result", "required": True},
+            "offset": {"type": "integer", "description": "Character offset to start at (default 0)"},
+            "limit": {"type": "integer",
+                      "description": f"Maximum characters to return (default and maximum {RESULT_MAX_CHARS})"}
+        }
+    }
+}
+
+def _line_end(text: str, start: int, end: int) -> int:
+    """end moved back to just after a newline in the second half of
+    text[start:end], so pages and previews break between lines"""
+    if end >= len(text):
+        return len(text)
+    newline = text.rfind("\n", start + (end - start) // 2, end)
+    return newline + 1 if newline >= 0 else end
+
+class ResultSpool:
+    """Bounded LRU of oversized tool results, addressed by content hash
+
+    The same result spooled twice (a repeated read_file) keeps one copy and
+    one handle. Entries expire after ttl seconds of not being read.
+    """
+
+    def __init__(self, max_chars: int = SPOOL_MAX_CHARS, max_entries: int = SPOOL_MAX_ENTRIES,
+                 ttl: float = SPOOL_TTL):
+        self.max_chars = max_chars
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, list]" = OrderedDict()  # handle -> [text, expires]
+        self.chars = 0
+        self.lock = threading.Lock()
+        self.stats = {"spooled": 0, "pages": 0, "expired": 0}
+
+    def put(self, text: str) -> Optional[str]:
+        """Spool text and return its handle; None if it can never fit"""
+        if len(text) > self.max_chars:
+            return None
+        handle = "r-" + hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()[:16]
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(handle)
+            if entry is not None:
+                entry[1] = now + self.ttl
+                self.entries.move_to_end(handle)
+                return handle
+            self.entries[handle] = [text, now + self.ttl]
+            self.chars += len(text)
+            self.stats["spooled"] += 1
+            # Oldest first: expired entries and whatever exceeds the bounds
+            while self.entries:
+                oldest, (old_text, expires) = next(iter(self.entries.items()))
+                if oldest == handle or (expires > now and len(self.entries) <= self.max_entries
+                                        and self.chars <= self.max_chars):
+                    break
+                del self.entries[oldest]
+                self.chars -= len(old_text)
+        return handle
+
+    def get(self, handle: str) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(handle)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self.entries[handle]
+                self.chars -= len(entry[0])
+                self.stats["expired"] += 1
+                return None
+            entry[1] = time.monotonic() + self.ttl
+            self.entries.move_to_end(handle)
+            return entry[0]
+
+    def preview(self, text: str) -> str:
+        """Head and tail of text with a note on how to page through the rest"""
+        handle = self.put(text)
+        head_end = _line_end(text, 0, RESULT_PREVIEW_HEAD)
+        tail_start = max(head_end, len(text) - RESULT_PREVIEW_TAIL)
+        newline = text.find("\n", tail_start, tail_start + RESULT_PREVIEW_TAIL // 2)
+        if newline >= 0:
+            tail_start = newline + 1
+        omitted = tail_start - head_end
+        if handle:
+            note = (f"[... {omitted} characters omitted; the result is {len(text)} characters. "
+                    f"Page through it with fetch_result_page(handle=\"{handle}\", offset={head_end}) ...]")
+        else:
+            note = (f"[... {omitted} characters omitted; the result is {len(text)} characters, "
+                    f"too large to keep for paging. Narrow the request to see the rest ...]")
+        return f"{text[:head_end]}\n{note}\n{text[tail_start:]}"
+
+    def page(self, handle: str, offset: int = 0, limit: int = RESULT_MAX_CHARS) -> str:
+        text = self.get(handle)
+        if text is None:
+            return f"❌ Error: Unknown or expired result handle {handle!r}; re-run the original call"
+        offset = min(max(0, int(offset)), len(text))
+        limit = min(max(1, int(limit)), RESULT_MAX_CHARS)
+        end = _line_end(text, offset, offset + limit)
+        self.stats["pages"] += 1
+        if end < len(text):
+            footer = (f"[characters {offset}-{end} of {len(text)}; continue with "
+                      f"fetch_result_page(handle=\"{handle}\", offset={end})]")
+        else:
+            footer = f"[characters {offset}-{end} of {len(text)}; end of result]"
+        return f"{text[offset:end]}\n{footer}"
+
+    def log_stats(self):
+        """Log spool usage (called at shutdown)"""
+        logger.info(f"Result spool: {self.stats['spooled']} results spooled, {self.stats['pages']} pages "
+                    f"served, {self.stats['expired']} expired; holding {len(self.entries)} "
+                    f"({self.chars} characters)")
+
+class CallState:
+    """A client request between dispatch and response
+
+    job_id is set when the request started a cancellable upstream job.
+    """
+    __slots__ = ("job_id", "cancelled")
+
+    def __init__(self):
+        self.job_id = None
+        self.cancelled = False
+
+class MCPServerWrapper:
+    def __init__(self, server_url: str = "http://192.168.111.200:8080", pool_size: int = MAX_IN_FLIGHT):
+        self.server_url = server_url.rstrip('/')
+        self.backends = BackendPool.from_config(self.server_url, pool_size=pool_size)
+        # Tools are discovered from the first backend; hosts are expected
+        # to run the same server version
+        self.upstream = self.backends.clients[self.backends.default]
+        self.cache = ResultCache() if CACHE_ENABLED else None
+        self.catalog = ToolCatalog(cached_tools=self.cache.ttls if self.cache else (),
+                                   hosts=self.backends.names, fan_out=self.backends.fan_out)
+        # Writes a JSON-RPC notification to the client; set by StdioServer
+        self.notify = None
+        self.spool = ResultSpool()
+        # In-flight requests by client request id, for notifications/cancelled
+        self.calls: Dict[Any, CallState] = {}
+        self.calls_lock = threading.Lock()
+        self.cancel_stats = {"queued": 0, "killed_upstream": 0, "finished_upstream": 0,
+                             "local": 0, "unknown": 0}
+
+    def log_stats(self):
+        """Log upstream latency, cache hit ratios and cancellations (called at shutdown)"""
+        self.backends.log_stats()
+        if self.cache:
+            self.cache.log_stats()
+        self.spool.log_stats()
+        stats = self.cancel_stats
+        logger.info(f"Cancellations: {stats['queued']} dropped before start, "
+                    f"{stats['killed_upstream']} killed upstream, "
+                    f"{stats['finished_upstream']} already finished upstream, "
+                    f"{stats['local']} without an upstream job, {stats['unknown']} for unknown ids")
+
+    def begin_call(self, request_id):
+        with self.calls_lock:
+            self.calls[request_id] = CallState()
+
+    def end_call(self, request_id):
+        with self.calls_lock:
+            self.calls.pop(request_id, None)
+
+    def cancelled(self, request_id) -> bool:
+        with self.calls_lock:
+            call = self.calls.get(request_id)
+            return call is not None and call.cancelled
+
+    def start_job(self, request_id) -> Optional[str]:
+        """Job id for the upstream call made by this request. Check
+        cancelled() afterwards: a cancel that arrived before this point
+        had no job to stop."""
+        with self.calls_lock:
+            call = self.calls.get(request_id)
+            if call is None:
+                return None
+            call.job_id = uuid.uuid4().hex
+            return call.job_id
+
+    def cancel_call(self, request_id, reason: Optional[str] = None, queued: bool = False):
+        """Handle notifications/cancelled: the response will be dropped and
+        a running upstream job is killed. Blocks on the upstream call."""
+        with self.calls_lock:
+            call = self.calls.get(request_id)
+            if call is None:
+                # Already answered, or an id this wrapper never saw
+                self.cancel_stats["unknown"] += 1
+                return
+            call.cancelled = True
+            job_id = call.job_id
+        logger.info(f"Request {request_id} cancelled by client" + (f": {reason}" if reason else ""))
+        if queued:
+            self.cancel_stats["queued"] += 1
+        elif job_id is None:
+            self.cancel_stats["local"] += 1
+        else:
+            if self.backends.cancel(job_id):
+                self.cancel_stats["killed_upstream"] += 1
+            else:
+                # Finished already, or the cancel overtook the command and
+                # the upstream applies it when the job starts
+                self.cancel_stats["finished_upstream"] += 1
+        
+    def warm_up(self):
+        """Import requests and connect to every backend; run in the background
+        at startup so the first tool call finds a live connection"""
+        started = time.perf_counter()
+        _import_requests()
+        logger.debug(f"requests imported in {(time.perf_counter() - started) * 1000:.1f}ms")
+        clients = list(self.backends.clients.values())
+        if self.backends.executor is None:
+            clients[0].warm_up()
+        else:
+            list(self.backends.executor.map(UpstreamClient.warm_up, clients))
+
+    def send_http_request(self, method: str, params: Optional[Dict] = None,
+                          host: Optional[str] = None) -> Dict[str, Any]:
+        """Send HTTP request to MCP server using JSON-RPC format"""
+        return self.backends.call(method, params, host)
     
+    def call_tool(self, name: str, arguments: Optional[Dict] = None, job_id: Optional[str] = None) -> Dict[str, Any]:
+        """Forward a tool call upstream with the arguments its schema declares"""
+        arguments = arguments or {}
+        params = self.catalog.upstream_params(name, arguments)
+        host = arguments.get("host")
+        if job_id:
+            params = dict(params, job_id=job_id)
+        if self.cache is None:
+            return self.send_http_request(name, params, host)
+        if self.cache.cacheable(name):
+            return self.cache.fetch(name, params, lambda tool, p: self.send_http_request(tool, p, host),
+                                    bypass=arguments.get("cache") == "bypass", scope=host or "")
+        result = self.send_http_request(name, params, host)
+        self.cache.invalidate_for(name, params)
+        return result
+
+    def stream_tool(self, name: str, arguments: Dict[str, Any], progress_token,
+                    job_id: Optional[str] = None) -> str:
+        """Run a streaming tool, relaying its output as progress notifications;
+        returns the final text (summary and output tail only)"""
+        params = dict(self.catalog.upstream_params(name, arguments), stream=True, tail_bytes=STREAM_TAIL_BYTES)
+        if job_id:
+            params["job_id"] = job_id
+        progress = ProgressReporter(self.notify, progress_token)
+        result = self.backends.stream(name, params, progress.output, arguments.get("host"))
+        progress.flush()
+        if self.cache:
+            self.cache.invalidate_for(name, params)
+        return self.format_stream_result(result)
+
+    @staticmethod
+    def format_stream_result(result: Dict[str, Any]) -> str:
+        """Summary line plus the tail of each stream; the full output has
+        already reached the client as progress notifications"""
+        if "error" in result:
+            return f"❌ Error: {result['error']}"
+        data = result["result"]
+        if not isinstance(data, dict) or "returncode" not in data:
+            return str(data)
+        usage = data.get("resources") or {}
+        lines = [
+            f"exit code {data['returncode']} | stdout {data.get('stdout_bytes', 0)} bytes, "
+            f"stderr {data.get('stderr_bytes', 0)} bytes (streamed as progress) | "
+            f"wall {usage.get('wall_time')}s, cpu {usage.get('cpu_time')}s, "
+            f"peak RSS {usage.get('peak_rss_kb')} KB"
+        ]
+        if data.get("error"):
+            lines.append(f"❌ Error: {data['error']}")
+        for stream in ("stdout", "stderr"):
+            text = data.get(stream)
+            if not text:
+                continue
+            if data.get(f"{stream}_bytes", 0) > len(text.encode("utf-8")):
+                lines.append(f"--- {stream} (last {STREAM_TAIL_BYTES} bytes) ---")
+            else:
+                lines.append(f"--- {stream} ---")
+            lines.append(text.rstrip("\n"))
+        return "\n".join(lines)
+
+    @staticmethod
+    def format_result(result: Any) -> str:
+        """Render an upstream result as the text shown to the MCP client"""
+        if isinstance(result, dict) and "result" in result:
+            result_data = result["result"]
+            if isinstance(result_data, dict):
+                return json.dumps(result_data, indent=2, ensure_ascii=False)
+            return str(result_data)
+        elif isinstance(result, dict) and "error" in result:
+            return f"❌ Error: {result['error']}"
+        return str(result)
+
+    def present(self, text: str) -> str:
+        """Text for the client; oversized results become a spooled preview"""
+        if len(text) <= RESULT_MAX_CHARS:
+            return text
+        return self.spool.preview(text)
+
+    def call_wrapper_tool(self, name: str, arguments: Dict[str, Any]) -> str:
+        """Tools in WRAPPER_TOOLS, answered without going upstream"""
+        if name == "fetch_result_page":
+            try:
+                return self.spool.page(arguments.get("handle", ""), arguments.get("offset", 0),
+                                       arguments.get("limit", RESULT_MAX_CHARS))
+            except (TypeError, ValueError) as e:
+                return f"❌ Error: Invalid fetch_result_page arguments: {e}"
+        return f"❌ Error: Unknown tool: {name}"
+
+    def refresh_catalog_async(self):
+        """Revalidate a stale catalog without delaying the current response"""
+        threading.Thread(target=self.catalog.refresh, args=(self.upstream,),
+                         name="mcp-discovery", daemon=True).start()
+
     def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """Handle MCP request and convert to HTTP call"""
         method = request.get("method")
         params = request.get("params", {})
         request_id = request.get("id", 1)
-        
-        logger.debug(f"Handling request: {method} with params: {params}")
-        
+
+        if logger.isEnabledFor(logging.DEBUG):
+            # params can hold a whole write_file payload; only format it when logged
+            logger.debug(f"Handling request: {method} with params: {params}")
+
         # Map MCP methods to HTTP endpoints
         if method == "initialize":
             return {
@@ -88,202 +1335,48 @@ class MCPServerWrapper:
                     }
                 }
             }
+        elif method == "ping":
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "result": {}
+            }
         elif method == "tools/list":
-            # Return available tools based on actual remote server capabilities
+            # Served from the discovered catalog; a stale one is revalidated
+            # in the background and list_changed follows if it differs
+            if self.catalog.stale:
+                self.refresh_catalog_async()
             return {
-                "jsonrpc": "2.0", 
+                "jsonrpc": "2.0",
                 "id": request_id,
                 "result": {
-                    "tools": [
-                        {
-                            "name": "execute_command",
-                            "description": "Execute shell commands on remote server",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "command": {"type": "string", "description": "Command to execute"}
-                                },
-                                "required": ["command"],
-                                "additionalProperties": False
-                            }
-                        },
-                        {
-                            "name": "read_file",
-                            "description": "Read file contents from remote server",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "path": {"type": "string", "description": "File path to read"}
-                                },
-                                "required": ["path"],
-                                "additionalProperties": False
-                            }
-                        },
-                        {
-                            "name": "write_file",
-                            "description": "Write file contents to remote server",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "path": {"type": "string", "description": "File path to write"},
-                                    "content": {"type": "string", "description": "Content to write"}
-                                },
-                                "required": ["path", "content"],
-                                "additionalProperties": False
-                            }
-                        },
-                        {
-                            "name": "list_directory",
-                            "description": "List directory contents on remote server",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "path": {"type": "string", "description": "Directory path to list"}
-                                },
-                                "required": ["path"],
-                                "additionalProperties": False
-                            }
-                        },
-                        {
-                            "name": "get_system_info",
-                            "description": "Get system information from remote server",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {},
-                                "additionalProperties": False
-                            }
-                        },
-                        {
-                            "name": "manage_service",
-                            "description": "Manage services on remote server",
-                            "inputSchema": {
-                                "type": "object",
-                                "properties": {
-                                    "service": {"type": "string", "description": "Service name"},
-                                    "action": {"type": "string", "description": "Action to perform (start/stop/restart/status)"}
-                                },
-                                "required": ["service", "action"],
-                                "additionalProperties": False
-                            }
-                        }
-                    ]
+                    "tools": self.catalog.list_tools()
                 }
             }
         elif method == "prompts/list":
             # Return available prompts (MCP tools as prompts for auto-completion)
+            if self.catalog.stale:
+                self.refresh_catalog_async()
             return {
                 "jsonrpc": "2.0",
                 "id": request_id,
                 "result": {
-                    "prompts": [
-                        {
-                            "name": "get_system_info",
-                            "description": "Get system information from remote server",
-                            "arguments": []
-                        },
-                        {
-                            "name": "execute_command",
-                            "description": "Execute shell commands on remote server", 
-                            "arguments": [
-                                {
-                                    "name": "command",
-                                    "description": "Command to execute",
-                                    "required": True
-                                }
-                            ]
-                        },
-                        {
-                            "name": "read_file",
-                            "description": "Read file contents from remote server",
-                            "arguments": [
-                                {
-                                    "name": "path", 
-                                    "description": "File path to read",
-                                    "required": True
-                                }
-                            ]
-                        },
-                        {
-                            "name": "write_file",
-                            "description": "Write file contents to remote server",
-                            "arguments": [
-                                {
-                                    "name": "path",
-                                    "description": "File path to write", 
-                                    "required": True
-                                },
-                                {
-                                    "name": "content",
-                                    "description": "Content to write",
-                                    "required": True
-                                }
-                            ]
-                        },
-                        {
-                            "name": "list_directory",
-                            "description": "List directory contents on remote server",
-                            "arguments": [
-                                {
-                                    "name": "path",
-                                    "description": "Directory path to list",
-                                    "required": True
-                                }
-                            ]
-                        },
-                        {
-                            "name": "manage_service",
-                            "description": "Manage services on remote server",
-                            "arguments": [
-                                {
-                                    "name": "service",
-                                    "description": "Service name",
-                                    "required": True
-                                },
-                                {
-                                    "name": "action", 
-                                    "description": "Action to perform (start/stop/restart/status)",
-                                    "required": True
-                                }
-                            ]
-                        }
-                    ]
+                    "prompts": self.catalog.list_prompts()
                 }
             }
         elif method == "prompts/get":
             # Handle both metadata retrieval and execution
             prompt_name = params.get("name")
             prompt_args = params.get("arguments", {})
-            
+
             # If arguments are provided, this is an execution request
             if prompt_args is not None and isinstance(prompt_args, dict):
                 # Execute the prompt and return results with messages
-                if prompt_name == "execute_command":
-                    result = self.send_http_request("execute_command", {"command": prompt_args.get("command", "")})
-                elif prompt_name == "read_file":
-                    result = self.send_http_request("read_file", {"path": prompt_args.get("path", "")})
-                elif prompt_name == "write_file":
-                    result = self.send_http_request("write_file", {"path": prompt_args.get("path", ""), "content": prompt_args.get("content", "")})
-                elif prompt_name == "list_directory":
-                    result = self.send_http_request("list_directory", {"path": prompt_args.get("path", "/")})
-                elif prompt_name == "get_system_info":
-                    result = self.send_http_request("get_system_info", {})
-                elif prompt_name == "manage_service":
-                    result = self.send_http_request("manage_service", {"service": prompt_args.get("service", ""), "action": prompt_args.get("action", "")})
+                if self.catalog.has_tool(prompt_name):
+                    result = self.call_tool(prompt_name, prompt_args)
                 else:
                     result = {"error": f"Unknown prompt: {prompt_name}"}
-                
-                # Format result for execution response
-                if isinstance(result, dict) and "result" in result:
-                    result_data = result["result"]
-                    if isinstance(result_data, dict):
-                        content_text = json.dumps(result_data, indent=2, ensure_ascii=False)
-                    else:
-                        content_text = str(result_data)
-                elif isinstance(result, dict) and "error" in result:
-                    content_text = f"❌ Error: {result['error']}"
-                else:
-                    content_text = str(result)
-                    
+
                 return {
                     "jsonrpc": "2.0",
                     "id": request_id,
@@ -293,7 +1386,7 @@ class MCPServerWrapper:
                                 "role": "assistant",
                                 "content": {
                                     "type": "text",
-                                    "text": content_text
+                                    "text": self.present(self.format_result(result))
                                 }
                             }
                         ]
@@ -301,84 +1394,12 @@ class MCPServerWrapper:
                 }
             else:
                 # Return prompt metadata only
-                prompts_map = {
-                    "get_system_info": {
-                        "name": "get_system_info",
-                        "description": "Get system information from remote server",
-                        "arguments": []
-                    },
-                    "execute_command": {
-                        "name": "execute_command", 
-                        "description": "Execute shell commands on remote server",
-                        "arguments": [
-                            {
-                                "name": "command",
-                                "description": "Command to execute",
-                                "required": True
-                            }
-                        ]
-                    },
-                    "read_file": {
-                        "name": "read_file",
-                        "description": "Read file contents from remote server", 
-                        "arguments": [
-                            {
-                                "name": "path",
-                                "description": "File path to read",
-                                "required": True
-                            }
-                        ]
-                    },
-                    "write_file": {
-                        "name": "write_file",
-                        "description": "Write file contents to remote server",
-                        "arguments": [
-                            {
-                                "name": "path",
-                                "description": "File path to write",
-                                "required": True
-                            },
-                            {
-                                "name": "content", 
-                                "description": "Content to write",
-                                "required": True
-                            }
-                        ]
-                    },
-                    "list_directory": {
-                        "name": "list_directory",
-                        "description": "List directory contents on remote server",
-                        "arguments": [
-                            {
-                                "name": "path",
-                                "description": "Directory path to list", 
-                                "required": True
-                            }
-                        ]
-                    },
-                    "manage_service": {
-                        "name": "manage_service",
-                        "description": "Manage services on remote server",
-                        "arguments": [
-                            {
-                                "name": "service",
-                                "description": "Service name",
-                                "required": True
-                            },
-                            {
-                                "name": "action",
-                                "description": "Action to perform (start/stop/restart/status)",
-                                "required": True
-                            }
-                        ]
-                    }
-                }
-                
-                if prompt_name in prompts_map:
+                prompt = self.catalog.get_prompt(prompt_name)
+                if prompt is not None:
                     return {
                         "jsonrpc": "2.0",
                         "id": request_id,
-                        "result": prompts_map[prompt_name]
+                        "result": prompt
                     }
                 else:
                     return {
@@ -390,35 +1411,10 @@ class MCPServerWrapper:
             # Handle prompt execution by calling corresponding tool
             prompt_name = params.get("name")
             prompt_args = params.get("arguments", {})
-            
+
             # Execute the corresponding tool directly
-            if prompt_name == "execute_command":
-                result = self.send_http_request("execute_command", {"command": prompt_args.get("command", "")})
-            elif prompt_name == "read_file":
-                result = self.send_http_request("read_file", {"path": prompt_args.get("path", "")})
-            elif prompt_name == "write_file":
-                result = self.send_http_request("write_file", {"path": prompt_args.get("path", ""), "content": prompt_args.get("content", "")})
-            elif prompt_name == "list_directory":
-                result = self.send_http_request("list_directory", {"path": prompt_args.get("path", "/")})
-            elif prompt_name == "get_system_info":
-                result = self.send_http_request("get_system_info", {})
-            elif prompt_name == "manage_service":
-                result = self.send_http_request("manage_service", {"service": prompt_args.get("service", ""), "action": prompt_args.get("action", "")})
-            else:
-                result = self.send_http_request(prompt_name, prompt_args)
-            
-            # Format result for MCP prompt response (needs "messages" array)
-            if isinstance(result, dict) and "result" in result:
-                result_data = result["result"]
-                if isinstance(result_data, dict):
-                    content_text = json.dumps(result_data, indent=2, ensure_ascii=False)
-                else:
-                    content_text = str(result_data)
-            elif isinstance(result, dict) and "error" in result:
-                content_text = f"❌ Error: {result['error']}"
-            else:
-                content_text = str(result)
-                
+            result = self.call_tool(prompt_name, prompt_args)
+
             return {
                 "jsonrpc": "2.0",
                 "id": request_id,
@@ -428,7 +1424,7 @@ class MCPServerWrapper:
                             "role": "assistant",
                             "content": {
                                 "type": "text",
-                                "text": content_text
+                                "text": self.present(self.format_result(result))
                             }
                         }
                     ]
@@ -450,39 +1446,24 @@ class MCPServerWrapper:
         elif method == "tools/call":
             tool_name = params.get("name")
             tool_args = params.get("arguments", {})
-            
-            # Convert tool calls to HTTP requests
-            if tool_name == "execute_command":
-                result = self.send_http_request("execute_command", {"command": tool_args.get("command", "")})
-            elif tool_name == "read_file":
-                result = self.send_http_request("read_file", {"path": tool_args.get("path", "")})
-            elif tool_name == "write_file":
-                result = self.send_http_request("write_file", {"path": tool_args.get("path", ""), "content": tool_args.get("content", "")})
-            elif tool_name == "list_directory":
-                result = self.send_http_request("list_directory", {"path": tool_args.get("path", "/")})
-            elif tool_name == "get_system_info":
-                result = self.send_http_request("get_system_info", {})
-            elif tool_name == "manage_service":
-                result = self.send_http_request("manage_service", {"service": tool_args.get("service", ""), "action": tool_args.get("action", "")})
-            else:
-                result = self.send_http_request(tool_name, tool_args)
-            
-            # Format result properly for MCP
-            if isinstance(result, dict) and "result" in result:
-                result_data = result["result"]
-                if isinstance(result_data, dict):
-                    content = json.dumps(result_data, indent=2, ensure_ascii=False)
-                else:
-                    content = str(result_data)
-            elif isinstance(result, dict) and "error" in result:
-                content = f"❌ Error: {result['error']}"
+            progress_token = (params.get("_meta") or {}).get("progressToken")
+            job_id = self.start_job(request_id) if self.catalog.cancellable(tool_name) else None
+            if self.cancelled(request_id):
+                return None
+
+            # Convert tool calls to HTTP requests; with a progress token,
+            # streaming tools report their output as it is produced
+            if progress_token is not None and self.notify and self.catalog.streams(tool_name):
+                text = self.stream_tool(tool_name, tool_args, progress_token, job_id)
+            elif tool_name in WRAPPER_TOOLS:
+                text = self.call_wrapper_tool(tool_name, tool_args)
             else:
-                content = str(result)
-                
+                text = self.present(self.format_result(self.call_tool(tool_name, tool_args, job_id)))
+
             return {
                 "jsonrpc": "2.0",
-                "id": request_id, 
-                "result": {"content": [{"type": "text", "text": content}]}
+                "id": request_id,
+                "result": {"content": [{"type": "text", "text": text}]}
             }
         else:
             # Forward other requests directly
@@ -493,44 +1474,184 @@ class MCPServerWrapper:
                 "result": result
             }
 
-def main():
-    """Main STDIO loop"""
-    wrapper = MCPServerWrapper()
-    logger.info("MCP Server Wrapper started")
-    
-    try:
+# Methods answered from static data; they never wait for an in-flight slot
+LOCAL_METHODS = {
+    "initialize", "ping", "tools/list", "prompts/list", "resources/list",
+    "notifications/initialized"
+}
+
+class StdioServer:
+    """Concurrent JSON-RPC loop over STDIO
+
+    Requests are read by a thread (asyncio cannot watch stdin pipes on
+    Windows), dispatched to a worker pool as they arrive and answered in
+    completion order with their own ids. At most max_in_flight upstream
+    calls run at once; further requests wait for a slot.
+
+    notifications/cancelled drops a request still waiting for a slot; for
+    a running one the response is suppressed and its upstream job killed.
+    """
+
+    def __init__(self, wrapper: MCPServerWrapper, max_in_flight: int = MAX_IN_FLIGHT):
+        self.wrapper = wrapper
+        self.max_in_flight = max(1, max_in_flight)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="mcp-call")
+        self.write_lock = threading.Lock()
+        self.tasks = set()
+        self.queued: Dict[Any, asyncio.Task] = {}  # waiting for a slot, by request id
+        # Startup latency report: initialize answered, first tool result
+        self.initialized_at = None
+        self.first_result_logged = False
+        wrapper.catalog.on_change = self.notify_list_changed
+        wrapper.notify = self.write
+
+    def write(self, message: Dict[str, Any]):
+        """Write one JSON-RPC message; safe to call from any thread"""
+        data = json.dumps(message) + "\n"
+        with self.write_lock:
+            sys.stdout.write(data)
+            sys.stdout.flush()
+
+    def notify_list_changed(self):
+        """Tell the client to re-list tools and prompts"""
+        self.write({"jsonrpc": "2.0", "method": "notifications/tools/list_changed"})
+        self.write({"jsonrpc": "2.0", "method": "notifications/prompts/list_changed"})
+
+    def error(self, request_id, code: int, message: str):
+        self.write({"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}})
+
+    def _read_stdin(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        try:
+            for line in sys.stdin:
+                loop.call_soon_threadsafe(queue.put_nowait, line)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    def _handle(self, request: Dict[str, Any]):
+        request_id = request.get("id")
+        if self.wrapper.cancelled(request_id):
+            return
+        try:
+            response = self.wrapper.handle_request(request)
+        except Exception as e:
+            logger.error(f"Error processing request: {e}")
+            logger.error(traceback.format_exc())
+            response = {"jsonrpc": "2.0", "id": request_id,
+                        "error": {"code": -32603, "message": f"Internal error: {str(e)}"}}
+            if "id" not in request:
+                return
+        # A cancelled request gets no response (MCP cancellation semantics)
+        if self.wrapper.cancelled(request_id):
+            logger.debug(f"Dropping response to cancelled request {request_id}")
+        elif response is not None:
+            self.write(response)
+            self._note_startup(request.get("method"))
+
+    def _note_startup(self, method: Optional[str]):
+        """Log how long the client waited for initialize and its first tool result"""
+        now = time.perf_counter()
+        if method == "initialize" and self.initialized_at is None:
+            self.initialized_at = now
+            logger.info(f"initialize answered {(now - LAUNCHED) * 1000:.1f}ms after launch")
+        elif method == "tools/call" and self.initialized_at is not None and not self.first_result_logged:
+            self.first_result_logged = True
+            logger.info(f"First tool result {(now - self.initialized_at) * 1000:.1f}ms after initialize "
+                        f"({(now - LAUNCHED) * 1000:.1f}ms after launch)")
+
+    async def _dispatch(self, request: Dict[str, Any], slots: asyncio.Semaphore):
+        loop = asyncio.get_running_loop()
+        request_id = request.get("id")
+        try:
+            async with slots:
+                self.queued.pop(request_id, None)
+                await loop.run_in_executor(self.executor, self._handle, request)
+        finally:
+            if request_id is not None:
+                self.wrapper.end_call(request_id)
+
+    def _cancel(self, params: Dict[str, Any]):
+        """notifications/cancelled from the client"""
+        request_id = params.get("requestId")
+        task = self.queued.pop(request_id, None)
+        if task is not None:
+            # Never started: nothing upstream to stop
+            self.wrapper.cancel_call(request_id, params.get("reason"), queued=True)
+            self.wrapper.end_call(request_id)
+            task.cancel()
+        else:
+            # Default executor: the cancel must not wait behind busy call slots
+            asyncio.get_running_loop().run_in_executor(
+                None, self.wrapper.cancel_call, request_id, params.get("reason"))
+
+    async def _discover_tools(self):
+        """Warm up the upstream connections, then discover upstream tools and
+        revalidate them periodically"""
+        loop = asyncio.get_running_loop()
+        catalog = self.wrapper.catalog
+        await loop.run_in_executor(None, self.wrapper.warm_up)
         while True:
-            line = sys.stdin.readline()
-            if not line:
+            if catalog.stale:
+                # Default executor: discovery must not take a call slot
+                await loop.run_in_executor(None, catalog.refresh, self.wrapper.upstream)
+            await asyncio.sleep(max(1.0, catalog.next_refresh - time.monotonic()))
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        slots = asyncio.Semaphore(self.max_in_flight)
+        threading.Thread(target=self._read_stdin, args=(loop, queue), name="mcp-stdin", daemon=True).start()
+        discovery = loop.create_task(self._discover_tools())
+
+        while True:
+            line = await queue.get()
+            if line is None:
                 break
-                
             line = line.strip()
             if not line:
                 continue
-                
+
             try:
                 request = json.loads(line)
-                response = wrapper.handle_request(request)
-                if response is not None:
-                    print(json.dumps(response), flush=True)
             except json.JSONDecodeError as e:
                 logger.error(f"JSON decode error: {e}")
-                error_response = {
-                    "jsonrpc": "2.0",
-                    "id": None,
-                    "error": {"code": -32700, "message": "Parse error"}
-                }
-                print(json.dumps(error_response), flush=True)
-            except Exception as e:
-                logger.error(f"Error processing request: {e}")
-                logger.error(traceback.format_exc())
-                error_response = {
-                    "jsonrpc": "2.0", 
-                    "id": None,
-                    "error": {"code": -32603, "message": f"Internal error: {str(e)}"}
-                }
-                print(json.dumps(error_response), flush=True)
-                
+                self.error(None, -32700, "Parse error")
+                continue
+            if not isinstance(request, dict):
+                self.error(None, -32600, "Invalid Request")
+                continue
+
+            if request.get("method") == "notifications/cancelled":
+                self._cancel(request.get("params") or {})
+                continue
+            if request.get("method") in LOCAL_METHODS:
+                self._handle(request)
+                continue
+
+            request_id = request.get("id")
+            if request_id is not None:
+                self.wrapper.begin_call(request_id)
+            task = loop.create_task(self._dispatch(request, slots))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+            if request_id is not None:
+                self.queued[request_id] = task
+
+        # stdin closed: let in-flight calls finish and flush their responses
+        discovery.cancel()
+        if self.tasks:
+            logger.info(f"Waiting for {len(self.tasks)} in-flight request(s)")
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+        self.wrapper.log_stats()
+
+def main():
+    """Main STDIO loop"""
+    wrapper = MCPServerWrapper()
+    server = StdioServer(wrapper)
+    logger.info(f"MCP Server Wrapper started (max in-flight: {server.max_in_flight})")
+    
+    try:
+        asyncio.run(server.serve())
     except KeyboardInterrupt:
         logger.info("Wrapper interrupted")
     except Exception as e:
@@ -538,4 +1659,4 @@ def main():
         logger.error(traceback.format_exc())
         
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()